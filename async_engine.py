@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""
+异步传输引擎 - 基于asyncio和aiohttp，以S3兼容的签名请求直接访问COS和MinIO
+
+适用于大量小文件的迁移：单个事件循环即可维持数百个并发请求，
+避免一个请求占用一个线程带来的线程开销和GIL竞争。
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, quote, urlsplit
+
+from checksum import ChecksumMismatchError, verify_dest_etag
+from config import COS_CONFIGS, TRANSFER_CONFIG
+from dedup import PENDING
+from sync import dest_object, source_metadata
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - 仅在选择异步引擎时需要
+    aiohttp = None
+
+
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+
+# 任务来源结束标记
+_DONE = object()
+
+
+def sign_v4(method, url, headers, access_key, secret_key, region, service='s3',
+            payload_hash=UNSIGNED_PAYLOAD):
+    """
+    按AWS Signature Version 4为请求签名（COS和MinIO均兼容）
+    
+    Args:
+        method: HTTP方法
+        url: 完整URL（路径部分需已做URI编码）
+        headers: 需要签名的请求头
+        access_key: 访问密钥ID
+        secret_key: 访问密钥
+        region: 区域
+        service: 服务名称
+        payload_hash: 请求体的SHA256，流式请求体使用UNSIGNED-PAYLOAD
+        
+    Returns:
+        dict: 包含签名的完整请求头
+    """
+    parts = urlsplit(url)
+    now = datetime.now(timezone.utc)
+    amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+    date_stamp = now.strftime('%Y%m%d')
+    
+    signed = {key.lower(): str(value).strip() for key, value in headers.items()}
+    signed['host'] = parts.netloc
+    signed['x-amz-date'] = amz_date
+    signed['x-amz-content-sha256'] = payload_hash
+    
+    canonical_query = '&'.join(sorted(
+        f"{quote(key, safe='-_.~')}={quote(value, safe='-_.~')}"
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+    ))
+    signed_names = sorted(signed)
+    canonical_headers = ''.join(f"{name}:{' '.join(signed[name].split())}\n" for name in signed_names)
+    canonical_request = '\n'.join([
+        method, parts.path or '/', canonical_query, canonical_headers, ';'.join(signed_names), payload_hash
+    ])
+    
+    scope = f'{date_stamp}/{region}/{service}/aws4_request'
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256', amz_date, scope, hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+    ])
+    
+    key = ('AWS4' + secret_key).encode('utf-8')
+    for part in (date_stamp, region, service, 'aws4_request'):
+        key = hmac.new(key, part.encode('utf-8'), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+    
+    signed['authorization'] = (
+        f'AWS4-HMAC-SHA256 Credential={access_key}/{scope}, '
+        f"SignedHeaders={';'.join(signed_names)}, Signature={signature}"
+    )
+    return signed
+
+
+class S3RequestError(Exception):
+    """S3兼容接口返回的错误响应"""
+    
+    def __init__(self, method, url, status, body=''):
+        self.status = status
+        code = ''
+        if '<Code>' in body:
+            code = body.split('<Code>', 1)[1].split('</Code>', 1)[0]
+        self.code = code
+        super().__init__(f"{method} {url} 失败: HTTP {status} {code}".strip())
+
+
+class AsyncTransferEngine:
+    """
+    异步传输引擎
+    
+    与线程引擎共用迁移计划、清单、行状态记录和统计；每个任务依次执行
+    COS HEAD -> MinIO HEAD -> COS GET（流式）-> MinIO PUT（流式），
+    同时在途的任务数由信号量限制。大对象交给线程引擎的分段并发路径处理。
+    """
+    
+    def __init__(self, migrator, concurrency=None):
+        """
+        初始化异步引擎
+        
+        Args:
+            migrator: COS2MinIOMigrator实例
+            concurrency: 同时在途的任务数，如果为None则使用配置文件中的设置
+        """
+        if aiohttp is None:
+            raise ImportError("异步引擎需要aiohttp，请执行: pip install aiohttp")
+        
+        self.migrator = migrator
+        self.concurrency = max(concurrency or TRANSFER_CONFIG['async_concurrency'], 1)
+        self.chunk_size = TRANSFER_CONFIG['stream_chunk_size']
+        self.minio_config = migrator.minio_uploader.config
+        self.minio_region = self.minio_config.get('region') or 'us-east-1'
+        self.rate_limits = migrator.rate_limits
+    
+    def run(self, items, on_done, retries=None):
+        """
+        执行所有迁移任务（阻塞直到全部完成）
+        
+        Args:
+            items: WorkItem的可迭代对象
+            on_done: 任务完成回调，参数为(item, task)，与线程引擎的(item, future)用法一致
+            retries: RetryQueue实例，作为额外的任务来源；为None时不重试
+        """
+        sources = [items] if retries is None else [items, retries]
+        asyncio.run(self._run(sources, on_done))
+    
+    async def _run(self, sources, on_done):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=300)
+        pending = set()
+        
+        # 任务来源由生产者线程读取：读取清单块、等待列举结果或重试到期时不阻塞事件循环中的传输
+        loop = asyncio.get_running_loop()
+        feed = asyncio.Queue(maxsize=self.concurrency)
+        errors = []
+        for items in sources:
+            threading.Thread(target=self._produce, args=(items, feed, loop, errors),
+                             name='async-producer', daemon=True).start()
+        
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, auto_decompress=False) as session:
+            finished = 0
+            while finished < len(sources):
+                await semaphore.acquire()
+                item = await feed.get()
+                if item is _DONE:
+                    semaphore.release()
+                    finished += 1
+                    continue
+                task = asyncio.create_task(self._migrate(session, item))
+                pending.add(task)
+                
+                def done(task, item=item):
+                    pending.discard(task)
+                    semaphore.release()
+                    on_done(item, task)
+                task.add_done_callback(done)
+            
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        if errors:
+            raise errors[0]
+    
+    @staticmethod
+    def _produce(items, feed, loop, errors):
+        """在生产者线程中逐个读取任务放入队列，队列满时等待"""
+        try:
+            for item in items:
+                asyncio.run_coroutine_threadsafe(feed.put(item), loop).result()
+        except Exception as e:
+            logging.error(f"读取迁移任务失败: {e}")
+            errors.append(e)
+        finally:
+            asyncio.run_coroutine_threadsafe(feed.put(_DONE), loop).result()
+    
+    def _cos_url(self, config, cos_path):
+        host = config.get('domain') or f"{config['bucket']}.cos.{config['region']}.myqcloud.com"
+        return f"{config.get('scheme') or 'https'}://{host}/{quote(cos_path, safe='/~')}"
+    
+    def _minio_url(self, bucket, object_name):
+        scheme = 'https' if self.minio_config.get('secure') else 'http'
+        return f"{scheme}://{self.minio_config['endpoint']}/{bucket}/{quote(object_name, safe='/~')}"
+    
+    def _cos_headers(self, config, method, url, headers=None):
+        return sign_v4(method, url, headers or {}, config['secret_id'], config['secret_key'], config['region'])
+    
+    def _minio_headers(self, method, url, headers=None):
+        return sign_v4(method, url, headers or {}, self.minio_config['access_key'],
+                       self.minio_config['secret_key'], self.minio_region)
+    
+    def _cos_limits(self, config_name):
+        return (self.rate_limits.cos(config_name),) if self.rate_limits else ()
+    
+    def _minio_limits(self, bucket):
+        return self.rate_limits.minio(bucket) if self.rate_limits else ()
+    
+    async def _throttle(self, limits, requests=0, size=0):
+        """按限速预扣请求和带宽令牌，在事件循环中等待（不阻塞其他任务）"""
+        wait = 0
+        for limit in limits:
+            if requests:
+                wait = max(wait, limit.reserve_request(requests))
+            if size:
+                wait = max(wait, limit.reserve_transfer(size))
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    async def _head(self, session, url, headers):
+        """发送HEAD请求，对象不存在返回None"""
+        async with session.head(url, headers=headers) as response:
+            if response.status == 404:
+                return None
+            if response.status >= 300:
+                raise S3RequestError('HEAD', url, response.status)
+            return response.headers
+    
+    async def _migrate(self, session, item):
+        """异步迁移单个任务，结果格式与线程引擎一致"""
+        migrator = self.migrator
+        url, cos_path, target_bucket = item.url, item.cos_path, item.target_bucket
+        result = migrator._new_result(item)
+        delegated = False
+        started = time.monotonic()
+        
+        try:
+            migrator._update_rows(item, 'processing')
+            
+            if item.config_name is None:
+                raise ValueError(f"无法检测COS源存储桶配置: {url}")
+            if not cos_path:
+                raise ValueError(f"无法从URL提取有效路径: {url}")
+            config = COS_CONFIGS[item.config_name]
+            
+            # 源端：优先使用任务附带的列举结果和本地清单，否则异步HEAD
+            known, source_info = True, item.source_info
+            if source_info is None:
+                known, source_info = migrator.lookup_source_info(item.config_name, cos_path)
+            if not known:
+                await self._throttle(self._cos_limits(item.config_name), requests=1)
+                cos_url = self._cos_url(config, cos_path)
+                with migrator.metrics.stage('source_head', result):
+                    headers = await self._head(session, cos_url, self._cos_headers(config, 'HEAD', cos_url))
+                if headers is not None:
+                    source_info = {
+                        'size': int(headers.get('Content-Length', 0)),
+                        'etag': headers.get('ETag', '').strip('"'),
+                        'crc64': headers.get('x-cos-hash-crc64ecma'),
+                        'last_modified': headers.get('Last-Modified', '')
+                    }
+            if source_info is None:
+                raise ValueError(f"COS文件不存在: {cos_path}")
+            result['size'] = source_info['size']
+            result['etag'] = source_info.get('etag')
+            result['crc64'] = source_info.get('crc64')
+            
+            # 目标端：优先本地清单，否则异步HEAD（增量同步时比对元数据）
+            if item.needs_transfer:
+                exists = False
+            elif migrator.sync:
+                exists = await self._dest_is_current(session, item, source_info, result)
+            else:
+                exists = migrator.lookup_dest_exists(cos_path, target_bucket)
+                if exists is None:
+                    exists = await self._dest_head(session, target_bucket, cos_path, result) is not None
+            if exists:
+                logging.info(f"文件已存在于MinIO{'且未变更' if migrator.sync else ''}，跳过: {target_bucket}/{cos_path}")
+                result['success'] = True
+                result['status'] = 'skipped'
+                result['minio_path'] = cos_path
+                migrator._record_result(item, result)
+                return result
+            
+            # 大对象交给线程引擎的分段并发路径
+            if source_info['size'] >= migrator.large_object_threshold:
+                delegated = True
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    None, migrator.migrate_item, item._replace(source_info=source_info, needs_transfer=True)
+                )
+            
+            if not await self._copy_duplicate(item, result):
+                with migrator.metrics.stage('stream', result):
+                    await self._transfer(session, item, config, result)
+            
+            if migrator.dest_inventory:
+                migrator.dest_inventory.add(target_bucket, cos_path)
+            
+            result['minio_path'] = cos_path
+            result['success'] = True
+            result['status'] = 'success'
+            logging.info(f"迁移成功: {cos_path} -> {target_bucket}/{cos_path}")
+        
+        except Exception as e:
+            # 与线程引擎相同：记录错误类别，限流和瞬时错误由_record_result放入重试队列
+            migrator._mark_failed(item, result, e)
+        
+        # 首个副本完成时通知等待相同内容的任务
+        migrator._finish_dedup(result)
+        
+        # 交给线程引擎的大对象由migrate_item记录耗时
+        if not delegated:
+            migrator.metrics.record('object', time.monotonic() - started, result)
+            migrator._record_result(item, result)
+        return result
+    
+    async def _copy_duplicate(self, item, result):
+        """内容去重：相同内容正在传输时在事件循环中等待（不占用线程），已迁移时在线程中服务端复制"""
+        dedup = self.migrator.dedup
+        if dedup is None:
+            return False
+        source = dedup.claim(result)
+        while source is PENDING:
+            await asyncio.sleep(TRANSFER_CONFIG['dedup_poll_interval'])
+            source = dedup.claim(result)
+        if source is None:
+            return False
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.migrator.copy_from, item, result, source)
+    
+    async def _dest_head(self, session, target_bucket, cos_path, result=None):
+        """对MinIO对象发送HEAD请求，对象不存在返回None"""
+        await self._throttle(self._minio_limits(target_bucket), requests=1)
+        minio_url = self._minio_url(target_bucket, cos_path)
+        with self.migrator.metrics.stage('dest_stat', result):
+            return await self._head(session, minio_url, self._minio_headers('HEAD', minio_url))
+    
+    async def _dest_is_current(self, session, item, source_info, result=None):
+        """增量同步：优先使用目标端清单比对，清单未覆盖时发送HEAD请求"""
+        known, dest = self.migrator.lookup_dest_object(item.cos_path, item.target_bucket)
+        if not known:
+            headers = await self._dest_head(session, item.target_bucket, item.cos_path, result)
+            if headers is not None:
+                dest = dest_object(headers.get('Content-Length'), headers.get('ETag'),
+                                   headers.get('Last-Modified'), headers)
+        return self.migrator.is_dest_current(item, source_info, dest)
+    
+    async def _transfer(self, session, item, config, result):
+        """COS GET响应流直接作为MinIO PUT请求体，启用校验时在数据流经时计算校验值"""
+        cos_path, target_bucket, size = item.cos_path, item.target_bucket, result['size']
+        checksum = self.migrator._new_checksum(item, result)
+        limits = self._cos_limits(item.config_name) + tuple(self._minio_limits(target_bucket))
+        await self._throttle(limits, requests=1)
+        cos_url = self._cos_url(config, cos_path)
+        async with session.get(cos_url, headers=self._cos_headers(config, 'GET', cos_url)) as source:
+            if source.status >= 300:
+                raise S3RequestError('GET', cos_url, source.status, await source.text())
+            
+            async def body():
+                async for chunk in source.content.iter_chunked(self.chunk_size):
+                    await self._throttle(limits, size=len(chunk))
+                    if checksum is not None:
+                        checksum.update(chunk)
+                    yield chunk
+            
+            minio_url = self._minio_url(target_bucket, cos_path)
+            headers = {
+                'Content-Length': str(size),
+                'Content-Type': self.migrator.minio_uploader._guess_content_type(cos_path)
+            }
+            for key, value in (source_metadata(result) or {}).items():
+                headers[f'x-amz-meta-{key}'] = value
+            headers = self._minio_headers('PUT', minio_url, headers)
+            async with session.put(minio_url, data=body(), headers=headers) as response:
+                if response.status >= 300:
+                    raise S3RequestError('PUT', minio_url, response.status, await response.text())
+                dest_etag = response.headers.get('ETag', '').strip('"')
+                logging.debug(f"上传成功: {cos_path}, ETag: {dest_etag}")
+        
+        result['dest_etag'] = dest_etag
+        if checksum is None:
+            return
+        try:
+            checksum.verify()
+            verify_dest_etag(cos_path, checksum.md5, dest_etag)
+        except ChecksumMismatchError:
+            # 校验失败的对象不能留在目标端，否则重试时会被当作已存在而跳过
+            await self._delete(session, minio_url)
+            raise
+        result['checksum'] = checksum.describe()
+    
+    async def _delete(self, session, url):
+        """删除MinIO对象（失败只记录日志）"""
+        try:
+            async with session.delete(url, headers=self._minio_headers('DELETE', url)) as response:
+                if response.status >= 300 and response.status != 404:
+                    logging.error(f"删除对象失败: {url}, HTTP {response.status}")
+        except aiohttp.ClientError as e:
+            logging.error(f"删除对象失败: {url}, 错误: {e}")
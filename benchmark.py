@@ -0,0 +1,760 @@
+# -*- coding: utf-8 -*-
+"""
+性能基准测试 - 在本地模拟COS源端和MinIO目标端，以不同并发数运行migrate_all并对比吞吐
+
+模拟服务实现迁移用到的S3接口子集（HEAD、GET及Range读取、分页列举、单次上传和分片上传），
+可注入请求延迟和带宽上限，使结果接近跨地域网络条件。对象大小和内容由固定随机种子生成，
+相同参数的多次运行结果可以直接比较。每组并发数在独立的子进程中运行，峰值内存互不影响。
+
+用法:
+    python benchmark.py --workload tiny --workers 8 32 128
+    python benchmark.py --workload huge --engine async --latency 0.03 --bandwidth 52428800
+"""
+import argparse
+import asyncio
+import bisect
+import csv
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from urllib.parse import unquote
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+from config import BENCHMARK_CONFIG
+
+
+# 模拟COS源端的bucket名称和地域（清单URL与正式环境格式相同）
+COS_BUCKET = 'benchmark-1250000000'
+COS_REGION = 'ap-guangzhou'
+
+# S3 XML响应的命名空间（MinIO SDK按命名空间解析）
+S3_XMLNS = 'http://s3.amazonaws.com/doc/2006-03-01/'
+
+# 对象内容为同一随机块的平铺，读取和计算MD5时按块输出
+PATTERN_SIZE = 1024 * 1024
+CHUNK_SIZE = 256 * 1024
+
+
+def generate_sizes(count, min_size, max_size, seed):
+    """
+    按对数均匀分布生成对象大小（小对象数量多、大对象数量少，与实际存储桶的分布接近）
+    
+    Args:
+        count: 对象数
+        min_size: 最小大小（字节）
+        max_size: 最大大小（字节）
+        seed: 随机种子
+        
+    Returns:
+        list: 对象大小
+    """
+    rng = random.Random(seed)
+    low, high = math.log(max(min_size, 1)), math.log(max(max_size, min_size, 1))
+    return [int(math.exp(rng.uniform(low, high))) for _ in range(count)]
+
+
+def parse_range(header, size):
+    """
+    解析Range请求头（只支持单个区间 bytes=start-end）
+    
+    Returns:
+        tuple: (start, end)，end不包含；未指定Range时返回None
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    start, _, end = header[len('bytes='):].partition('-')
+    if not start:
+        return max(size - int(end), 0), size
+    return int(start), min(int(end) + 1, size) if end else size
+
+
+class SyntheticObjects:
+    """
+    模拟的源端对象
+    
+    只保存对象大小，内容由随机块平铺生成；相同大小的对象内容相同，ETag（MD5）按大小缓存。
+    """
+    
+    def __init__(self, sizes, seed):
+        """
+        初始化源端对象
+        
+        Args:
+            sizes: 对象名称 -> 大小
+            seed: 生成内容的随机种子
+        """
+        self.sizes = sizes
+        self.keys = sorted(sizes)
+        self.last_modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self._pattern = random.Random(seed).randbytes(PATTERN_SIZE)
+        self._etags = {}
+        self._lock = threading.Lock()
+    
+    def chunks(self, start, end):
+        """按块生成[start, end)范围的内容"""
+        offset = start
+        while offset < end:
+            position = offset % PATTERN_SIZE
+            length = min(CHUNK_SIZE, PATTERN_SIZE - position, end - offset)
+            yield self._pattern[position:position + length]
+            offset += length
+    
+    def etag(self, size):
+        """对象内容的MD5"""
+        with self._lock:
+            etag = self._etags.get(size)
+        if etag is None:
+            md5 = hashlib.md5()
+            for chunk in self.chunks(0, size):
+                md5.update(chunk)
+            etag = md5.hexdigest()
+            with self._lock:
+                self._etags[size] = etag
+        return etag
+
+
+class NetworkLink:
+    """
+    模拟的网络链路：每个请求增加固定延迟，所有请求共享带宽
+    
+    带宽按虚拟时间排队：每段数据在前一段发送完成后才开始发送，只在事件循环线程中使用，不需要加锁。
+    """
+    
+    def __init__(self, latency=0.0, bandwidth=0):
+        """
+        初始化网络链路
+        
+        Args:
+            latency: 每个请求增加的延迟（秒）
+            bandwidth: 带宽上限（字节/秒），0表示不限
+        """
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._available_at = 0.0
+    
+    async def request(self):
+        """请求的往返延迟"""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+    
+    async def transfer(self, size):
+        """等待size字节在链路上传输完成"""
+        if not self.bandwidth:
+            return
+        now = time.monotonic()
+        self._available_at = max(self._available_at, now) + size / self.bandwidth
+        if self._available_at > now:
+            await asyncio.sleep(self._available_at - now)
+
+
+def _prefix_end(prefix):
+    """排序在所有以prefix开头的名称之后的第一个字符串"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _list_page(keys, prefix, start_after, max_keys, delimiter):
+    """
+    在已排序的对象名称中列出一页
+    
+    Returns:
+        tuple: (对象名称列表, 公共前缀列表, 是否还有下一页, 下一页起点)
+    """
+    contents, prefixes = [], []
+    if delimiter and start_after.endswith(delimiter):
+        # 上一页以公共前缀结束时从该前缀之后开始
+        position = bisect.bisect_left(keys, _prefix_end(start_after))
+    elif start_after:
+        position = bisect.bisect_right(keys, start_after)
+    else:
+        position = bisect.bisect_left(keys, prefix)
+    last = ''
+    while position < len(keys) and len(contents) + len(prefixes) < max_keys:
+        key = keys[position]
+        if not key.startswith(prefix):
+            break
+        cut = key.find(delimiter, len(prefix)) if delimiter else -1
+        if cut >= 0:
+            # 公共前缀：跳过该前缀下的全部对象
+            common = key[:cut + len(delimiter)]
+            prefixes.append(common)
+            last = common
+            position = bisect.bisect_left(keys, _prefix_end(common))
+            continue
+        contents.append(key)
+        last = key
+        position += 1
+    truncated = position < len(keys) and keys[position].startswith(prefix)
+    return contents, prefixes, truncated, last
+
+
+def _xml(root, body, namespace=True):
+    xmlns = f' xmlns="{S3_XMLNS}"' if namespace else ''
+    return web.Response(
+        text=f'<?xml version="1.0" encoding="UTF-8"?>\n<{root}{xmlns}>{body}</{root}>',
+        content_type='application/xml'
+    )
+
+
+def _error(status, code, resource=''):
+    return web.Response(
+        status=status,
+        text=(f'<?xml version="1.0" encoding="UTF-8"?>\n<Error><Code>{code}</Code><Message>{code}</Message>'
+              f'<Resource>{escape(resource)}</Resource><RequestId>benchmark</RequestId></Error>'),
+        content_type='application/xml'
+    )
+
+
+class FakeS3Server:
+    """
+    本地模拟的S3兼容服务（在后台线程的事件循环中运行）
+    
+    role为'cos'时只读，提供SyntheticObjects中的对象和V1列举（Marker翻页）；
+    role为'minio'时提供bucket创建、上传（含分片上传）、服务端复制、HEAD和V2列举，只保存对象大小、ETag和用户元数据。
+    """
+    
+    def __init__(self, role, link, objects=None, host='127.0.0.1', port=0):
+        """
+        初始化模拟服务
+        
+        Args:
+            role: 'cos'（源端）或 'minio'（目标端）
+            link: NetworkLink实例
+            objects: 源端对象（role为'cos'时必须指定）
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+        """
+        self.role = role
+        self.link = link
+        self.objects = objects
+        self.host = host
+        self.port = port
+        self.buckets = {}
+        self._uploads = {}
+        self._loop = None
+        self._runner = None
+    
+    @property
+    def endpoint(self):
+        return f"{self.host}:{self.port}"
+    
+    def start(self):
+        """在后台线程中启动服务，返回时已开始监听"""
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        
+        async def serve():
+            app = web.Application(client_max_size=64 * 1024 * 1024)
+            app.router.add_route('*', '/{tail:.*}', self._handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, self.host, self.port, backlog=1024)
+            await site.start()
+            self.port = self._runner.addresses[0][1]
+            ready.set()
+        
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(serve())
+            self._loop.run_forever()
+        
+        threading.Thread(target=run, name=f'fake-{self.role}', daemon=True).start()
+        ready.wait()
+        logging.info(f"模拟{self.role}服务: http://{self.endpoint}")
+    
+    def close(self):
+        """停止服务"""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+    
+    async def _handle(self, request):
+        await self.link.request()
+        if self.role == 'cos':
+            # COS以自定义域名访问时，路径中不包含bucket
+            return await self._handle_cos(request, unquote(request.path)[1:])
+        bucket, _, key = unquote(request.path)[1:].partition('/')
+        if not key:
+            return await self._handle_bucket(request, bucket)
+        return await self._handle_object(request, bucket, key)
+    
+    async def _handle_cos(self, request, key):
+        if not key:
+            if request.method != 'GET':
+                return web.Response(status=200)
+            return self._list_v1(request)
+        size = self.objects.sizes.get(key)
+        if size is None:
+            return _error(404, 'NoSuchKey', key)
+        
+        loop = asyncio.get_running_loop()
+        etag = await loop.run_in_executor(None, self.objects.etag, size)
+        headers = {
+            'ETag': f'"{etag}"',
+            'Last-Modified': format_datetime(self.objects.last_modified, usegmt=True),
+            'Accept-Ranges': 'bytes',
+            'Content-Type': 'application/octet-stream'
+        }
+        if request.method == 'HEAD':
+            headers['Content-Length'] = str(size)
+            return web.Response(headers=headers)
+        
+        byte_range = parse_range(request.headers.get('Range'), size)
+        start, end = byte_range or (0, size)
+        response = web.StreamResponse(status=206 if byte_range else 200, headers=headers)
+        response.content_length = end - start
+        if byte_range:
+            response.headers['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+        await response.prepare(request)
+        for chunk in self.objects.chunks(start, end):
+            await self.link.transfer(len(chunk))
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+    
+    def _list_v1(self, request):
+        query = request.query
+        prefix, delimiter = query.get('prefix', ''), query.get('delimiter', '')
+        max_keys = min(int(query.get('max-keys', 1000)), 1000)
+        keys, prefixes, truncated, last = _list_page(
+            self.objects.keys, prefix, query.get('marker', ''), max_keys, delimiter
+        )
+        modified = self.objects.last_modified.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        body = [f'<Name>{COS_BUCKET}</Name><Prefix>{escape(prefix)}</Prefix>'
+                f'<Marker>{escape(query.get("marker", ""))}</Marker><MaxKeys>{max_keys}</MaxKeys>'
+                f'<Delimiter>{escape(delimiter)}</Delimiter><IsTruncated>{str(truncated).lower()}</IsTruncated>']
+        if truncated:
+            body.append(f'<NextMarker>{escape(last)}</NextMarker>')
+        for key in keys:
+            size = self.objects.sizes[key]
+            body.append(f'<Contents><Key>{escape(key)}</Key><LastModified>{modified}</LastModified>'
+                        f'<ETag>"{self.objects.etag(size)}"</ETag><Size>{size}</Size>'
+                        f'<StorageClass>STANDARD</StorageClass></Contents>')
+        for common in prefixes:
+            body.append(f'<CommonPrefixes><Prefix>{escape(common)}</Prefix></CommonPrefixes>')
+        return _xml('ListBucketResult', ''.join(body), namespace=False)
+    
+    async def _handle_bucket(self, request, bucket):
+        if 'location' in request.query:
+            return _xml('LocationConstraint', '')
+        if request.method == 'PUT':
+            self.buckets.setdefault(bucket, {})
+            return web.Response(status=200)
+        if bucket not in self.buckets:
+            return _error(404, 'NoSuchBucket', bucket)
+        if request.method == 'HEAD':
+            return web.Response(status=200)
+        return self._list_v2(request, bucket)
+    
+    def _list_v2(self, request, bucket):
+        query = request.query
+        store = self.buckets[bucket]
+        prefix, delimiter = query.get('prefix', ''), query.get('delimiter', '')
+        max_keys = min(int(query.get('max-keys', 1000)), 1000)
+        start_after = query.get('continuation-token') or query.get('start-after', '')
+        keys, prefixes, truncated, last = _list_page(sorted(store), prefix, start_after, max_keys, delimiter)
+        include_meta = query.get('metadata') == 'true'
+        body = [f'<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix><KeyCount>{len(keys)}</KeyCount>'
+                f'<MaxKeys>{max_keys}</MaxKeys><IsTruncated>{str(truncated).lower()}</IsTruncated>']
+        if truncated:
+            body.append(f'<NextContinuationToken>{escape(last)}</NextContinuationToken>')
+        for key in keys:
+            size, etag, modified, metadata = store[key]
+            meta = ''
+            if include_meta and metadata:
+                meta = '<UserMetadata>' + ''.join(
+                    f'<X-Amz-Meta-{escape(name)}>{escape(value)}</X-Amz-Meta-{escape(name)}>'
+                    for name, value in metadata.items()
+                ) + '</UserMetadata>'
+            body.append(f'<Contents><Key>{escape(key)}</Key>'
+                        f'<LastModified>{modified.strftime("%Y-%m-%dT%H:%M:%S.000Z")}</LastModified>'
+                        f'<ETag>"{etag}"</ETag><Size>{size}</Size><StorageClass>STANDARD</StorageClass>'
+                        f'{meta}</Contents>')
+        for common in prefixes:
+            body.append(f'<CommonPrefixes><Prefix>{escape(common)}</Prefix></CommonPrefixes>')
+        return _xml('ListBucketResult', ''.join(body))
+    
+    async def _receive(self, request):
+        """读取请求体（按链路带宽限速），返回(大小, MD5)"""
+        md5 = hashlib.md5()
+        size = 0
+        async for chunk in request.content.iter_chunked(CHUNK_SIZE):
+            await self.link.transfer(len(chunk))
+            md5.update(chunk)
+            size += len(chunk)
+        return size, md5
+    
+    async def _handle_object(self, request, bucket, key):
+        store = self.buckets.get(bucket)
+        if store is None:
+            return _error(404, 'NoSuchBucket', bucket)
+        query = request.query
+        
+        if request.method == 'POST' and 'uploads' in query:
+            upload_id = hashlib.md5(f'{bucket}/{key}/{time.monotonic()}'.encode()).hexdigest()
+            self._uploads[upload_id] = ({}, self._metadata(request))
+            return _xml('InitiateMultipartUploadResult',
+                        f'<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId>')
+        if request.method == 'PUT' and 'uploadId' in query:
+            parts, _ = self._uploads[query['uploadId']]
+            size, md5 = await self._receive(request)
+            parts[int(query['partNumber'])] = (size, md5.digest())
+            return web.Response(headers={'ETag': f'"{md5.hexdigest()}"'})
+        if request.method == 'POST' and 'uploadId' in query:
+            await request.read()
+            parts, metadata = self._uploads.pop(query['uploadId'])
+            ordered = [parts[number] for number in sorted(parts)]
+            etag = f"{hashlib.md5(b''.join(digest for _, digest in ordered)).hexdigest()}-{len(ordered)}"
+            store[key] = (sum(size for size, _ in ordered), etag, datetime.now(timezone.utc), metadata)
+            return _xml('CompleteMultipartUploadResult',
+                        f'<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key><ETag>"{etag}"</ETag>')
+        if request.method == 'DELETE' and 'uploadId' in query:
+            self._uploads.pop(query['uploadId'], None)
+            return web.Response(status=204)
+        
+        if request.method == 'PUT' and 'x-amz-copy-source' in request.headers:
+            # 服务端复制（--dedup）
+            await request.read()
+            source_bucket, _, source_key = unquote(request.headers['x-amz-copy-source']).lstrip('/').partition('/')
+            source = self.buckets.get(source_bucket, {}).get(source_key)
+            if source is None:
+                return _error(404, 'NoSuchKey', source_key)
+            modified = datetime.now(timezone.utc)
+            store[key] = (source[0], source[1], modified, self._metadata(request))
+            return _xml('CopyObjectResult', f'<LastModified>{modified.strftime("%Y-%m-%dT%H:%M:%S.000Z")}</LastModified>'
+                                            f'<ETag>"{source[1]}"</ETag>')
+        if request.method == 'PUT':
+            size, md5 = await self._receive(request)
+            store[key] = (size, md5.hexdigest(), datetime.now(timezone.utc), self._metadata(request))
+            return web.Response(headers={'ETag': f'"{md5.hexdigest()}"'})
+        if request.method == 'DELETE':
+            store.pop(key, None)
+            return web.Response(status=204)
+        
+        entry = store.get(key)
+        if entry is None:
+            return _error(404, 'NoSuchKey', key)
+        size, etag, modified, metadata = entry
+        headers = {'Content-Length': str(size), 'ETag': f'"{etag}"',
+                   'Last-Modified': format_datetime(modified, usegmt=True)}
+        headers.update({f'x-amz-meta-{name}': value for name, value in metadata.items()})
+        if request.method == 'HEAD':
+            return web.Response(headers=headers)
+        return _error(501, 'NotImplemented', key)
+    
+    @staticmethod
+    def _metadata(request):
+        return {name[len('x-amz-meta-'):]: value for name, value in request.headers.items()
+                if name.lower().startswith('x-amz-meta-')}
+
+
+def write_manifest(path, keys, target_bucket):
+    """写出CSV迁移清单（URL格式与正式环境相同）"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['url', 'status', 'buckets'])
+        for key in keys:
+            writer.writerow([f"https://{COS_BUCKET}.cos.{COS_REGION}.myqcloud.com/{key}", 'pending', target_bucket])
+
+
+def _peak_rss():
+    """本进程及已结束子进程的峰值内存（字节）"""
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * scale
+
+
+def _directory_size(path):
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total += _directory_size(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except FileNotFoundError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return total
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(math.ceil(fraction * len(ordered))) - 1, len(ordered) - 1)]
+
+
+def _run_case(case):
+    """
+    在子进程中运行一组基准测试
+    
+    Args:
+        case: 测试参数（清单路径、临时目录、并发数、迁移选项）
+        
+    Returns:
+        dict: 测试结果
+    """
+    logging.basicConfig(level=case['log_level'], format='%(asctime)s [%(levelname)s] %(message)s')
+    from cos2minio import COS2MinIOMigrator
+    
+    latencies = []
+    
+    class BenchmarkMigrator(COS2MinIOMigrator):
+        def _record_result(self, item, result):
+            if result.get('status') == 'success':
+                latencies.append(result.get('timings', {}).get('object'))
+            super()._record_result(item, result)
+    
+    # 采样临时目录的占用
+    temp_peak = [0]
+    stop = threading.Event()
+    
+    def sample():
+        while not stop.wait(case['sample_interval']):
+            temp_peak[0] = max(temp_peak[0], _directory_size(case['temp_dir']))
+    
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    
+    migrator = BenchmarkMigrator(
+        case['manifest'],
+        cos_config_name='bucket',
+        temp_dir=case['temp_dir'],
+        max_workers=case['workers'],
+        **case['options']
+    )
+    try:
+        ok = migrator.migrate_all(status_filter=['pending'])
+    finally:
+        stop.set()
+        sampler.join()
+        migrator.cleanup()
+    
+    stats = dict(migrator.stats)
+    latencies = [value for value in latencies if value is not None]
+    elapsed = stats['elapsed'] or 1e-9
+    return {
+        'workers': case['workers'],
+        'ok': ok,
+        'objects': stats['success'],
+        'failed': stats['failed'],
+        'bytes': stats['bytes'],
+        'elapsed': round(elapsed, 3),
+        'objects_per_sec': round(stats['success'] / elapsed, 1),
+        'mb_per_sec': round(stats['bytes'] / elapsed / 1024 / 1024, 2),
+        'p50': _percentile(latencies, 0.5),
+        'p99': _percentile(latencies, 0.99),
+        'peak_rss': _peak_rss(),
+        'temp_peak': temp_peak[0]
+    }
+
+
+class Benchmark:
+    """基准测试：启动模拟服务，生成清单，按并发数逐组在子进程中运行迁移"""
+    
+    def __init__(self, workload, count=None, min_size=None, max_size=None, seed=None,
+                 latency=0.0, bandwidth=0, minio_endpoint=None, work_dir=None):
+        """
+        初始化基准测试
+        
+        Args:
+            workload: 负载名称（BENCHMARK_CONFIG['workloads']中的tiny、mixed、huge）
+            count: 对象数，如果为None则使用负载的设置
+            min_size: 最小对象大小，如果为None则使用负载的设置
+            max_size: 最大对象大小，如果为None则使用负载的设置
+            seed: 随机种子，如果为None则使用配置文件中的设置
+            latency: 模拟服务每个请求增加的延迟（秒）
+            bandwidth: 模拟服务的带宽上限（字节/秒，源端和目标端各自独立），0表示不限
+            minio_endpoint: 使用已有的本地MinIO（host:port，需设置MINIO_ACCESS_KEY/MINIO_SECRET_KEY），
+                为None时使用模拟服务
+            work_dir: 存放清单和临时文件的目录，如果为None则创建临时目录
+        """
+        default_count, default_min, default_max = BENCHMARK_CONFIG['workloads'][workload]
+        self.workload = workload
+        self.seed = BENCHMARK_CONFIG['seed'] if seed is None else seed
+        sizes = generate_sizes(count or default_count, min_size or default_min, max_size or default_max, self.seed)
+        # 按两层目录分布对象，按前缀迁移时可以并行列举
+        self.objects = SyntheticObjects(
+            {f"bench/{workload}/{index % 16:02d}/{index:07d}.bin": size for index, size in enumerate(sizes)},
+            self.seed
+        )
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.minio_endpoint = minio_endpoint
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='cos2minio-bench-')
+        self.cos_server = None
+        self.minio_server = None
+    
+    def start(self):
+        """启动模拟服务并通过环境变量把COS和MinIO配置传给子进程"""
+        self.cos_server = FakeS3Server('cos', NetworkLink(self.latency, self.bandwidth), self.objects)
+        self.cos_server.start()
+        os.environ.update({
+            'COS_FRCDAP_DEV_SECRET_ID': 'benchmark',
+            'COS_FRCDAP_DEV_SECRET_KEY': 'benchmark',
+            'COS_FRCDAP_DEV_REGION': COS_REGION,
+            'COS_FRCDAP_DEV_BUCKET': COS_BUCKET,
+            'COS_FRCDAP_DEV_DOMAIN': self.cos_server.endpoint,
+            'COS_FRCDAP_DEV_SCHEME': 'http',
+            'MINIO_SECURE': 'False',
+            'MINIO_BUCKET_NAME': 'benchmark'
+        })
+        if self.minio_endpoint:
+            os.environ['MINIO_ENDPOINT'] = self.minio_endpoint
+        else:
+            self.minio_server = FakeS3Server('minio', NetworkLink(self.latency, self.bandwidth))
+            self.minio_server.start()
+            os.environ.update({
+                'MINIO_ENDPOINT': self.minio_server.endpoint,
+                'MINIO_ACCESS_KEY': 'benchmark',
+                'MINIO_SECRET_KEY': 'benchmark'
+            })
+    
+    def close(self):
+        """停止模拟服务"""
+        for server in (self.cos_server, self.minio_server):
+            if server is not None:
+                server.close()
+    
+    def run(self, workers, options=None, log_level='WARNING'):
+        """
+        以指定并发数运行一组迁移
+        
+        Args:
+            workers: 并发数（--max-workers）
+            options: 传给COS2MinIOMigrator的其他参数（engine、stream_mode、processes等）
+            log_level: 子进程的日志级别
+            
+        Returns:
+            dict: 测试结果
+        """
+        # 每组使用新的目标bucket，避免上一组的对象被判定为已存在而跳过
+        target_bucket = f"bench-{self.workload}-{workers}-{int(time.time())}"
+        manifest = os.path.join(self.work_dir, f"{target_bucket}.csv")
+        temp_dir = os.path.join(self.work_dir, f"{target_bucket}-tmp")
+        write_manifest(manifest, self.objects.keys, target_bucket)
+        
+        case = {
+            'manifest': manifest,
+            'temp_dir': temp_dir,
+            'workers': workers,
+            'options': options or {},
+            'log_level': log_level,
+            'sample_interval': BENCHMARK_CONFIG['sample_interval']
+        }
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            result = executor.submit(_run_case, case).result()
+        
+        result['verified'] = self._verify(target_bucket)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        return result
+    
+    def _verify(self, target_bucket):
+        """核对模拟目标端的对象数和大小（使用已有MinIO时返回None）"""
+        if self.minio_server is None:
+            return None
+        store = self.minio_server.buckets.pop(target_bucket, {})
+        return len(store) == len(self.objects.sizes) and all(
+            store.get(key, (None,))[0] == size for key, size in self.objects.sizes.items()
+        )
+
+
+def format_report(results):
+    """格式化结果表格"""
+    def mb(value):
+        return f"{value / 1024 / 1024:.1f}"
+    
+    def ms(value):
+        return '-' if value is None else f"{value * 1000:.1f}"
+    
+    rows = [('并发', '对象数', '失败', '耗时(s)', '对象/秒', 'MB/秒', 'p50(ms)', 'p99(ms)', '峰值内存(MB)', '临时目录峰值(MB)', '校验')]
+    for r in results:
+        verified = '-' if r['verified'] is None else ('通过' if r['verified'] else '失败')
+        rows.append((r['workers'], r['objects'], r['failed'], r['elapsed'], r['objects_per_sec'], r['mb_per_sec'],
+                     ms(r['p50']), ms(r['p99']), mb(r['peak_rss']), mb(r['temp_peak']), verified))
+    widths = [max(len(str(row[i])) for row in rows) for i in range(len(rows[0]))]
+    return '\n'.join('  '.join(str(value).rjust(width) for value, width in zip(row, widths)) for row in rows)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='COS到MinIO迁移性能基准测试（本地模拟COS和MinIO）')
+    parser.add_argument('--workload', choices=sorted(BENCHMARK_CONFIG['workloads']), default='mixed',
+                       help='对象大小分布: tiny（大量小对象）、mixed（混合）、huge（少量大对象）')
+    parser.add_argument('--objects', type=int, default=None, help='对象数（覆盖负载的设置）')
+    parser.add_argument('--min-size', type=int, default=None, help='最小对象大小（字节，覆盖负载的设置）')
+    parser.add_argument('--max-size', type=int, default=None, help='最大对象大小（字节，覆盖负载的设置）')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子（相同种子生成相同的对象）')
+    parser.add_argument('--workers', type=int, nargs='+', default=[8, 32],
+                       help='依次测试的并发数（--max-workers）')
+    parser.add_argument('--engine', choices=['thread', 'async'], default='thread', help='传输引擎')
+    parser.add_argument('--stream', action='store_true', help='流式传输模式（不经过本地磁盘）')
+    parser.add_argument('--processes', type=int, default=1, help='工作进程数')
+    parser.add_argument('--latency', type=float, default=0.0, help='模拟服务每个请求增加的延迟（秒）')
+    parser.add_argument('--bandwidth', type=int, default=0,
+                       help='模拟服务的带宽上限（字节/秒，源端和目标端各自独立），0表示不限')
+    parser.add_argument('--minio-endpoint', default=None,
+                       help='使用已有的本地MinIO（host:port，访问密钥取自MINIO_ACCESS_KEY/MINIO_SECRET_KEY）代替模拟服务')
+    parser.add_argument('--work-dir', default=None, help='存放清单和临时文件的目录')
+    parser.add_argument('--output', default=None, help='以JSON格式保存结果，便于不同版本之间对比')
+    parser.add_argument('--log-level', default='WARNING', help='迁移子进程的日志级别')
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    
+    benchmark = Benchmark(
+        args.workload, count=args.objects, min_size=args.min_size, max_size=args.max_size, seed=args.seed,
+        latency=args.latency, bandwidth=args.bandwidth, minio_endpoint=args.minio_endpoint, work_dir=args.work_dir
+    )
+    total = sum(benchmark.objects.sizes.values())
+    logging.info(f"负载: {args.workload}，{len(benchmark.objects.sizes)}个对象，共{total / 1024 / 1024:.1f}MB，"
+                 f"延迟{args.latency}s，带宽{args.bandwidth or '不限'}")
+    
+    options = {'engine': args.engine, 'stream_mode': args.stream, 'processes': args.processes}
+    results = []
+    benchmark.start()
+    try:
+        for workers in args.workers:
+            logging.info(f"运行: 并发{workers}")
+            results.append(benchmark.run(workers, options, args.log_level))
+    finally:
+        benchmark.close()
+    
+    print(format_report(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'workload': args.workload,
+                'objects': len(benchmark.objects.sizes),
+                'bytes': total,
+                'seed': benchmark.seed,
+                'latency': args.latency,
+                'bandwidth': args.bandwidth,
+                'options': options,
+                'results': results
+            }, f, ensure_ascii=False, indent=2)
+        logging.info(f"结果已保存: {args.output}")
+    return 0 if all(r['ok'] and r['verified'] is not False for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+校验模块 - 在数据流经迁移流水线时增量计算MD5/CRC64，与COS源端的ETag和CRC64比对
+
+校验值在下载（或流式传输）读取数据的同时计算，不需要再次读取临时文件。
+"""
+import hashlib
+import re
+
+import crcmod
+
+
+# COS使用的CRC64算法（CRC-64/ECMA-182，反射，初值和结果异或值均为全1），与x-cos-hash-crc64ecma一致
+_CRC64_POLY = 0x142F0E1EBA9EA3693
+
+# 单次上传的对象ETag为内容的MD5，分片上传的ETag形如 <hex>-<分片数>，无法直接比对
+_MD5_ETAG = re.compile(r'^[0-9a-fA-F]{32}$')
+
+
+class ChecksumMismatchError(Exception):
+    """传输的数据与源端校验值不一致"""
+    
+    def __init__(self, object_name, algorithm, expected, actual):
+        self.object_name = object_name
+        self.algorithm = algorithm
+        self.expected = expected
+        self.actual = actual
+        super().__init__(f"校验失败: {object_name}, {algorithm} 期望{expected}, 实际{actual}")
+
+
+def is_md5_etag(etag):
+    """ETag是否为内容的MD5（单次上传的对象）"""
+    return bool(etag) and _MD5_ETAG.match(etag.strip('"')) is not None
+
+
+class Checksum:
+    """
+    增量校验值
+    
+    源端提供x-cos-hash-crc64ecma时计算CRC64；源端ETag为MD5时计算MD5。
+    两者都不可用时仍计算MD5，用于与MinIO单次上传的ETag比对并记录到结果中。
+    """
+    
+    def __init__(self, object_name, etag=None, crc64=None, size=None):
+        """
+        初始化校验值
+        
+        Args:
+            object_name: 对象名称（用于错误信息）
+            etag: 源端ETag
+            crc64: 源端x-cos-hash-crc64ecma（十进制字符串）
+            size: 源端对象大小（字节）
+        """
+        self.object_name = object_name
+        self.etag = etag.strip('"') if etag else None
+        self.expected_crc64 = str(crc64) if crc64 not in (None, '') else None
+        self.size = size
+        self.bytes = 0
+        
+        self._md5 = hashlib.md5() if is_md5_etag(self.etag) or not self.expected_crc64 else None
+        self._crc64 = crcmod.Crc(_CRC64_POLY, initCrc=0, xorOut=0xffffffffffffffff, rev=True) \
+            if self.expected_crc64 else None
+    
+    def update(self, data):
+        """累加一段数据"""
+        self.bytes += len(data)
+        if self._md5 is not None:
+            self._md5.update(data)
+        if self._crc64 is not None:
+            self._crc64.update(data)
+    
+    @property
+    def md5(self):
+        """已读取数据的MD5（十六进制），未计算时为None"""
+        return self._md5.hexdigest() if self._md5 is not None else None
+    
+    @property
+    def crc64(self):
+        """已读取数据的CRC64（十进制字符串），未计算时为None"""
+        return str(self._crc64.crcValue) if self._crc64 is not None else None
+    
+    def describe(self):
+        """
+        校验值说明，记录到迁移结果中
+        
+        Returns:
+            str: 如 "crc64:1234567890" 或 "md5:d41d8cd9...,crc64:..."
+        """
+        values = []
+        if self.md5 is not None:
+            values.append(f"md5:{self.md5}")
+        if self.crc64 is not None:
+            values.append(f"crc64:{self.crc64}")
+        return ','.join(values)
+    
+    def verify(self):
+        """
+        将已读取数据的校验值与源端比对
+        
+        Raises:
+            ChecksumMismatchError: 字节数、CRC64或MD5不一致
+        """
+        if self.size is not None and self.bytes != self.size:
+            raise ChecksumMismatchError(self.object_name, 'size', self.size, self.bytes)
+        if self.expected_crc64 is not None and self.crc64 != self.expected_crc64:
+            raise ChecksumMismatchError(self.object_name, 'crc64', self.expected_crc64, self.crc64)
+        if is_md5_etag(self.etag) and self.md5 != self.etag.lower():
+            raise ChecksumMismatchError(self.object_name, 'md5', self.etag, self.md5)
+
+
+def verify_dest_etag(object_name, md5, dest_etag):
+    """
+    将MinIO返回的ETag与传输数据的MD5比对（只比对单次上传的对象）
+    
+    Args:
+        object_name: 对象名称
+        md5: 传输数据的MD5，为None时不比对
+        dest_etag: MinIO返回的ETag
+        
+    Raises:
+        ChecksumMismatchError: MD5不一致
+    """
+    if md5 and is_md5_etag(dest_etag) and dest_etag.strip('"').lower() != md5:
+        raise ChecksumMismatchError(object_name, 'md5', md5, dest_etag.strip('"'))
+
+
+class HashingReader:
+    """为读取流附加增量校验：每次read()返回的数据累加到Checksum"""
+    
+    def __init__(self, stream, checksum):
+        """
+        初始化校验读取流
+        
+        Args:
+            stream: 提供read()方法的读取流
+            checksum: Checksum实例
+        """
+        self._stream = stream
+        self.checksum = checksum
+    
+    def read(self, size=-1):
+        data = self._stream.read(size)
+        if data:
+            self.checksum.update(data)
+        return data
+    
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+自适应并发模块 - 按吞吐、延迟和限流信号以AIMD方式调整同时进行的传输数
+
+加性增（每个周期并发+1）、乘性减（出现限流或延迟超标时并发减半），
+在配置的上下限之间逐步逼近源端和目标端能承受的最大并发。
+"""
+import logging
+import threading
+import time
+
+from config import CONCURRENCY_CONFIG
+
+
+class AdjustableLimiter:
+    """可在运行中调整上限的并发限制器"""
+    
+    def __init__(self, limit):
+        """
+        初始化限制器
+        
+        Args:
+            limit: 初始并发上限
+        """
+        self.limit = max(limit, 1)
+        self.active = 0
+        self._condition = threading.Condition()
+    
+    def acquire(self):
+        """占用一个并发名额，达到上限时阻塞"""
+        with self._condition:
+            while self.active >= self.limit:
+                self._condition.wait()
+            self.active += 1
+    
+    def release(self):
+        """释放一个并发名额"""
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+    
+    def set_limit(self, limit):
+        """
+        调整并发上限（降低上限时不打断进行中的传输，只是暂停发起新的传输）
+        
+        Args:
+            limit: 新的并发上限
+        """
+        with self._condition:
+            self.limit = max(limit, 1)
+            self._condition.notify_all()
+
+
+class AIMDController:
+    """
+    AIMD并发控制器
+    
+    工作线程在每次传输前后调用acquire()/release()，并通过observe()报告耗时、字节数和是否被限流。
+    每个统计周期结束时根据该周期的吞吐、p95延迟和限流次数调整并发上限：
+    
+    - 出现限流响应，或p95延迟超过目标值：上限乘以decrease_factor
+    - 吞吐比上个周期明显下降（刚增加过并发）：上限回退一步
+    - 其他情况：上限增加increase_step
+    """
+    
+    def __init__(self, min_limit=None, max_limit=None, initial=None, interval=None,
+                 increase_step=None, decrease_factor=None, latency_target=None):
+        """
+        初始化控制器
+        
+        Args:
+            min_limit: 并发下限，如果为None则使用配置文件中的设置
+            max_limit: 并发上限，如果为None则使用配置文件中的设置
+            initial: 初始并发数，如果为None则取上下限的中间值
+            interval: 统计周期（秒）
+            increase_step: 每个周期增加的并发数
+            decrease_factor: 限流或延迟超标时并发数的缩减比例
+            latency_target: p95延迟目标（秒），为None时不按延迟缩减
+        """
+        self.min_limit = max(min_limit or CONCURRENCY_CONFIG['min_workers'], 1)
+        self.max_limit = max(max_limit or CONCURRENCY_CONFIG['max_workers'], self.min_limit)
+        self.interval = interval or CONCURRENCY_CONFIG['interval']
+        self.increase_step = increase_step or CONCURRENCY_CONFIG['increase_step']
+        self.decrease_factor = decrease_factor or CONCURRENCY_CONFIG['decrease_factor']
+        self.latency_target = latency_target if latency_target is not None else CONCURRENCY_CONFIG['latency_target']
+        self.min_samples = CONCURRENCY_CONFIG['min_samples']
+        
+        if initial is None:
+            initial = (self.min_limit + self.max_limit) // 2
+        self.limiter = AdjustableLimiter(min(max(initial, self.min_limit), self.max_limit))
+        
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._latencies = []
+        self._bytes = 0
+        self._throttled = 0
+        self._last_throughput = None
+        self._last_action = None
+        self.adjustments = 0
+    
+    @property
+    def limit(self):
+        """当前并发上限"""
+        return self.limiter.limit
+    
+    def acquire(self):
+        """开始一次传输前调用"""
+        self.limiter.acquire()
+    
+    def release(self):
+        """一次传输结束后调用"""
+        self.limiter.release()
+    
+    def observe(self, elapsed, size=0, throttled=False):
+        """
+        报告一次传输的结果，统计周期结束时调整并发上限
+        
+        Args:
+            elapsed: 传输耗时（秒）
+            size: 传输的字节数
+            throttled: 是否遇到限流响应
+        """
+        with self._lock:
+            self._latencies.append(elapsed)
+            self._bytes += size or 0
+            if throttled:
+                self._throttled += 1
+            
+            now = time.monotonic()
+            duration = now - self._window_start
+            # 每个统计周期最多调整一次；出现限流时不要求样本数
+            if duration < self.interval or (not self._throttled and len(self._latencies) < self.min_samples):
+                return
+            
+            self._adjust(duration)
+            self._window_start = now
+            self._latencies = []
+            self._bytes = 0
+            self._throttled = 0
+    
+    def _adjust(self, duration):
+        """根据当前周期的统计调整并发上限（调用方持有锁）"""
+        latencies = sorted(self._latencies)
+        p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+        throughput = self._bytes / duration if duration > 0 else 0.0
+        old = self.limit
+        
+        if self._throttled:
+            new = max(int(old * self.decrease_factor), self.min_limit)
+            action, reason = 'decrease', f"限流响应{self._throttled}次"
+        elif self.latency_target and p95 > self.latency_target:
+            new = max(int(old * self.decrease_factor), self.min_limit)
+            action, reason = 'decrease', f"p95延迟超过目标{self.latency_target:.2f}秒"
+        elif (self._last_action == 'increase' and self._last_throughput
+              and throughput < self._last_throughput * 0.9):
+            new = max(old - self.increase_step, self.min_limit)
+            action, reason = 'backoff', "增加并发后吞吐下降"
+        else:
+            new = min(old + self.increase_step, self.max_limit)
+            action, reason = 'increase', "未出现限流"
+        
+        self._last_throughput = throughput
+        self._last_action = action
+        if new == old:
+            logging.debug(f"并发保持{old}（{reason}，已达{'下限' if action != 'increase' else '上限'}）")
+            return
+        
+        self.limiter.set_limit(new)
+        self.adjustments += 1
+        logging.info(f"调整并发: {old} -> {new}（{reason}），周期{duration:.1f}秒: "
+                     f"{len(latencies)}个, {throughput / 1024 / 1024:.2f}MB/秒, p95延迟{p95:.2f}秒")
@@ -14,7 +14,11 @@ COS_CONFIGS = {
         'secret_id': os.getenv('COS_FRCDAP_DEV_SECRET_ID'),
         'secret_key': os.getenv('COS_FRCDAP_DEV_SECRET_KEY'),
         'region': os.getenv('COS_FRCDAP_DEV_REGION'),
-        'bucket': os.getenv('COS_FRCDAP_DEV_BUCKET')
+        'bucket': os.getenv('COS_FRCDAP_DEV_BUCKET'),
+        'domain': os.getenv('COS_FRCDAP_DEV_DOMAIN'),            # 自定义访问域名（如127.0.0.1:9000），为空时使用<bucket>.cos.<region>.myqcloud.com
+        'scheme': os.getenv('COS_FRCDAP_DEV_SCHEME', 'https'),   # 访问协议，本地测试服务使用http
+        'bandwidth_limit': int(os.getenv('COS_FRCDAP_DEV_BANDWIDTH_LIMIT', '0')),  # 读取带宽上限（字节/秒），0表示不限
+        'request_limit': int(os.getenv('COS_FRCDAP_DEV_REQUEST_LIMIT', '0'))       # 请求速率上限（请求/秒），0表示不限
     }
 }
 
@@ -24,7 +28,9 @@ MINIO_CONFIG = {
     'access_key': os.getenv('MINIO_ACCESS_KEY'),
     'secret_key': os.getenv('MINIO_SECRET_KEY'),
     'secure': os.getenv('MINIO_SECURE', 'False').lower() == 'true', # 从环境变量读取时，需要转换为布尔值
-    'bucket_name': os.getenv('MINIO_BUCKET_NAME')
+    'bucket_name': os.getenv('MINIO_BUCKET_NAME'),
+    'bandwidth_limit': int(os.getenv('MINIO_BANDWIDTH_LIMIT', '0')),  # 整个endpoint的写入带宽上限（字节/秒），0表示不限
+    'request_limit': int(os.getenv('MINIO_REQUEST_LIMIT', '0'))       # 整个endpoint的请求速率上限（请求/秒），0表示不限
 }
 
 # 默认使用的COS配置
@@ -42,5 +48,101 @@ EXCEL_CONFIG = {
     'url_column': 'url',           # Excel中URL列的名称
     'status_column': 'status',     # 状态列名称（用于记录迁移状态）
     'bucket_column': 'buckets',    # bucket列名称（用于指定MinIO目标bucket）
-    'temp_dir': './temp_downloads'  # 临时下载目录
+    'temp_dir': './temp_downloads',  # 临时下载目录
+    'chunk_size': 10000            # 流式读取清单时每块的行数
+}
+
+# 传输配置
+TRANSFER_CONFIG = {
+    'stream_mode': False,                  # 是否启用流式传输（COS直接写入MinIO，不落盘）
+    'stream_chunk_size': 1024 * 1024,      # 读取COS响应流的块大小
+    'min_part_size': 5 * 1024 * 1024,      # MinIO分片上传的最小分片大小（S3协议下限5MiB）
+    'max_part_size': 64 * 1024 * 1024,     # 流式传输单个分片的内存缓冲上限
+    'max_parts': 10000,                    # S3协议允许的最大分片数
+    'large_object_threshold': 64 * 1024 * 1024,  # 超过该大小的对象使用分段并发下载和并发分片上传
+    'part_concurrency': 4,                 # 单个大对象的分段并发数（与--max-workers相互独立）
+    'async_concurrency': 200,              # 异步引擎同时在途的任务数
+    'staging_budget': 2 * 1024 * 1024 * 1024,  # 暂存数据（内存缓冲和临时文件合计）的上限
+    'memory_staging_threshold': 8 * 1024 * 1024,  # 不超过该大小的对象暂存在内存中，不写临时文件
+    'memory_staging_limit': 256 * 1024 * 1024,    # 每个进程内存缓冲的总量上限，超出时写入临时文件
+    'dedup_poll_interval': 0.05,           # 内容去重时等待首个副本完成的重新检查间隔（秒）
+    'verify_checksum': False               # 传输的同时计算MD5/CRC64并与COS的ETag、x-cos-hash-crc64ecma比对（--verify开启）
+}
+
+# 对象清单（批量预扫描）配置
+INVENTORY_CONFIG = {
+    'prefix_depth': 2,                     # 归并清单key时使用的前缀目录深度
+    'dest_mode': 'exact',                  # 目标端索引模式: exact（key -> size/etag）或 bloom（布隆过滤器）
+    'bloom_capacity': 10000000,            # 布隆过滤器预计容纳的对象数
+    'bloom_error_rate': 0.001              # 布隆过滤器误判率
+}
+
+# 分道调度配置
+SCHEDULER_CONFIG = {
+    'lane_threshold': 16 * 1024 * 1024,    # 大小对象分界，超过该大小的对象进入大对象通道
+    'small_lane_workers': 8,               # 小对象通道并发数
+    'large_lane_workers': 2,               # 大对象通道并发数（每个对象内部再按part_concurrency分段并发）
+    'lane_order': 'largest-first'          # 通道内顺序: largest-first（先大后小）或 fifo（清单顺序）
+}
+
+# 状态日志配置
+STATE_CONFIG = {
+    'suffix': '.journal.db',               # 默认日志文件名为清单文件名加该后缀
+    'batch_size': 500,                     # 缓冲多少条状态更新后批量提交
+    'flush_interval': 2.0                  # 距上次提交超过多少秒后提交
+}
+
+# 自适应并发配置
+CONCURRENCY_CONFIG = {
+    'min_workers': 2,                      # 并发下限
+    'max_workers': 32,                     # 并发上限（命令行中由--max-workers指定）
+    'interval': 5.0,                       # 统计周期（秒），每个周期最多调整一次
+    'increase_step': 1,                    # 未出现限流时每个周期增加的并发数
+    'decrease_factor': 0.5,                # 出现限流或延迟超标时并发数的缩减比例
+    'latency_target': None,                # 单个任务p95耗时目标（秒），为None时不按延迟缩减
+    'min_samples': 5                       # 一个周期内至少完成多少个任务才按吞吐调整
+}
+
+# 失败重试配置
+RETRY_CONFIG = {
+    'max_retries': 3,                      # 可重试错误（超时、5xx、连接重置、限流）的最大重试次数，0表示不重试
+    'base_delay': 1.0,                     # 第一次重试的基准等待时间（秒），之后每次翻倍
+    'max_delay': 60.0                      # 单次等待时间上限（秒），实际等待时间在[0, 上限]之间随机（全抖动）
+}
+
+# 限速配置（COS按配置限速的参数在COS_CONFIGS中，MinIO endpoint级别的参数在MINIO_CONFIG中）
+RATE_LIMIT_CONFIG = {
+    'minio_buckets': {},                   # 按MinIO bucket限速，如 {'archive': {'bandwidth_limit': 10485760, 'request_limit': 50}}
+    'reload_interval': 5.0                 # 检查限速文件是否修改的间隔（秒）
+}
+
+# 按前缀迁移（不使用清单）的列举配置
+LISTING_CONFIG = {
+    'workers': 8,                          # 并行列举的线程数
+    'fanout_depth': 3,                     # 按Delimiter逐层拆分子前缀的最大层数，更深的子前缀直接递归分页列举
+    'queue_size': 10000                    # 已列举、等待迁移的对象数上限，迁移跟不上时列举暂停
+}
+
+# 监控指标配置
+METRICS_CONFIG = {
+    'host': '127.0.0.1',                   # 指标接口监听地址（默认只允许本机访问）
+    'window': 10.0,                        # 计算近期吞吐的时间窗口（秒）
+    'buckets': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)  # 阶段耗时直方图的桶上限（秒）
+}
+
+# 性能分析（--profile）配置
+PROFILE_CONFIG = {
+    'batch_size': 1000,                    # 跟踪事件每批写入文件的数量
+    'sample_interval': 0.01                # 调用栈采样间隔（秒）
+}
+
+# 性能基准测试（benchmark.py）配置
+BENCHMARK_CONFIG = {
+    'workloads': {                         # 负载名称: (对象数, 最小大小, 最大大小)，大小按对数均匀分布
+        'tiny': (10000, 1024, 64 * 1024),
+        'mixed': (1000, 1024, 16 * 1024 * 1024),
+        'huge': (4, 256 * 1024 * 1024, 1024 * 1024 * 1024)
+    },
+    'seed': 20240101,                      # 生成对象大小和内容的随机种子
+    'sample_interval': 0.05                # 采样临时目录占用的间隔（秒）
 }
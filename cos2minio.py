@@ -8,13 +8,42 @@ import logging
 import argparse
 import tempfile
 import shutil
+import time
+import queue
+import threading
+from collections import namedtuple
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 
-from config import LOG_CONFIG, EXCEL_CONFIG
+from config import LOG_CONFIG, EXCEL_CONFIG, TRANSFER_CONFIG, RETRY_CONFIG
 from excel_processor import ExcelProcessor
 from cos_downloader import COSDownloader
 from minio_uploader import MinIOUploader
+from inventory import DestinationInventory, SourceInventory
+from planner import MigrationPlanner, WorkItem, shard_of
+from scheduler import LaneScheduler
+from pipeline import BoundedPipeline, ByteBudget
+from workers import ProcessRunner
+from state_store import StateStore
+from manifest_io import open_result_writer, read_finished_rows
+from concurrency import AIMDController
+from error_classifier import classify_error, PERMANENT, THROTTLED
+from retry import RetryQueue
+from rate_limiter import RateLimiterRegistry
+from checksum import Checksum, ChecksumMismatchError, HashingReader, verify_dest_etag
+from sync import change_reason, dest_object, source_metadata
+from lister import PrefixLister
+from metrics import MigrationMetrics, MigrationStats, MetricsServer
+from tracing import Profiler, worker_path
+from staging import StagingManager
+from dedup import PENDING, ContentDedup
+
+
+# 分阶段模式中已下载到临时目录、等待上传的对象，reserved为占用的磁盘预算
+StagedObject = namedtuple('StagedObject', ['item', 'result'])
+
+# 下载阶段结束标记
+_STAGE_DONE = object()
 
 
 def setup_logging():
@@ -33,20 +62,163 @@ class COS2MinIOMigrator:
     """COS到MinIO迁移器"""
     
     def __init__(self, excel_path, cos_config_name=None, minio_config=None, 
-                 temp_dir=None, max_workers=5):
+                 temp_dir=None, max_workers=5, stream_mode=None,
+                 prescan_dest=False, prescan_mode=None, prescan_source=False,
+                 part_concurrency=None, large_object_threshold=None,
+                 lanes=False, small_workers=None, large_workers=None, lane_order=None,
+                 engine='thread', async_concurrency=None,
+                 processes=1, shard_index=0, shard_count=1, journal_path=None,
+                 stream_manifest=False, manifest_chunk_size=None, result_output=None,
+                 download_workers=None, upload_workers=None, staging_budget=None, memory_threshold=None,
+                 adaptive=False, min_workers=None, latency_target=None, max_retries=None,
+                 rate_limit_file=None, rate_limit_share=1, verify_checksum=None, sync=False,
+                 source_prefix=None, list_workers=None, metrics_port=None,
+                 profile=None, profile_sample=None, profile_sample_delay=0.0, dedup=False):
         """
         初始化迁移器
         
         Args:
-            excel_path: Excel文件路径
+            excel_path: Excel文件路径，按前缀迁移时为None
             cos_config_name: COS配置名称
             minio_config: MinIO配置
             temp_dir: 临时目录
             max_workers: 最大并发数
+            stream_mode: 是否启用流式传输，如果为None则使用配置文件中的设置
+            prescan_dest: 是否在迁移前批量列举MinIO目标端，替代逐个对象的stat检查
+            prescan_mode: 目标端索引模式（exact/bloom），如果为None则使用配置文件中的设置
+            prescan_source: 是否在迁移前分页列举COS源端，替代逐个文件的HEAD请求
+            part_concurrency: 单个大对象的分段并发数，如果为None则使用配置文件中的设置
+            large_object_threshold: 大对象阈值（字节），如果为None则使用配置文件中的设置
+            lanes: 是否按对象大小分道调度
+            small_workers: 小对象通道并发数
+            large_workers: 大对象通道并发数
+            lane_order: 通道内顺序（largest-first/fifo）
+            engine: 传输引擎，'thread'（线程池）或 'async'（asyncio + aiohttp）
+            async_concurrency: 异步引擎同时在途的任务数，如果为None则使用配置文件中的设置
+            processes: 工作进程数，大于1时将迁移计划分配到多个进程执行
+            shard_index: 当前主机的分片序号
+            shard_count: 分片总数（多台主机按COS路径确定性地分担同一份清单）
+            journal_path: 状态日志路径，设置后每行状态在迁移过程中持续写入SQLite日志
+            stream_manifest: 是否流式读取清单（边读取边迁移，行状态写入状态日志）
+            manifest_chunk_size: 流式读取清单时每块的行数，如果为None则使用配置文件中的设置
+            result_output: 结果文件路径（.csv/.jsonl/.parquet），设置后迁移结果以追加方式写入该文件，
+                           不再把整个清单写回Excel
+            download_workers: 下载阶段并发数，与upload_workers任一设置时启用分阶段模式
+            upload_workers: 上传阶段并发数
+            staging_budget: 暂存数据（内存缓冲和临时文件合计）的字节上限，如果为None则使用配置文件中的设置
+            memory_threshold: 暂存在内存中的对象大小上限（字节），如果为None则使用配置文件中的设置，0表示全部写入临时文件
+            adaptive: 是否启用自适应并发（AIMD），同时进行的传输数在[min_workers, max_workers]之间动态调整
+            min_workers: 自适应并发的下限，如果为None则使用配置文件中的设置
+            latency_target: 自适应并发的单个任务p95耗时目标（秒），超过时缩减并发
+            max_retries: 可重试错误（超时、5xx、连接重置、限流）的最大重试次数，如果为None则使用配置文件中的设置，
+                         为0时不重试
+            rate_limit_file: 限速文件（JSON）路径，运行中定期检查，修改后新的限速立即生效
+            rate_limit_share: 分摊限额的进程数（多进程时每个工作进程只使用1/N的限额）
+            verify_checksum: 是否在传输的同时计算MD5/CRC64并与源端比对，如果为None则使用配置文件中的设置
+            sync: 增量同步模式，比对源端和目标端的大小、ETag/源端校验值和修改时间，只传输新增或已变更的对象
+                  （自动启用源端和目标端预扫描）
+            source_prefix: 按前缀迁移（不使用清单），列举cos_config_name对应bucket中该前缀下的全部对象，
+                           为空字符串时迁移整个bucket
+            list_workers: 按前缀迁移时并行列举的线程数，如果为None则使用配置文件中的设置
+            metrics_port: 监控指标接口端口，设置后在本机以Prometheus格式提供各阶段耗时、吞吐和错误计数
+            profile: 性能跟踪输出路径，设置后把每个任务的阶段耗时跨度导出为Chrome trace JSON
+            profile_sample: 调用栈采样时长（秒），需同时指定profile，结果写入<profile>.folded
+            profile_sample_delay: 启动后等待多久开始调用栈采样（秒）
+            dedup: 内容去重，源端ETag和大小相同的对象只从COS传输一次，其余在MinIO上服务端复制
         """
         self.excel_path = excel_path
         self.temp_dir = temp_dir or EXCEL_CONFIG['temp_dir']
         self.max_workers = max_workers
+        self.stream_mode = TRANSFER_CONFIG['stream_mode'] if stream_mode is None else stream_mode
+        self.part_concurrency = part_concurrency or TRANSFER_CONFIG['part_concurrency']
+        self.large_object_threshold = large_object_threshold or TRANSFER_CONFIG['large_object_threshold']
+        self.verify_checksum = TRANSFER_CONFIG['verify_checksum'] if verify_checksum is None else verify_checksum
+        
+        # 增量同步：比对数据来自批量列举，目标端清单需要保存修改时间和用户元数据
+        self.sync = sync
+        if sync:
+            if prescan_mode == 'bloom':
+                raise ValueError("增量同步需要exact目标端清单，不能使用bloom模式")
+            prescan_dest = prescan_source = True
+            prescan_mode = 'exact'
+        
+        if engine not in ('thread', 'async'):
+            raise ValueError(f"不支持的传输引擎: {engine}")
+        self.engine = engine
+        self.async_concurrency = async_concurrency
+        
+        # 分阶段模式：下载和上传使用各自的线程池，通过已下载文件队列衔接
+        self.staged = bool(download_workers or upload_workers)
+        self.download_workers = download_workers or max_workers
+        self.upload_workers = upload_workers or max_workers
+        self.staging_budget = ByteBudget(
+            TRANSFER_CONFIG['staging_budget'] if staging_budget is None else staging_budget
+        )
+        # 下载后等待上传的数据：小对象暂存在内存中，其余写入唯一的临时文件，合计受staging_budget限制
+        self.staging = StagingManager(self.temp_dir, self.staging_budget, memory_threshold)
+        if self.staged and (self.stream_mode or engine == 'async' or lanes):
+            raise ValueError("分阶段模式需要经过临时目录，不能与流式传输、异步引擎或分道调度同时使用")
+        
+        # 内容去重：清单中内容相同的对象由首个副本传输，其余延迟后重新执行，首个副本完成后服务端复制（每个进程独立去重）
+        self.dedup = ContentDedup() if dedup else None
+        
+        # 可重试的失败任务延迟后重新执行（执行期间由execute()创建重试队列）
+        self.max_retries = RETRY_CONFIG['max_retries'] if max_retries is None else max_retries
+        self._retries = None
+        
+        # 自适应并发：工作线程数为max_workers，同时进行的传输数由控制器按吞吐、延迟和限流动态调整
+        self.concurrency = None
+        if adaptive:
+            if engine == 'async' or lanes or self.staged:
+                raise ValueError("自适应并发只支持线程引擎的默认调度方式，不能与异步引擎、分道调度或分阶段模式同时使用")
+            self.concurrency = AIMDController(
+                min_limit=min_workers,
+                max_limit=max_workers,
+                latency_target=latency_target
+            )
+        
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(f"无效的分片参数: {shard_index}/{shard_count}")
+        self.processes = max(processes, 1)
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        
+        # 工作进程使用相同参数构造各自的迁移器（单进程、不分片）
+        self._worker_options = {
+            'excel_path': excel_path,
+            'cos_config_name': cos_config_name,
+            'minio_config': minio_config,
+            'temp_dir': self.temp_dir,
+            'max_workers': max_workers,
+            'stream_mode': self.stream_mode,
+            'prescan_dest': prescan_dest,
+            'prescan_mode': prescan_mode,
+            'prescan_source': prescan_source,
+            'part_concurrency': part_concurrency,
+            'large_object_threshold': large_object_threshold,
+            'lanes': lanes,
+            'small_workers': small_workers,
+            'large_workers': large_workers,
+            'lane_order': lane_order,
+            'engine': engine,
+            'async_concurrency': async_concurrency,
+            'download_workers': download_workers,
+            'upload_workers': upload_workers,
+            'staging_budget': self.staging_budget.limit // self.processes,
+            'memory_threshold': memory_threshold,
+            'adaptive': adaptive,
+            'min_workers': min_workers,
+            'latency_target': latency_target,
+            'max_retries': max_retries,
+            'rate_limit_file': rate_limit_file,
+            'rate_limit_share': self.processes,
+            'verify_checksum': self.verify_checksum,
+            'sync': sync,
+            'profile': worker_path(profile),
+            'profile_sample': profile_sample,
+            'profile_sample_delay': profile_sample_delay,
+            'dedup': dedup
+        }
         
         # 初始化各组件
         self.excel_processor = ExcelProcessor(
@@ -56,20 +228,103 @@ class COS2MinIOMigrator:
             bucket_column=EXCEL_CONFIG['bucket_column']
         )
         
-        self.cos_downloader = COSDownloader(cos_config_name)
-        self.minio_uploader = MinIOUploader(minio_config)
+        # 分道调度器（启用时两条通道各自独立并发）
+        self.scheduler = None
+        if lanes:
+            self.scheduler = LaneScheduler(
+                small_workers=small_workers or max_workers,
+                large_workers=large_workers,
+                order=lane_order
+            )
+        
+        # COS客户端按配置缓存，连接池大小与并发数一致
+        pool_size = max_workers
+        if download_workers:
+            pool_size = download_workers
+        if self.scheduler:
+            pool_size = self.scheduler.small_workers + self.scheduler.large_workers
+        # 限速：按COS配置和MinIO endpoint/bucket限制带宽和请求速率
+        self.rate_limits = RateLimiterRegistry(share=rate_limit_share)
+        if rate_limit_file:
+            self.rate_limits.watch(rate_limit_file)
+        
+        self.cos_downloader = COSDownloader(cos_config_name, pool_size=pool_size, rate_limits=self.rate_limits)
+        self.minio_uploader = MinIOUploader(minio_config, rate_limits=self.rate_limits)
+        self.planner = MigrationPlanner(self.excel_processor, self.cos_downloader, self.minio_uploader)
+        
+        # MinIO目标端清单（启用预扫描时在migrate_all中构建）
+        self.prescan_dest = prescan_dest
+        self.prescan_mode = prescan_mode
+        self.dest_inventory = None
+        
+        # COS源端清单（启用预扫描时在migrate_all中构建）
+        self.prescan_source = prescan_source
+        self.source_inventory = None
         
-        # 统计信息
-        self.stats = {
+        # 按前缀迁移：列举COS前缀得到迁移任务，边列举边迁移；没有清单行，结果写入结果文件
+        # （结果文件包含url和status列，可以直接作为清单重新迁移失败的对象）
+        self.source_prefix = source_prefix
+        self.list_workers = list_workers
+        self.lister = None
+        if source_prefix is not None:
+            if stream_manifest or journal_path:
+                raise ValueError("按前缀迁移没有清单行，不能与流式读取清单或状态日志同时使用，请使用结果文件")
+            if not result_output:
+                result_output = f"{self.cos_downloader.config_name}_results_{datetime.now():%Y%m%d_%H%M%S}.csv"
+        
+        # 结果文件（追加写入，只在主进程中写入）；未启用状态日志时恢复迁移从已有的结果文件读取已完成的行
+        self.result_output = result_output
+        self.result_writer = open_result_writer(result_output) if result_output else None
+        
+        # 流式读取清单时不在内存中保留整张表，行状态写入状态日志或结果文件
+        self.stream_manifest = stream_manifest
+        self.manifest_chunk_size = manifest_chunk_size or EXCEL_CONFIG['chunk_size']
+        if stream_manifest and not journal_path and not result_output:
+            journal_path = StateStore.default_path(excel_path)
+        
+        # 状态日志（只在主进程中写入，工作进程的结果回传后统一记录）
+        self.state_store = StateStore(journal_path) if journal_path else None
+        
+        # 分道调度时通过HEAD获取的源端对象信息，供迁移时复用
+        self._source_hints = {}
+        
+        # 统计信息（多个工作线程同时累加，通过add()加锁）
+        self.stats = MigrationStats({
             'total': 0,
             'success': 0,
             'failed': 0,
-            'skipped': 0
-        }
+            'skipped': 0,
+            'retried': 0,
+            'bytes': 0,
+            'deduplicated': 0,
+            'dedup_bytes': 0,
+            'elapsed': 0.0
+        })
+        
+        # 监控指标：各阶段耗时、进行中的数量、错误分类计数，可选通过HTTP接口提供给Prometheus
+        self.metrics = MigrationMetrics(self.stats)
+        if self.concurrency:
+            self.metrics.register_gauge('concurrency_limit', '自适应并发的当前上限', lambda: self.concurrency.limit)
+        self.metrics.register_gauge('staging_bytes', '暂存数据（内存缓冲和临时文件）的字节数',
+                                    lambda: self.staging_budget.used)
+        self.metrics.register_gauge('staging_memory_bytes', '暂存在内存缓冲中的字节数',
+                                    lambda: self.staging.memory_used)
+        self.metrics_server = None
+        if metrics_port is not None:
+            self.metrics_server = MetricsServer(self.metrics, metrics_port)
+            self.metrics_server.start()
+        
+        # 性能分析：阶段跨度随监控指标一起记录，未启用时不产生额外开销
+        if profile_sample and not profile:
+            raise ValueError("调用栈采样需要同时指定性能跟踪输出路径（--profile）")
+        self.profiler = None
+        if profile:
+            self.profiler = Profiler(profile, profile_sample, profile_sample_delay)
+            self.metrics.tracer = self.profiler.tracer
         
         # 确保临时目录存在
         os.makedirs(self.temp_dir, exist_ok=True)
-        
+    
     def migrate_single_file(self, index, url, bucket=None):
         """
         迁移单个文件
@@ -82,102 +337,795 @@ class COS2MinIOMigrator:
         Returns:
             dict: 迁移结果
         """
-        result = {
-            'index': index,
-            'url': url,
-            'bucket': bucket,
+        return self.migrate_item(self.planner.plan_row(index, url, bucket))
+    
+    def migrate_item(self, item):
+        """
+        执行单个迁移任务
+        
+        Args:
+            item: 迁移计划中的WorkItem
+            
+        Returns:
+            dict: 迁移结果
+        """
+        result = self._new_result(item)
+        
+        try:
+            with self.metrics.stage('object', result):
+                handle = self._check_item(item, result)
+                
+                if handle is not None:
+                    # 内容相同的对象已迁移时服务端复制（仍在传输时延迟后重新执行），
+                    # 否则流式传输（无法流式传输时回退到临时文件）
+                    done = self._copy_duplicate(item, result)
+                    if not done and self.stream_mode:
+                        done = self._transfer_stream(item, handle, result)
+                    
+                    if not done:
+                        self._download_to_temp(item, handle, result)
+                        self._upload_from_temp(item, result)
+                    
+                    if result['status'] != 'deferred':
+                        self._mark_success(item, result)
+        
+        except Exception as e:
+            self._mark_failed(item, result, e)
+        
+        finally:
+            # 清理临时文件，首个副本完成时通知等待中的相同内容
+            self._remove_temp_file(result)
+            self._finish_dedup(result)
+            
+            # 记录结果（重复行共享同一结果）
+            with self.metrics.stage('record', result):
+                self._record_result(item, result)
+        
+        return result
+    
+    def download_item(self, item):
+        """
+        分阶段模式的下载阶段：检查源端和目标端，下载到临时目录
+        
+        Args:
+            item: 迁移计划中的WorkItem
+            
+        Returns:
+            StagedObject: 已下载待上传的对象；跳过或失败时返回已记录的迁移结果
+        """
+        result = self._new_result(item)
+        
+        try:
+            handle = self._check_item(item, result)
+            if handle is None:
+                self._record_result(item, result)
+                return result
+            
+            if self._copy_duplicate(item, result):
+                if result['status'] != 'deferred':
+                    self._mark_success(item, result)
+                self._record_result(item, result)
+                return result
+            
+            # 暂存数据达到上限时暂停下载，直到上传阶段释放空间
+            self._download_to_temp(item, handle, result)
+            return StagedObject(item, result)
+        
+        except Exception as e:
+            self._mark_failed(item, result, e)
+            self._remove_temp_file(result)
+            self._finish_dedup(result)
+            self._record_result(item, result)
+            return result
+    
+    def upload_staged(self, staged):
+        """
+        分阶段模式的上传阶段：上传已下载的临时文件
+        
+        Args:
+            staged: download_item()返回的StagedObject
+            
+        Returns:
+            dict: 迁移结果
+        """
+        item, result = staged.item, staged.result
+        
+        try:
+            self._upload_from_temp(item, result)
+            self._mark_success(item, result)
+        except Exception as e:
+            self._mark_failed(item, result, e)
+        finally:
+            self._remove_temp_file(result)
+            self._finish_dedup(result)
+            self._record_result(item, result)
+        
+        return result
+    
+    def _new_result(self, item):
+        """创建迁移结果"""
+        return {
+            'index': item.index,
+            'url': item.url,
+            'bucket': item.target_bucket,
+            'status': 'failed',
             'success': False,
             'error': None,
-            'cos_path': None,
+            'cos_path': item.cos_path,
             'local_path': None,
-            'minio_path': None
+            'minio_path': None,
+            'retries': item.attempts
         }
+    
+    def _check_item(self, item, result):
+        """
+        迁移前检查：解析COS源端、获取源端元数据、检查目标端是否已存在
+        
+        Args:
+            item: 迁移计划中的WorkItem
+            result: 迁移结果（写入size、etag，已存在时标记为跳过）
+            
+        Returns:
+            COSHandle: 需要传输时返回COS客户端句柄，目标端已存在时返回None
+        """
+        url, cos_path, target_bucket = item.url, item.cos_path, item.target_bucket
+        
+        # 更新状态为处理中
+        self._update_rows(item, 'processing')
+        
+        # COS源端配置已在计划阶段解析（优先使用Excel中的bucket作为hint）
+        if item.config_name is None:
+            raise ValueError(f"无法检测COS源存储桶配置: {url}")
+        with self.metrics.stage('resolve_client', result):
+            handle = self.cos_downloader.registry.get(item.config_name)
+        
+        if not cos_path:
+            raise ValueError(f"无法从URL提取有效路径: {url}")
+        
+        # 检查COS文件是否存在并获取元数据（列举或预扫描时已随任务附带）
+        source_info = item.source_info or self._source_object_info(cos_path, handle, result)
+        if source_info is None:
+            # 文件不存在时，运行调试功能来查看存储桶中的相似文件
+            logging.warning(f"COS文件不存在，运行调试检查: {cos_path}")
+            with self.metrics.stage('debug_list', result):
+                self.cos_downloader.debug_list_similar_files(cos_path, handle=handle)
+            raise ValueError(f"COS文件不存在: {cos_path}")
+        
+        result['size'] = source_info['size']
+        result['etag'] = source_info.get('etag')
+        result['crc64'] = source_info.get('crc64')
+        
+        # 检查MinIO中是否已存在该文件（增量同步时比对元数据，只跳过未变更的对象）
+        if item.needs_transfer:
+            current = False
+        elif self.sync:
+            current = self._dest_is_current(item, source_info, result)
+        else:
+            current = self._dest_object_exists(cos_path, target_bucket, result)
+        if current:
+            logging.info(f"文件已存在于MinIO{'且未变更' if self.sync else ''}，跳过: {target_bucket}/{cos_path}")
+            result['success'] = True
+            result['status'] = 'skipped'
+            result['minio_path'] = cos_path
+            return None
+        
+        return handle
+    
+    def _download_to_temp(self, item, handle, result):
+        """
+        下载到暂存区：小对象下载到内存缓冲区，其余下载到唯一的临时文件，大对象按字节范围并发下载；
+        启用校验时边下载边计算校验值并与源端比对
+        """
+        part_size, parallel = self._large_object_options(result['size'])
+        checksum = self._new_checksum(item, result)
+        
+        # 暂存数据达到上限时在此等待
+        staged = self.staging.allocate(item.cos_path, result['size'])
+        result['staged'] = staged
+        
+        with self.metrics.stage('download', result):
+            if staged.in_memory:
+                self.cos_downloader.download_fileobj(
+                    item.cos_path,
+                    staged.buffer,
+                    handle=handle,
+                    checksum=checksum,
+                    size=result['size'],
+                    part_size=part_size,
+                    concurrency=parallel
+                )
+            elif not self.cos_downloader.download_file(
+                item.cos_path,
+                local_path=staged.path,
+                handle=handle,
+                part_size=part_size,
+                concurrency=parallel,
+                raise_errors=True,
+                checksum=checksum,
+                size=result['size']
+            ):
+                raise ValueError(f"下载文件失败: {item.cos_path}")
         
+        result['local_path'] = staged.path
+        if checksum is not None:
+            checksum.verify()
+            result['checksum'] = checksum.describe()
+            result['md5'] = checksum.md5
+    
+    def _upload_from_temp(self, item, result):
+        """上传暂存的数据到MinIO（使用Excel中指定的bucket），大对象并发分片上传"""
+        part_size, parallel = self._large_object_options(result['size'])
+        staged = result['staged']
+        
+        with self.metrics.stage('upload', result):
+            if staged.in_memory:
+                dest_etag = self.minio_uploader.upload_stream(
+                    staged.reader(),
+                    item.cos_path,
+                    staged.size,
+                    bucket_name=item.target_bucket,
+                    part_size=part_size,
+                    parallel=parallel or 1,
+                    raise_errors=True,
+                    metadata=source_metadata(result)
+                )
+            else:
+                dest_etag = self.minio_uploader.upload_file(
+                    result['local_path'],
+                    item.cos_path,  # 使用原始COS路径作为MinIO对象名
+                    bucket_name=item.target_bucket,  # 使用Excel中指定的bucket
+                    part_size=part_size or 0,
+                    parallel=parallel,
+                    raise_errors=True,
+                    metadata=source_metadata(result)
+                )
+        
+        if not dest_etag:
+            raise ValueError(f"上传到MinIO失败: {item.cos_path}")
+        self._verify_dest(item, result, result.get('md5'), dest_etag)
+    
+    def _new_checksum(self, item, result):
+        """创建与源端元数据比对的增量校验值，未启用校验时返回None"""
+        if not self.verify_checksum:
+            return None
+        return Checksum(item.cos_path, result.get('etag'), result.get('crc64'), result.get('size'))
+    
+    def _verify_dest(self, item, result, md5, dest_etag, checksum=None):
+        """
+        上传完成后校验：比对源端校验值和MinIO返回的ETag，记录到迁移结果
+        
+        Args:
+            item: 迁移计划中的WorkItem
+            result: 迁移结果（写入dest_etag和checksum）
+            md5: 传输数据的MD5
+            dest_etag: MinIO返回的ETag
+            checksum: 流式传输时的Checksum（上传完成后数据才读取完整），临时文件方式下载时已校验
+            
+        Raises:
+            ChecksumMismatchError: 校验失败（目标端对象已删除）
+        """
+        result['dest_etag'] = dest_etag
         try:
-            # 更新状态为处理中
-            self.excel_processor.update_status(index, 'processing')
-            
-            # 自动检测COS源端配置，优先使用Excel中的bucket作为hint
-            if not self.cos_downloader.auto_detect_bucket_config(url, bucket_hint=bucket):
-                raise ValueError(f"无法检测COS源存储桶配置: {url}")
-            
-            # 从URL提取COS路径
-            cos_path = self.excel_processor.extract_cos_path(url)
-            if not cos_path:
-                raise ValueError(f"无法从URL提取有效路径: {url}")
-            
-            result['cos_path'] = cos_path
-            
-            # 检查COS文件是否存在
-            if not self.cos_downloader.check_file_exists(cos_path):
-                # 文件不存在时，运行调试功能来查看存储桶中的相似文件
-                logging.warning(f"COS文件不存在，运行调试检查: {cos_path}")
-                self.cos_downloader.debug_list_similar_files(cos_path)
-                raise ValueError(f"COS文件不存在: {cos_path}")
-            
-            # 确定目标MinIO bucket（使用Excel中指定的bucket或默认bucket）
-            target_bucket = bucket or self.minio_uploader.bucket_name
-            
-            # 检查MinIO中是否已存在该文件
-            if self.minio_uploader.check_object_exists(cos_path, target_bucket):
-                logging.info(f"文件已存在于MinIO，跳过: {target_bucket}/{cos_path}")
-                result['success'] = True
-                result['minio_path'] = cos_path
-                result['bucket'] = target_bucket
-                self.excel_processor.update_status(index, 'success')
-                self.stats['skipped'] += 1
-                return result
+            if checksum is not None:
+                checksum.verify()
+                result['checksum'] = checksum.describe()
+            verify_dest_etag(item.cos_path, md5, dest_etag)
+        except ChecksumMismatchError:
+            # 校验失败的对象不能留在目标端，否则重试时会被当作已存在而跳过
+            self.minio_uploader.delete_object(item.cos_path, item.target_bucket)
+            raise
+    
+    def _mark_success(self, item, result):
+        """标记迁移成功"""
+        if self.dest_inventory:
+            self.dest_inventory.add(item.target_bucket, item.cos_path)
+        
+        result['minio_path'] = item.cos_path
+        result['success'] = True
+        result['status'] = 'success'
+        
+        logging.info(f"迁移成功: {item.cos_path} -> {item.target_bucket}/{item.cos_path}")
+    
+    def _mark_failed(self, item, result, error):
+        """标记迁移失败"""
+        error_msg = str(error) or type(error).__name__
+        result['error'] = error_msg
+        result['error_type'] = classify_error(error)
+        result['throttled'] = result['error_type'] == THROTTLED
+        
+        logging.error(f"迁移失败 (行{item.index+2}): {item.url}, 错误: {error_msg}")
+    
+    def _remove_temp_file(self, result):
+        """释放暂存数据（内存缓冲区或临时文件）"""
+        staged = result.pop('staged', None)
+        if staged is None:
+            return
+        try:
+            with self.metrics.stage('cleanup', result):
+                staged.release()
+        except Exception as e:
+            logging.warning(f"清理临时文件失败: {staged.path}, 错误: {e}")
+    
+    def _copy_duplicate(self, item, result):
+        """
+        内容去重：与已迁移的对象内容相同时在MinIO上服务端复制，不访问COS；
+        相同内容正在由其他任务传输时放入延迟队列（状态为deferred），不占用工作线程等待
+        
+        Returns:
+            bool: 是否已服务端复制或延迟，返回False时由当前任务正常传输
+        """
+        if self.dedup is None:
+            return False
+        # 没有延迟队列（单独调用migrate_item）时等待首个副本完成
+        retries = self._retries
+        source = self.dedup.claim(result, wait=retries is None)
+        if source is PENDING:
+            retries.defer(item, TRANSFER_CONFIG['dedup_poll_interval'])
+            result['status'] = 'deferred'
+            logging.debug(f"相同内容正在传输，延迟后重新执行: {item.cos_path}")
+            return True
+        return source is not None and self.copy_from(item, result, source)
+    
+    def copy_from(self, item, result, source):
+        """
+        从内容相同的已迁移对象服务端复制
+        
+        Args:
+            item: 迁移计划中的WorkItem
+            result: 迁移结果（写入dest_etag和dedup_source）
+            source: 已迁移对象的(bucket, 对象名)
             
-            # 下载文件到临时目录
-            local_path = self.cos_downloader.download_file(
-                cos_path, 
-                temp_dir=self.temp_dir
-            )
+        Returns:
+            bool: 是否复制成功，失败（如源对象已被删除）时返回False，由调用方从COS传输
+        """
+        source_bucket, source_object = source
+        try:
+            with self.metrics.stage('copy', result):
+                dest_etag = self.minio_uploader.copy_object(
+                    source_bucket,
+                    source_object,
+                    item.cos_path,
+                    bucket_name=item.target_bucket,
+                    raise_errors=True,
+                    metadata=source_metadata(result)
+                )
+        except Exception as e:
+            logging.warning(f"服务端复制失败，改为从COS传输: {item.cos_path}, 错误: {e}")
+            return False
+        result['dest_etag'] = dest_etag
+        result['dedup_source'] = f"{source_bucket}/{source_object}"
+        return True
+    
+    def _finish_dedup(self, result):
+        """首个副本完成（成功或失败）时通知等待相同内容的任务"""
+        if self.dedup is not None:
+            self.dedup.finish(result)
+    
+    def _update_rows(self, item, status, error_msg=None, result=None):
+        """更新任务对应的所有行（包括重复行）的状态，有迁移结果时同时写入状态日志和结果文件"""
+        for index in (item.index,) + item.duplicates:
+            self.excel_processor.update_status(index, status, error_msg)
+            if result is None:
+                continue
+            if self.state_store:
+                self.state_store.record(index, status, result.get('size'), result.get('etag'), error_msg,
+                                        result.get('retries'), result.get('dest_etag'), result.get('checksum'))
+            if self.result_writer:
+                self.result_writer.write(index, item.url, item.target_bucket, status,
+                                         result.get('size'), result.get('etag'), error_msg, result.get('retries'),
+                                         result.get('dest_etag'), result.get('checksum'))
+    
+    def _record_result(self, item, result, retry=True):
+        """
+        根据迁移结果更新行状态和统计信息（可重试的失败放入重试队列，不记录为失败）
+        
+        Args:
+            item: WorkItem
+            result: 迁移结果
+            retry: 是否处理重试，工作进程回传的结果已在工作进程中重试（错误信息已注明重试次数）
+        """
+        if result['status'] == 'deferred':
+            # 等待内容相同的首个副本，重新执行后再记录
+            return
+        
+        if result['status'] == 'failed':
+            self.metrics.error(result.get('error_type', PERMANENT))
+            if retry and self._defer_retry(item, result):
+                return
+        
+        rows = 1 + len(item.duplicates)
+        if result['status'] == 'failed':
+            self._update_rows(item, 'failed', result['error'], result)
+            self.stats.add('failed', rows)
+        else:
+            self._update_rows(item, 'success', result=result)
+            self.stats.add(result['status'], rows)
+            if result.get('dedup_source'):
+                # 服务端复制的数据不经过本机，不计入传输字节数
+                self.stats.add('deduplicated')
+                self.stats.add('dedup_bytes', result.get('size') or 0)
+            elif result['status'] == 'success':
+                self.stats.add('bytes', result.get('size') or 0)
+                self.metrics.transferred(result.get('size'))
+    
+    def _defer_retry(self, item, result):
+        """
+        可重试的失败任务放入延迟重试队列
+        
+        Args:
+            item: 失败的WorkItem
+            result: 迁移结果（放入重试队列时状态改为retrying；不再重试时在错误信息中注明重试次数）
+            
+        Returns:
+            bool: 是否已放入重试队列
+        """
+        retries = self._retries
+        error_type = result.get('error_type', PERMANENT)
+        if retries is not None and error_type != PERMANENT and retries.can_retry(item):
+            retry_item, delay = retries.schedule(item)
+            result['status'] = 'retrying'
+            self._update_rows(item, 'retrying', result['error'])
+            self.stats.add('retried')
+            logging.warning(f"可重试错误（{error_type}），{delay:.1f}秒后第{retry_item.attempts}次重试: "
+                            f"{item.url}, 错误: {result['error']}")
+            return True
+        
+        if item.attempts:
+            result['error'] = f"{result['error']}（已重试{item.attempts}次）"
+        return False
+    
+    def lookup_source_info(self, config_name, cos_path):
+        """
+        在本地（HEAD缓存和COS源端清单）查询源端对象信息，不发送网络请求
+        
+        Args:
+            config_name: COS配置名称
+            cos_path: COS文件路径
             
-            if not local_path:
-                raise ValueError(f"下载文件失败: {cos_path}")
+        Returns:
+            tuple: (是否已确定, 文件信息)，文件确定不存在时为(True, None)，无法确定时为(False, None)
+        """
+        hint = self._source_hints.pop((config_name, cos_path), None)
+        if hint is not None:
+            return True, hint
+        
+        if self.source_inventory:
+            exists = self.source_inventory.contains(config_name, cos_path)
+            if exists:
+                return True, dict(self.source_inventory.lookup(config_name, cos_path)._asdict())
+            if exists is False:
+                return True, None
+        return False, None
+    
+    def _source_object_info(self, cos_path, handle, result=None):
+        """
+        获取COS源端对象信息，优先使用预扫描清单在本地查询
+        
+        Args:
+            cos_path: COS文件路径
+            handle: COS客户端句柄
+            result: 迁移结果（记录HEAD请求耗时）
             
-            result['local_path'] = local_path
+        Returns:
+            dict: 文件信息（size、etag、last_modified），文件不存在返回None
+        """
+        known, info = self.lookup_source_info(handle.config_name, cos_path)
+        if known:
+            if info is None:
+                logging.warning(f"COS文件不存在: {cos_path} (bucket: {handle.bucket})")
+            return info
+        # 清单未覆盖该前缀时回退到HEAD请求
+        with self.metrics.stage('source_head', result):
+            return self.cos_downloader.get_file_info(cos_path, handle=handle, raise_errors=True)
+    
+    def lookup_dest_exists(self, cos_path, target_bucket):
+        """
+        在本地（MinIO目标端清单）查询对象是否存在，不发送网络请求
+        
+        Args:
+            cos_path: 对象名称
+            target_bucket: 目标MinIO bucket
             
-            # 上传到MinIO（使用Excel中指定的bucket）
-            upload_success = self.minio_uploader.upload_file(
-                local_path, 
-                cos_path,  # 使用原始COS路径作为MinIO对象名
-                bucket_name=target_bucket  # 使用Excel中指定的bucket
-            )
+        Returns:
+            bool: 对象是否存在，无法确定时返回None
+        """
+        if self.dest_inventory:
+            return self.dest_inventory.contains(target_bucket, cos_path)
+        return None
+    
+    def _dest_object_exists(self, cos_path, target_bucket, result=None):
+        """
+        检查MinIO目标端对象是否存在，优先使用预扫描清单在本地判断
+        
+        Args:
+            cos_path: 对象名称
+            target_bucket: 目标MinIO bucket
+            result: 迁移结果（记录stat请求耗时）
+            
+        Returns:
+            bool: 对象是否存在
+        """
+        exists = self.lookup_dest_exists(cos_path, target_bucket)
+        if exists is not None:
+            return exists
+        # 清单无法确定（未列举的前缀或布隆过滤器命中）时回退到stat检查
+        with self.metrics.stage('dest_stat', result):
+            return self.minio_uploader.check_object_exists(cos_path, target_bucket)
+    
+    def lookup_dest_object(self, cos_path, target_bucket):
+        """
+        在本地（MinIO目标端清单）查询对象元数据，不发送网络请求
+        
+        Args:
+            cos_path: 对象名称
+            target_bucket: 目标MinIO bucket
             
-            if not upload_success:
-                raise ValueError(f"上传到MinIO失败: {cos_path}")
+        Returns:
+            tuple: (是否已确定, DestinationObject)，对象确定不存在时为(True, None)，无法确定时为(False, None)
+        """
+        if self.dest_inventory:
+            exists = self.dest_inventory.contains(target_bucket, cos_path)
+            if exists is not None:
+                return True, self.dest_inventory.lookup(target_bucket, cos_path) if exists else None
+        return False, None
+    
+    def is_dest_current(self, item, source_info, dest):
+        """
+        增量同步：比对源端和目标端元数据，判断目标端对象是否已是最新
+        
+        Args:
+            item: 迁移计划中的WorkItem
+            source_info: 源端对象信息（size、etag、crc64、last_modified）
+            dest: 目标端DestinationObject，不存在时为None
             
-            result['minio_path'] = cos_path
-            result['bucket'] = target_bucket
-            result['success'] = True
+        Returns:
+            bool: 目标端已是最新（跳过）返回True，需要传输返回False
+        """
+        reason = change_reason(source_info, dest)
+        if reason and dest is not None:
+            logging.info(f"对象已变更，重新同步: {item.target_bucket}/{item.cos_path}（{reason}）")
+        return reason is None
+    
+    def _dest_is_current(self, item, source_info, result=None):
+        """
+        增量同步时检查目标端对象是否已是最新，优先使用预扫描清单在本地比对
+        
+        Args:
+            item: 迁移计划中的WorkItem
+            source_info: 源端对象信息
+            result: 迁移结果（记录stat请求耗时）
             
-            # 更新状态
-            self.excel_processor.update_status(index, 'success')
-            self.stats['success'] += 1
+        Returns:
+            bool: 目标端已是最新返回True
+        """
+        known, dest = self.lookup_dest_object(item.cos_path, item.target_bucket)
+        if not known:
+            # 清单未覆盖该前缀时回退到stat请求
+            with self.metrics.stage('dest_stat', result):
+                stat = self.minio_uploader.stat_object(item.cos_path, item.target_bucket)
+            if stat is not None:
+                dest = dest_object(stat.size, stat.etag, stat.last_modified, stat.metadata)
+        return self.is_dest_current(item, source_info, dest)
+    
+    def prescan(self, items):
+        """
+        预扫描目标端和源端，存在性和元数据检查改为本地查询
+        
+        Args:
+            items: WorkItem序列或迭代器
             
-            logging.info(f"迁移成功: {cos_path} -> {target_bucket}/{cos_path}")
+        Returns:
+            预扫描需要完整的任务列表，迭代器读取为元组返回；未启用预扫描或按前缀迁移时原样返回
+        """
+        # 按前缀迁移时源端信息来自列举结果，目标端直接列举同一前缀，不需要完整的任务列表
+        prefix_mode = self.source_prefix is not None
+        if (self.prescan_dest or self.prescan_source) and not prefix_mode and not isinstance(items, (list, tuple)):
+            items = tuple(items)
+        
+        # 预扫描MinIO目标端，跳过检查改为本地查询
+        if self.prescan_dest:
+            self.build_dest_inventory(items)
+        
+        # 预扫描COS源端，存在性和元数据检查改为本地查询
+        if self.prescan_source and not prefix_mode:
+            self.build_source_inventory(items)
+        return items
+    
+    def _prefilter(self, items):
+        """
+        多进程时在父进程中按预扫描清单过滤任务：目标端已存在（增量同步时为未变更）的任务直接记录为跳过，
+        其余任务附带源端信息和目标端检查结果分发到工作进程，工作进程不再预扫描或逐个检查
+        
+        Args:
+            items: 已预扫描的WorkItem序列
             
-        except Exception as e:
-            error_msg = str(e)
-            result['error'] = error_msg
+        Yields:
+            WorkItem: 需要在工作进程中执行的任务
+        """
+        for item in items:
+            if not item.config_name or not item.cos_path:
+                yield item
+                continue
             
-            # 更新状态
-            self.excel_processor.update_status(index, 'failed', error_msg)
-            self.stats['failed'] += 1
+            source_info = item.source_info
+            if source_info is None:
+                known, source_info = self.lookup_source_info(item.config_name, item.cos_path)
+                if source_info is None:
+                    # 清单无法确定或源端不存在，由工作进程检查（不存在时列举相似文件）
+                    yield item
+                    continue
             
-            logging.error(f"迁移失败 (行{index+2}): {url}, 错误: {error_msg}")
+            if self.sync:
+                known, dest = self.lookup_dest_object(item.cos_path, item.target_bucket)
+                current = self.is_dest_current(item, source_info, dest) if known else None
+            else:
+                current = self.lookup_dest_exists(item.cos_path, item.target_bucket)
             
-        finally:
-            # 清理临时文件
-            if result.get('local_path') and os.path.exists(result['local_path']):
-                try:
-                    os.remove(result['local_path'])
-                except Exception as e:
-                    logging.warning(f"清理临时文件失败: {result['local_path']}, 错误: {e}")
+            if current:
+                result = self._new_result(item)
+                result.update(success=True, status='skipped', minio_path=item.cos_path,
+                              size=source_info.get('size'), etag=source_info.get('etag'))
+                self._on_process_result(item, result)
+                continue
+            yield item._replace(source_info=source_info, needs_transfer=current is False)
+    
+    def build_dest_inventory(self, items):
+        """
+        批量列举MinIO目标端，建立对象清单
         
-        return result
+        Args:
+            items: 迁移计划中的WorkItem序列
+        """
+        self.dest_inventory = DestinationInventory(
+            self.minio_uploader,
+            mode=self.prescan_mode,
+            max_workers=self.max_workers,
+            include_metadata=self.sync
+        )
+        if self.source_prefix is not None:
+            # 按前缀迁移时列举目标bucket中的同一前缀
+            self.dest_inventory.build_prefixes({self.minio_uploader.bucket_name: [self.source_prefix]})
+            return
+        
+        targets = [(item.target_bucket, item.cos_path) for item in items if item.cos_path]
+        self.dest_inventory.build(targets)
+    
+    def build_source_inventory(self, items):
+        """
+        分页列举COS源端，建立对象清单
+        
+        Args:
+            items: 迁移计划中的WorkItem序列
+        """
+        registry = self.cos_downloader.registry
+        targets = [
+            (registry.get(item.config_name), item.cos_path)
+            for item in items if item.config_name and item.cos_path
+        ]
+        
+        self.source_inventory = SourceInventory(
+            self.cos_downloader,
+            max_workers=self.max_workers
+        )
+        self.source_inventory.build(targets)
+    
+    def collect_size_hints(self, items):
+        """
+        为迁移任务补充对象大小提示（用于分道调度）
+        
+        优先使用COS源端清单，清单未覆盖的对象并发发送HEAD请求，结果缓存供迁移时复用。
+        
+        Args:
+            items: 迁移计划中的WorkItem序列
+            
+        Returns:
+            list: 带size字段的WorkItem列表
+        """
+        def size_hint(item):
+            if not item.config_name or not item.cos_path:
+                return item
+            if self.source_inventory:
+                entry = self.source_inventory.lookup(item.config_name, item.cos_path)
+                if entry is not None:
+                    return item._replace(size=entry.size)
+                if self.source_inventory.contains(item.config_name, item.cos_path) is False:
+                    return item
+            handle = self.cos_downloader.registry.get(item.config_name)
+            info = self.cos_downloader.get_file_info(item.cos_path, handle=handle)
+            if info is None:
+                return item
+            self._source_hints[(item.config_name, item.cos_path)] = info
+            return item._replace(size=info['size'])
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(size_hint, items))
+    
+    def _iter_size_hints(self, items, batch_size=None):
+        """
+        流式读取清单时按批补充对象大小提示
+        
+        Args:
+            items: WorkItem迭代器
+            batch_size: 每批的任务数，默认为并发数的4倍
+            
+        Yields:
+            WorkItem: 带size字段的任务
+        """
+        batch_size = batch_size or self.max_workers * 4
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield from self.collect_size_hints(batch)
+                batch = []
+        if batch:
+            yield from self.collect_size_hints(batch)
+    
+    def _large_object_options(self, size):
+        """
+        计算大对象的分片大小和分段并发数
+        
+        Args:
+            size: 对象大小（字节），未知时为None
+            
+        Returns:
+            tuple: (part_size, parallel)，非大对象返回(None, None)使用SDK默认值
+        """
+        if size is None or size < self.large_object_threshold:
+            return None, None
+        return self.minio_uploader.calc_part_size(size, self.part_concurrency), self.part_concurrency
+    
+    def _transfer_stream(self, item, handle, result):
+        """
+        以流式方式迁移单个文件，数据不经过本地磁盘；启用校验时在数据流经时计算校验值
+        
+        Args:
+            item: 迁移计划中的WorkItem
+            handle: COS客户端句柄
+            result: 迁移结果（size已知时大对象使用分段并发读取；写入dest_etag和checksum）
+            
+        Returns:
+            bool: 是否已通过流式传输完成，返回False表示需要回退到临时文件方式
+        """
+        cos_path, target_bucket, size = item.cos_path, item.target_bucket, result['size']
+        part_size, parallel = self._large_object_options(size)
+        if part_size:
+            # 大对象：按字节范围并发下载，同时并发上传分片
+            stream = self.cos_downloader.open_ranged_stream(
+                cos_path, size, part_size, parallel, handle=handle
+            )
+        else:
+            parallel = 1
+            stream = self.cos_downloader.open_stream(cos_path, handle=handle)
+        
+        try:
+            if stream.size is None:
+                logging.info(f"对象大小未知，回退到临时文件方式: {cos_path}")
+                return False
+            
+            part_size = part_size or self.minio_uploader.calc_part_size(stream.size)
+            if part_size is None:
+                logging.info(f"对象超出流式缓冲上限，回退到临时文件方式: {cos_path}")
+                return False
+            
+            checksum = self._new_checksum(item, result)
+            with self.metrics.stage('stream', result):
+                dest_etag = self.minio_uploader.upload_stream(
+                    HashingReader(stream, checksum) if checksum else stream,
+                    cos_path,
+                    stream.size,
+                    bucket_name=target_bucket,
+                    part_size=part_size,
+                    parallel=parallel,
+                    raise_errors=True,
+                    metadata=source_metadata(result)
+                )
+            if not dest_etag:
+                raise ValueError(f"流式上传到MinIO失败: {cos_path}")
+            self._verify_dest(item, result, checksum.md5 if checksum else None, dest_etag, checksum)
+            return True
+        finally:
+            stream.close()
     
     def migrate_all(self, status_filter=None, resume=False):
         """
@@ -187,54 +1135,419 @@ class COS2MinIOMigrator:
             status_filter: 状态过滤器
             resume: 是否恢复之前的迁移
         """
-        # 读取Excel文件
-        if not self.excel_processor.read_excel():
-            logging.error("读取Excel文件失败")
-            return False
-        
-        # 获取需要处理的URL
+        finished = None
         if resume:
             # 恢复模式：只处理pending和failed状态的文件
-            urls = self.excel_processor.get_urls(['pending', 'failed'])
+            status_filter = ['pending', 'failed']
+            finished = self._finished_rows()
+        
+        if self.source_prefix is not None:
+            # 按前缀迁移：边列举边迁移，不读取清单
+            items = self._prefix_plan()
+        elif self.stream_manifest:
+            # 流式读取清单：边读取边迁移，内存占用与清单行数无关
+            items = self._stream_plan(status_filter, finished)
+        else:
+            # 读取清单（启用状态日志且日志已存在时直接从日志读取）
+            if not self.load_manifest():
+                logging.error("读取Excel文件失败")
+                return False
+            if finished:
+                self.excel_processor.df = self._mark_finished(self.excel_processor.df, finished)
+            
+            # 生成迁移计划：校验URL、去重、解析COS源配置并创建目标bucket
+            plan = self.planner.plan(status_filter, self.shard_index, self.shard_count)
+            
+            if not plan.items:
+                logging.info("没有需要处理的文件")
+                return True
+            
+            self.stats['total'] = plan.total_rows
+            items = plan.items
+        
+        started = time.monotonic()
+        if self.processes > 1:
+            # 多进程：每个进程使用独立的客户端和线程池，结果回传到父进程汇总
+            # 预扫描只在父进程中执行一次，工作进程只收到需要传输的任务
+            if self.prescan_dest or self.prescan_source:
+                items = self._prefilter(self.prescan(items))
+            runner = ProcessRunner(self._worker_options, self.processes)
+            runner.run(items, self._on_process_result)
         else:
-            # 普通模式：根据status_filter获取URL
-            urls = self.excel_processor.get_urls(status_filter)
+            self.execute(items)
+        self.stats['elapsed'] = time.monotonic() - started
+        
+        if self.result_writer:
+            self.result_writer.flush()
+            logging.info(f"迁移结果已写入: {self.result_writer.path}")
+        if self.state_store:
+            # 状态已持续写入日志，导出到Excel为单独的步骤
+            self.state_store.flush()
+            logging.info(f"迁移状态已写入日志: {self.state_store.path}，可使用 --export-excel 导出到Excel")
+        elif not self.result_writer:
+            # 保存Excel文件
+            self.excel_processor.save_excel()
+        
+        # 打印统计信息
+        self.print_statistics()
+        
+        if self.lister and self.lister.failed_prefixes:
+            return False
+        return self.stats['failed'] == 0
+    
+    def _finished_rows(self):
+        """
+        恢复迁移时从已有的结果文件读取已完成的行
+        
+        使用结果文件且未启用状态日志时清单不会写回，行状态只记录在结果文件中。
+        
+        Returns:
+            set: 已完成的行号，不需要读取结果文件时返回None
+        """
+        if not self.result_writer or self.state_store or self.source_prefix is not None:
+            return None
+        # Parquet结果文件已存在时本次运行写入新文件，不读取
+        exclude = self.result_writer.path if self.result_writer.path != self.result_output else None
+        finished = read_finished_rows(self.result_output, exclude)
+        logging.info(f"从结果文件读取已完成的行: {self.result_output}，共{len(finished)}行，恢复时跳过")
+        return finished
+    
+    def _mark_finished(self, frame, finished):
+        """把结果文件中已完成的行标记为success，恢复迁移时不再处理"""
+        done = frame.index.isin(list(finished))
+        if not done.any():
+            return frame
+        frame = frame.copy()
+        frame.loc[done, self.excel_processor.status_column] = 'success'
+        return frame
+    
+    def load_manifest(self):
+        """
+        读取迁移清单
+        
+        启用状态日志时，日志已有记录则直接从日志读取（不读取Excel），
+        否则读取Excel并用其内容初始化日志。
         
-        if not urls:
-            logging.info("没有需要处理的文件")
+        Returns:
+            bool: 是否读取成功
+        """
+        processor = self.excel_processor
+        if self.state_store and self.state_store.is_seeded():
+            processor.df = self.state_store.load_frame(
+                processor.url_column, processor.status_column, processor.bucket_column, self.excel_path
+            )
+            logging.info(f"从状态日志读取清单: {self.state_store.path}, 共{len(processor.df)}行数据")
             return True
         
-        self.stats['total'] = len(urls)
-        logging.info(f"开始迁移，共{len(urls)}个文件，最大并发数: {self.max_workers}")
+        if not processor.read_excel():
+            return False
+        if self.state_store:
+            self.state_store.seed(
+                processor.df, processor.url_column, processor.status_column, processor.bucket_column,
+                self.excel_path
+            )
+            self.state_store.mark_seeded()
+        return True
+    
+    def _stream_plan(self, status_filter=None, finished=None):
+        """
+        流式读取清单并生成迁移任务
         
-        # 并发处理
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交任务
-            future_to_url = {
-                executor.submit(self.migrate_single_file, index, url, bucket): (index, url, bucket)
-                for index, url, bucket in urls
+        日志已完整初始化时从日志分块读取；否则从Excel分块读取，同时逐块写入日志。
+        
+        Args:
+            status_filter: 状态过滤条件
+            finished: 结果文件中已完成的行号（恢复迁移时跳过）
+            
+        Yields:
+            WorkItem: 迁移任务
+        """
+        processor = self.excel_processor
+        columns = (processor.url_column, processor.status_column, processor.bucket_column)
+        
+        if self.state_store and self.state_store.is_seeded():
+            logging.info(f"从状态日志流式读取清单: {self.state_store.path}")
+            chunks = self.state_store.iter_frames(self.manifest_chunk_size, *columns, self.excel_path)
+        else:
+            logging.info(f"流式读取清单文件: {self.excel_path}, 每块{self.manifest_chunk_size}行")
+            chunks = processor.iter_chunks(self.manifest_chunk_size)
+            if self.state_store:
+                chunks = self._seed_chunks(chunks, columns)
+        if finished:
+            chunks = (self._mark_finished(chunk, finished) for chunk in chunks)
+        
+        for plan in self.planner.plan_stream(chunks, status_filter, self.shard_index, self.shard_count):
+            self.stats.add('total', plan.total_rows)
+            yield from plan.items
+    
+    def _prefix_plan(self):
+        """
+        列举COS前缀并生成迁移任务（大bucket按子前缀并行列举，列举结果直接送入迁移流水线）
+        
+        列举结果中的大小、ETag和修改时间作为源端信息缓存，迁移时不再发送HEAD请求。
+        
+        Yields:
+            WorkItem: 迁移任务，index为列举顺序
+        """
+        handle = self.cos_downloader.handle
+        target_bucket = self.minio_uploader.bucket_name
+        self.minio_uploader.ensure_buckets([target_bucket])
+        
+        self.lister = PrefixLister(self.cos_downloader, handle, self.source_prefix, max_workers=self.list_workers)
+        for index, obj in enumerate(self.lister):
+            cos_path = obj['Key']
+            if self.shard_count > 1 and shard_of(cos_path, self.shard_count) != self.shard_index:
+                continue
+            
+            size = int(obj['Size']) if obj.get('Size') is not None else None
+            source_info = {
+                'size': size,
+                'etag': obj.get('ETag', '').strip('"'),
+                'last_modified': obj.get('LastModified', '')
             }
+            self.stats.add('total')
+            yield WorkItem(index, self.cos_downloader.object_url(cos_path, handle), cos_path, None,
+                           target_bucket, handle.config_name, (), size, source_info=source_info)
+    
+    def _seed_chunks(self, chunks, columns):
+        """将读取到的数据块逐块写入状态日志，全部读取完成后标记日志已初始化"""
+        for chunk in chunks:
+            self.state_store.seed(chunk, *columns, self.excel_path)
+            yield chunk
+        self.state_store.mark_seeded()
+    
+    def export_excel(self, output_path=None):
+        """
+        将状态日志中的各行状态导出到Excel
+        
+        Args:
+            output_path: 输出路径，如果为None则覆盖原文件
             
-            # 处理完成的任务
-            for future in as_completed(future_to_url):
-                index, url, bucket = future_to_url[future]
-                try:
-                    result = future.result()
-                    if result['success']:
-                        logging.info(f"✓ 完成 ({self.stats['success'] + self.stats['skipped']}/{self.stats['total']}): {result['cos_path']}")
-                    else:
-                        logging.error(f"✗ 失败 ({self.stats['failed']}/{self.stats['total']}): {url}")
-                except Exception as e:
-                    logging.error(f"处理任务异常: {url}, 错误: {e}")
-                    self.stats['failed'] += 1
-        
-        # 保存Excel文件
-        self.excel_processor.save_excel()
+        Returns:
+            bool: 是否导出成功
+        """
+        if not self.state_store or not self.state_store.has_rows():
+            logging.error("状态日志不存在或为空，无法导出")
+            return False
         
-        # 打印统计信息
-        self.print_statistics()
+        processor = self.excel_processor
+        if not processor.read_excel():
+            return False
         
-        return self.stats['failed'] == 0
+        states = self.state_store.statuses()
+        states = states[states.index.isin(processor.df.index)]
+        processor.df.loc[states.index, processor.status_column] = states['status']
+        
+        errors = states['error'].dropna()
+        if not errors.empty:
+            if 'error_msg' not in processor.df.columns:
+                processor.df['error_msg'] = None
+            processor.df.loc[errors.index, 'error_msg'] = errors
+        
+        retried = states['retries'].fillna(0)
+        retried = retried[retried > 0]
+        if not retried.empty:
+            if 'retries' not in processor.df.columns:
+                processor.df['retries'] = 0
+            processor.df.loc[retried.index, 'retries'] = retried.astype(int)
+        
+        return processor.save_excel(output_path)
+    
+    def execute(self, items, on_done=None, prescan=True):
+        """
+        执行迁移任务（预扫描后按引擎和调度方式并发处理）
+        
+        Args:
+            items: WorkItem序列
+            on_done: 任务完成回调，参数为(item, future)，默认输出进度
+            prescan: 是否预扫描，工作进程的任务已在父进程中预扫描
+        """
+        on_done = on_done or self._on_item_done
+        prefix_mode = self.source_prefix is not None
+        if prescan:
+            items = self.prescan(items)
+        
+        if isinstance(items, (list, tuple)):
+            count = f"共{len(items)}个任务"
+        else:
+            count = "边列举边迁移" if prefix_mode else "流式读取清单"
+        logging.info(f"开始迁移，{count}，最大并发数: {self.max_workers}, "
+                     f"传输模式: {'流式' if self.stream_mode else '临时文件'}, 引擎: {self.engine}")
+        
+        # 可重试的失败任务按指数退避延迟后重新进入流水线，内容去重时等待首个副本的任务同样经过延迟队列
+        retries = None
+        if self.max_retries or self.dedup is not None:
+            retries = RetryQueue(self.max_retries)
+            items = retries.track(items)
+            on_done = self._final_result_callback(on_done, retries)
+        self._retries = retries
+        try:
+            self._dispatch(items, on_done, retries)
+        finally:
+            self._retries = None
+    
+    def _final_result_callback(self, on_done, retries):
+        """
+        包装任务完成回调：放入重试队列或延迟执行的任务不回调，得到最终结果的任务回调后从重试队列中注销
+        
+        Args:
+            on_done: 任务完成回调，参数为(item, future)
+            retries: RetryQueue实例
+            
+        Returns:
+            function: 包装后的回调
+        """
+        def done(item, future):
+            if future.exception() is None and isinstance(future.result(), dict) \
+                    and future.result()['status'] in ('retrying', 'deferred'):
+                return
+            try:
+                on_done(item, future)
+            finally:
+                retries.finish()
+        
+        return done
+    
+    def _dispatch(self, items, on_done, retries=None):
+        """
+        按引擎和调度方式执行迁移任务
+        
+        Args:
+            items: WorkItem序列
+            on_done: 任务完成回调，参数为(item, future)
+            retries: RetryQueue实例，作为额外的任务来源；为None时不重试
+        """
+        if self.engine == 'async':
+            # 异步引擎：单个事件循环内维持大量并发请求，大对象仍走线程路径
+            from async_engine import AsyncTransferEngine
+            engine = AsyncTransferEngine(self, concurrency=self.async_concurrency)
+            engine.run(items, on_done, retries)
+        elif self.scheduler:
+            # 分道调度：按对象大小分配到小对象/大对象通道
+            if isinstance(items, (list, tuple)):
+                items = self.collect_size_hints(items)
+            else:
+                items = self._iter_size_hints(items)
+            self.scheduler.run(self.migrate_item, items, on_done, retries)
+        elif self.staged:
+            # 分阶段：下载和上传各自并发，COS和MinIO带宽同时利用
+            self._execute_staged(items, on_done, retries)
+        else:
+            # 并发处理：有界队列，工作线程空闲时才从清单中取下一个任务
+            worker = self.migrate_item
+            if self.concurrency:
+                logging.info(f"自适应并发: 初始{self.concurrency.limit}，"
+                             f"范围[{self.concurrency.min_limit}, {self.concurrency.max_limit}]")
+                worker = self._adaptive_worker(worker)
+            sources = [(items, 'worker')]
+            if retries is not None:
+                sources.append((retries, 'worker'))
+            pipeline = BoundedPipeline([('worker', self.max_workers)])
+            pipeline.run(worker, sources, on_done)
+            if self.concurrency:
+                logging.info(f"自适应并发: 最终{self.concurrency.limit}，共调整{self.concurrency.adjustments}次")
+    
+    def _adaptive_worker(self, worker):
+        """
+        包装工作函数：传输前占用自适应并发名额，完成后向控制器报告耗时、字节数和是否被限流
+        
+        Args:
+            worker: 执行单个任务的函数
+            
+        Returns:
+            function: 包装后的工作函数
+        """
+        controller = self.concurrency
+        
+        def run(item):
+            controller.acquire()
+            started = time.monotonic()
+            result = None
+            try:
+                result = worker(item)
+                return result
+            finally:
+                controller.release()
+                result = result or {}
+                controller.observe(
+                    time.monotonic() - started,
+                    result.get('size') if result.get('status') == 'success' else 0,
+                    result.get('throttled', False)
+                )
+        
+        return run
+    
+    def _execute_staged(self, items, on_done, retries=None):
+        """
+        分阶段执行：下载阶段把对象下载到临时目录后放入队列，上传阶段从队列中取出上传
+        
+        Args:
+            items: WorkItem的可迭代对象
+            on_done: 任务完成回调，参数为(item, future)
+            retries: RetryQueue实例，下载或上传失败后重试的任务都重新进入下载阶段
+        """
+        logging.info(f"分阶段模式: 下载并发{self.download_workers}，上传并发{self.upload_workers}，"
+                     f"暂存上限: {f'{self.staging_budget.limit / 1024 / 1024:.0f}MB' if self.staging_budget.limit else '不限'}")
+        staged_queue = queue.Queue()
+        
+        def staged_items():
+            while True:
+                staged = staged_queue.get()
+                if staged is _STAGE_DONE:
+                    return
+                yield staged
+        
+        def on_uploaded(staged, future):
+            on_done(staged.item, future)
+        
+        def on_downloaded(item, future):
+            # 跳过、失败或异常的任务直接结束，下载成功的进入上传队列
+            if future.exception() is None and isinstance(future.result(), StagedObject):
+                staged_queue.put(future.result())
+            else:
+                on_done(item, future)
+        
+        upload_pipeline = BoundedPipeline([('upload', self.upload_workers)])
+        uploader = threading.Thread(
+            target=upload_pipeline.run,
+            args=(self.upload_staged, [(staged_items(), 'upload')], on_uploaded),
+            name='upload-stage'
+        )
+        uploader.start()
+        
+        try:
+            sources = [(items, 'download')]
+            if retries is not None:
+                sources.append((retries, 'download'))
+            download_pipeline = BoundedPipeline([('download', self.download_workers)])
+            download_pipeline.run(self.download_item, sources, on_downloaded)
+        finally:
+            staged_queue.put(_STAGE_DONE)
+            uploader.join()
+        
+        logging.info(f"暂存数据峰值: {self.staging_budget.peak / 1024 / 1024:.2f}MB，"
+                     f"内存暂存{self.staging.memory_objects}个对象，临时文件{self.staging.disk_objects}个")
+    
+    def _on_item_done(self, item, future):
+        """处理已完成的任务（输出进度）"""
+        try:
+            self._log_progress(item, future.result())
+        except Exception as e:
+            logging.error(f"处理任务异常: {item.url}, 错误: {e}")
+            self.stats.add('failed')
+    
+    def _on_process_result(self, item, result):
+        """处理工作进程回传的结果（更新行状态、统计并输出进度）"""
+        self.metrics.observe_timings(result.get('timings'))
+        self._record_result(item, result, retry=False)
+        self._log_progress(item, result)
+    
+    def _log_progress(self, item, result):
+        """输出单个任务的完成进度"""
+        if result['success']:
+            logging.info(f"✓ 完成 ({self.stats['success'] + self.stats['skipped']}/{self.stats['total']}): {result['cos_path']}")
+        else:
+            logging.error(f"✗ 失败 ({self.stats['failed']}/{self.stats['total']}): {item.url}")
     
     def print_statistics(self):
         """打印统计信息"""
@@ -249,11 +1562,35 @@ class COS2MinIOMigrator:
         logging.info(f"成功: {success}")
         logging.info(f"失败: {failed}")
         logging.info(f"跳过: {skipped}")
+        if self.stats['retried']:
+            logging.info(f"重试: {self.stats['retried']}次")
+        if self.stats['deduplicated']:
+            logging.info(f"服务端复制: {self.stats['deduplicated']}个对象（内容与已迁移对象相同，"
+                         f"未从COS下载{self.stats['dedup_bytes'] / 1024 / 1024:.2f}MB）")
         logging.info(f"成功率: {(success + skipped) / total * 100:.2f}%" if total > 0 else "0%")
+        elapsed = self.stats['elapsed']
+        if elapsed > 0:
+            logging.info(f"耗时: {elapsed:.2f}秒, 吞吐: {(success + skipped + failed) / elapsed:.2f}个/秒, "
+                         f"{self.stats['bytes'] / elapsed / 1024 / 1024:.2f}MB/秒")
         logging.info("=" * 50)
     
+    def close_profiler(self):
+        """写出性能跟踪和调用栈采样结果（多进程时合并工作进程的文件）"""
+        if self.profiler:
+            self.profiler.close(merge_workers=self.processes > 1)
+            self.profiler = None
+    
     def cleanup(self):
         """清理资源"""
+        self.close_profiler()
+        self.staging.close()
+        self.rate_limits.close()
+        if self.metrics_server:
+            self.metrics_server.close()
+        if self.state_store:
+            self.state_store.close()
+        if self.result_writer:
+            self.result_writer.close()
         try:
             if os.path.exists(self.temp_dir):
                 shutil.rmtree(self.temp_dir)
@@ -265,41 +1602,176 @@ class COS2MinIOMigrator:
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='COS到MinIO文件迁移工具')
-    parser.add_argument('excel_path', help='Excel文件路径')
+    parser.add_argument('excel_path', nargs='?', default=None,
+                       help='清单文件路径（.xlsx/.xls/.csv/.jsonl/.parquet），使用--source-prefix时不需要')
     parser.add_argument('--cos-config', default=None, help='COS配置名称')
     parser.add_argument('--temp-dir', default=None, help='临时目录路径')
     parser.add_argument('--max-workers', type=int, default=5, help='最大并发数')
-    parser.add_argument('--resume', action='store_true', help='恢复之前的迁移')
-    parser.add_argument('--status-filter', nargs='+', default=['pending'], 
-                       help='状态过滤器 (pending, failed, success)')
+    parser.add_argument('--resume', action='store_true',
+                       help='恢复之前的迁移，只处理失败和待处理的行；启用--journal时以状态日志为准，'
+                            '否则使用--result-output时以已有的结果文件为准（清单不会写回），其余情况以清单的状态列为准')
+    parser.add_argument('--stream', action='store_true', default=None,
+                       help='流式传输模式：COS数据直接写入MinIO，不经过本地磁盘')
+    parser.add_argument('--prescan-dest', action='store_true',
+                       help='迁移前批量列举MinIO目标端，替代逐个对象的存在性检查')
+    parser.add_argument('--prescan-mode', choices=['exact', 'bloom'], default=None,
+                       help='目标端索引模式: exact（精确索引）或 bloom（布隆过滤器，适合超大bucket）')
+    parser.add_argument('--prescan-source', action='store_true',
+                       help='迁移前分页列举COS源端，替代逐个文件的HEAD请求')
+    parser.add_argument('--part-concurrency', type=int, default=None,
+                       help='单个大对象的分段并发下载/上传数（与--max-workers相互独立）')
+    parser.add_argument('--large-threshold', type=int, default=None,
+                       help='大对象阈值（MB），超过该大小的对象使用分段并发传输')
+    parser.add_argument('--lanes', action='store_true',
+                       help='按对象大小分道调度：小对象和大对象使用各自独立的并发通道')
+    parser.add_argument('--small-workers', type=int, default=None,
+                       help='小对象通道并发数（默认与--max-workers相同）')
+    parser.add_argument('--large-workers', type=int, default=None,
+                       help='大对象通道并发数')
+    parser.add_argument('--lane-order', choices=['largest-first', 'fifo'], default=None,
+                       help='通道内执行顺序: largest-first（先大后小）或 fifo（清单顺序）')
+    parser.add_argument('--engine', choices=['thread', 'async'], default='thread',
+                       help='传输引擎: thread（线程池）或 async（asyncio，适合大量小文件的高并发迁移）')
+    parser.add_argument('--async-concurrency', type=int, default=None,
+                       help='异步引擎同时在途的任务数')
+    parser.add_argument('--processes', type=int, default=1,
+                       help='工作进程数，每个进程使用独立的客户端和线程池（--max-workers为每个进程的并发数）')
+    parser.add_argument('--shard-index', type=int, default=0,
+                       help='当前主机的分片序号（从0开始）')
+    parser.add_argument('--shard-count', type=int, default=1,
+                       help='分片总数，多台主机使用同一份Excel时按COS路径确定性地分担任务')
+    parser.add_argument('--journal', action='store_true',
+                       help='启用状态日志：每行状态在迁移过程中批量写入SQLite日志（与Excel同目录），中断后可用--resume直接恢复')
+    parser.add_argument('--journal-path', default=None,
+                       help='状态日志路径（默认为Excel路径加.journal.db后缀，指定后自动启用状态日志）')
+    parser.add_argument('--export-excel', nargs='?', const='', default=None, metavar='OUTPUT',
+                       help='将状态日志中的状态导出到Excel后退出（不指定OUTPUT时覆盖原Excel文件）')
+    parser.add_argument('--stream-manifest', action='store_true',
+                       help='流式读取清单（xlsx只读模式，CSV/JSONL/Parquet分块读取），边读取边迁移，内存占用与行数无关；'
+                            '行状态写入状态日志或--result-output结果文件')
+    parser.add_argument('--manifest-chunk-size', type=int, default=None,
+                       help='流式读取清单时每块的行数')
+    parser.add_argument('--result-output', default=None,
+                       help='迁移结果文件（.csv/.jsonl/.parquet），结果按批追加写入，不再把整个清单写回Excel')
+    parser.add_argument('--download-workers', type=int, default=None,
+                       help='下载阶段并发数（与--upload-workers任一设置时启用分阶段模式：下载和上传各自并发，通过临时目录衔接）')
+    parser.add_argument('--upload-workers', type=int, default=None,
+                       help='上传阶段并发数')
+    parser.add_argument('--staging-budget', type=int, default=None,
+                       help='暂存数据上限（MB，内存缓冲和临时文件合计），达到上限时暂停下载直到上传释放空间')
+    parser.add_argument('--memory-threshold', type=float, default=None,
+                       help='不超过该大小（MB）的对象暂存在内存中，不写临时文件（默认8，0表示全部写入临时文件）')
+    parser.add_argument('--adaptive', action='store_true',
+                       help='自适应并发（AIMD）：按吞吐、p95延迟和限流响应在[--min-workers, --max-workers]之间动态调整并发数')
+    parser.add_argument('--min-workers', type=int, default=None,
+                       help='自适应并发的下限')
+    parser.add_argument('--latency-target', type=float, default=None,
+                       help='自适应并发的单个任务p95耗时目标（秒），超过时缩减并发')
+    parser.add_argument('--max-retries', type=int, default=None,
+                       help='可重试错误（超时、5xx、连接重置、限流）的最大重试次数，按带抖动的指数退避延迟重试，0表示不重试')
+    parser.add_argument('--rate-limit-file', default=None,
+                       help='限速文件（JSON），按COS配置和MinIO endpoint/bucket设置带宽（字节/秒）和请求速率（请求/秒），'
+                            '运行中修改文件后自动生效')
+    parser.add_argument('--verify', action='store_true',
+                       help='校验传输数据：在传输的同时计算MD5/CRC64，与COS的ETag和x-cos-hash-crc64ecma比对'
+                            '（临时文件方式改为读取响应流下载，不使用SDK的断点续传下载）')
+    parser.add_argument('--sync', action='store_true',
+                       help='增量同步：比对源端和目标端的大小、ETag/源端校验值和修改时间，只传输新增或已变更的对象'
+                            '（自动启用源端和目标端预扫描，默认处理所有状态的行）')
+    parser.add_argument('--source-prefix', default=None,
+                       help='按前缀迁移（不使用清单）：并行列举--cos-config对应bucket中该前缀下的全部对象，'
+                            '边列举边迁移，结果写入--result-output（默认<配置名>_results_<时间>.csv）；空字符串表示整个bucket')
+    parser.add_argument('--list-workers', type=int, default=None,
+                       help='按前缀迁移时并行列举的线程数（默认8）')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                       help='在本机该端口以Prometheus格式提供监控指标（/metrics）：各阶段耗时直方图、吞吐、进行中的数量和错误分类计数')
+    parser.add_argument('--profile', default=None,
+                       help='性能跟踪输出路径：记录每个任务各阶段（解析客户端、源端HEAD、调试列举、目标端stat、下载、上传、清理）的耗时跨度，导出为Chrome trace JSON')
+    parser.add_argument('--profile-sample', type=float, default=None,
+                       help='在该时长（秒）内采样所有线程的调用栈，结果以折叠栈格式写入<--profile>.folded')
+    parser.add_argument('--profile-sample-delay', type=float, default=0.0,
+                       help='启动后等待多久开始调用栈采样（秒），用于只采样运行中的某一段时间')
+    parser.add_argument('--dedup', action='store_true',
+                       help='内容去重：源端ETag和大小相同的对象只从COS下载一次，其余在MinIO上服务端复制（每个进程内去重）')
+    parser.add_argument('--status-filter', nargs='+', default=None, 
+                       help='状态过滤器 (pending, failed, success)，默认pending，增量同步时默认处理所有行')
     
     args = parser.parse_args()
     
     # 设置日志
     setup_logging()
     
+    if args.excel_path is None and args.source_prefix is None:
+        parser.error('需要指定清单文件路径或--source-prefix')
+    
     # 检查Excel文件是否存在
-    if not os.path.exists(args.excel_path):
+    if args.source_prefix is None and not os.path.exists(args.excel_path):
         logging.error(f"Excel文件不存在: {args.excel_path}")
         return 1
     
+    journal_path = args.journal_path
+    if journal_path is None and args.excel_path and (args.journal or args.export_excel is not None):
+        journal_path = StateStore.default_path(args.excel_path)
+    
     # 创建迁移器
     try:
         migrator = COS2MinIOMigrator(
             excel_path=args.excel_path,
             cos_config_name=args.cos_config,
             temp_dir=args.temp_dir,
-            max_workers=args.max_workers
+            max_workers=args.max_workers,
+            stream_mode=args.stream,
+            prescan_dest=args.prescan_dest,
+            prescan_mode=args.prescan_mode,
+            prescan_source=args.prescan_source,
+            part_concurrency=args.part_concurrency,
+            large_object_threshold=args.large_threshold * 1024 * 1024 if args.large_threshold else None,
+            lanes=args.lanes,
+            small_workers=args.small_workers,
+            large_workers=args.large_workers,
+            lane_order=args.lane_order,
+            engine=args.engine,
+            async_concurrency=args.async_concurrency,
+            processes=args.processes,
+            shard_index=args.shard_index,
+            shard_count=args.shard_count,
+            journal_path=journal_path,
+            stream_manifest=args.stream_manifest,
+            manifest_chunk_size=args.manifest_chunk_size,
+            result_output=args.result_output,
+            download_workers=args.download_workers,
+            upload_workers=args.upload_workers,
+            staging_budget=args.staging_budget * 1024 * 1024 if args.staging_budget else None,
+            memory_threshold=int(args.memory_threshold * 1024 * 1024) if args.memory_threshold is not None else None,
+            adaptive=args.adaptive,
+            min_workers=args.min_workers,
+            latency_target=args.latency_target,
+            max_retries=args.max_retries,
+            rate_limit_file=args.rate_limit_file,
+            verify_checksum=True if args.verify else None,
+            sync=args.sync,
+            source_prefix=args.source_prefix,
+            list_workers=args.list_workers,
+            metrics_port=args.metrics_port,
+            profile=args.profile,
+            profile_sample=args.profile_sample,
+            profile_sample_delay=args.profile_sample_delay,
+            dedup=args.dedup
         )
         
+        # 导出状态日志到Excel
+        if args.export_excel is not None:
+            return 0 if migrator.export_excel(args.export_excel or None) else 1
+        
         # 开始迁移
+        status_filter = args.status_filter or (None if args.sync else ['pending'])
         success = migrator.migrate_all(
-            status_filter=args.status_filter if not args.resume else None,
+            status_filter=status_filter if not args.resume else None,
             resume=args.resume
         )
         
         return 0 if success else 1
-        
+    
     except Exception as e:
         logging.error(f"程序执行失败: {e}")
         return 1
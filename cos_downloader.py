@@ -5,42 +5,326 @@ COS下载模块 - 从腾讯云COS下载文件
 import os
 import logging
 import tempfile
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from qcloud_cos import CosConfig, CosS3Client
-from config import COS_CONFIGS, DEFAULT_COS_CONFIG
+from config import COS_CONFIGS, DEFAULT_COS_CONFIG, TRANSFER_CONFIG
+from checksum import HashingReader
+
+
+# 不可变的COS客户端句柄，每个任务持有自己的句柄，避免线程间共享可变状态
+COSHandle = namedtuple('COSHandle', ['config_name', 'client', 'bucket'])
+
+
+class IncompleteRangeError(IOError):
+    """分段下载返回的数据少于请求的字节范围（连接中途断开等），重新传输即可"""
+
+
+class COSObjectStream:
+    """COS对象读取流，提供file-like的read接口，供MinIO直接流式上传"""
+
+    def __init__(self, body, size=None, chunk_size=None, limit=None):
+        """
+        初始化读取流
+
+        Args:
+            body: COS get_object 返回的StreamBody
+            size: 对象大小（字节），未知时为None
+            chunk_size: 单次从网络读取的最大字节数
+            limit: 读取带宽限速（RateLimit），为None时不限速
+        """
+        self._body = body
+        self._raw = body.get_raw_stream()
+        self.size = size
+        self.chunk_size = chunk_size or TRANSFER_CONFIG['stream_chunk_size']
+        self.limit = limit
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        """读取最多size字节，流结束时返回空bytes"""
+        if size is None or size < 0:
+            size = self.chunk_size
+        data = self._raw.read(min(size, self.chunk_size))
+        if data:
+            self.bytes_read += len(data)
+            if self.limit is not None:
+                self.limit.transfer(len(data))
+        return data or b''
+
+    def close(self):
+        """关闭底层HTTP连接"""
+        try:
+            self._raw.close()
+        except Exception:
+            pass
+
+
+class COSRangedStream:
+    """
+    COS对象分段并发读取流
+    
+    按字节范围并发预取多个分段，read()按顺序返回数据，
+    内存中最多保留 concurrency 个分段。
+    """
+    
+    def __init__(self, client, bucket, key, size, part_size, concurrency, limit=None):
+        """
+        初始化分段读取流
+        
+        Args:
+            client: CosS3Client
+            bucket: COS bucket名称
+            key: 对象key
+            size: 对象大小（字节）
+            part_size: 每个分段的大小（字节）
+            concurrency: 并发预取的分段数
+            limit: 带宽和请求速率限速（RateLimit），为None时不限速
+        """
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._limit = limit
+        self.size = size
+        self.bytes_read = 0
+        self._ranges = ((start, min(start + part_size, size) - 1) for start in range(0, size, part_size))
+        self._executor = ThreadPoolExecutor(max_workers=max(concurrency, 1))
+        self._pending = deque()
+        self._buffer = b''
+        self._offset = 0
+        
+        for _ in range(max(concurrency, 1)):
+            self._schedule()
+    
+    def _schedule(self):
+        """提交下一个分段的预取任务"""
+        byte_range = next(self._ranges, None)
+        if byte_range is not None:
+            self._pending.append(self._executor.submit(self._fetch, *byte_range))
+    
+    def _fetch(self, start, end):
+        """下载单个字节范围"""
+        if self._limit is not None:
+            self._limit.request()
+        response = self._client.get_object(
+            Bucket=self._bucket,
+            Key=self._key,
+            Range=f'bytes={start}-{end}'
+        )
+        raw = response['Body'].get_raw_stream()
+        try:
+            data = raw.read()
+        finally:
+            raw.close()
+        if len(data) != end - start + 1:
+            raise IncompleteRangeError(f"分段下载不完整: {self._key} bytes={start}-{end}, 实际{len(data)}字节")
+        return data
+    
+    def read(self, size=-1):
+        """按顺序读取最多size字节，流结束时返回空bytes"""
+        if self._offset >= len(self._buffer):
+            if not self._pending:
+                return b''
+            self._buffer = self._pending.popleft().result()
+            self._offset = 0
+            self._schedule()
+        
+        if size is None or size < 0:
+            size = len(self._buffer) - self._offset
+        data = self._buffer[self._offset:self._offset + size]
+        self._offset += len(data)
+        self.bytes_read += len(data)
+        if data and self._limit is not None:
+            # 按读出的字节数限速，预取的分段数有上限，下载速度随之受限
+            self._limit.transfer(len(data))
+        return data
+    
+    def close(self):
+        """取消未完成的预取任务"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._pending.clear()
+        self._buffer = b''
+
+
+class COSClientRegistry:
+    """
+    COS客户端注册表
+    
+    每个COS配置只创建一次CosS3Client并复用其连接池，线程安全。
+    同时预先建立 bucket名称 -> 配置名 的索引，避免逐行线性扫描COS_CONFIGS。
+    """
+    
+    def __init__(self, configs=None, pool_size=10):
+        """
+        初始化客户端注册表
+        
+        Args:
+            configs: COS配置字典，如果为None则使用COS_CONFIGS
+            pool_size: 每个客户端的HTTP连接池大小，通常与并发数一致
+        """
+        self.configs = configs if configs is not None else COS_CONFIGS
+        self.pool_size = max(pool_size, 1)
+        self._handles = {}
+        self._lock = threading.Lock()
+        self._bucket_index = self._build_bucket_index()
+        self._hint_cache = {}
+    
+    def _build_bucket_index(self):
+        """建立 bucket名称 -> 配置名 的索引"""
+        index = {}
+        for config_name, config in self.configs.items():
+            bucket = config.get('bucket')
+            if not bucket:
+                continue
+            index.setdefault(bucket, config_name)
+            # COS bucket名称格式为 <name>-<appid>，同时索引不带appid的短名称
+            short_name, _, appid = bucket.rpartition('-')
+            if short_name and appid.isdigit():
+                index.setdefault(short_name, config_name)
+        return index
+    
+    def find_config_name(self, bucket_name):
+        """
+        根据bucket名称（或名称片段）查找COS配置名
+        
+        Args:
+            bucket_name: bucket名称或其片段
+            
+        Returns:
+            str: 配置名称，未找到返回None
+        """
+        if not bucket_name:
+            return None
+        
+        config_name = self._bucket_index.get(bucket_name)
+        if config_name is not None:
+            return config_name
+        
+        # 非完整名称时按子串匹配，结果按名称缓存，每个名称只扫描一次
+        if bucket_name not in self._hint_cache:
+            self._hint_cache[bucket_name] = next(
+                (name for name, config in self.configs.items()
+                 if config.get('bucket') and bucket_name in config['bucket']),
+                None
+            )
+        return self._hint_cache[bucket_name]
+    
+    def get(self, config_name):
+        """
+        获取指定配置的客户端句柄，首次使用时创建客户端
+        
+        Args:
+            config_name: COS配置名称
+            
+        Returns:
+            COSHandle: 不可变的(config_name, client, bucket)句柄
+        """
+        handle = self._handles.get(config_name)
+        if handle is not None:
+            return handle
+        
+        with self._lock:
+            handle = self._handles.get(config_name)
+            if handle is None:
+                config = self.configs.get(config_name)
+                if not config:
+                    raise ValueError(f"未找到COS配置: {config_name}")
+                handle = COSHandle(config_name, self._create_client(config), config['bucket'])
+                self._handles[config_name] = handle
+                logging.info(f"创建COS客户端: {config_name}, bucket: {handle.bucket}, 连接池: {self.pool_size}")
+        return handle
+    
+    def resolve(self, url, bucket_hint=None):
+        """
+        根据URL或bucket hint解析COS源端客户端句柄
+        
+        Args:
+            url: COS文件URL
+            bucket_hint: 来自Excel的bucket名称提示
+            
+        Returns:
+            COSHandle: 客户端句柄，未找到匹配配置返回None
+        """
+        # 优先使用 bucket_hint 进行匹配，失败或未提供时回退到URL域名
+        config_name = self.find_config_name(bucket_hint)
+        if config_name is None:
+            bucket_from_url = urlparse(url).netloc.split('.')[0]
+            config_name = self.find_config_name(bucket_from_url)
+        
+        if config_name is None:
+            return None
+        return self.get(config_name)
+    
+    def _create_client(self, config):
+        """根据给定配置创建COS客户端"""
+        cos_config = CosConfig(
+            Region=config['region'],
+            SecretId=config['secret_id'],
+            SecretKey=config['secret_key'],
+            Token='',
+            Scheme=config.get('scheme') or 'https',
+            Domain=config.get('domain') or None,
+            PoolConnections=self.pool_size,
+            PoolMaxSize=self.pool_size
+        )
+        return CosS3Client(cos_config)
 
 
 class COSDownloader:
     """腾讯云COS下载器"""
     
-    def __init__(self, cos_config_name=None):
+    def __init__(self, cos_config_name=None, pool_size=10, rate_limits=None):
         """
         初始化COS下载器
         
         Args:
             cos_config_name: COS配置名称，如果为None则使用默认配置
+            pool_size: 每个COS客户端的连接池大小
+            rate_limits: RateLimiterRegistry实例，按COS配置限制带宽和请求速率，为None时不限速
         """
+        self.registry = COSClientRegistry(pool_size=pool_size)
+        self.rate_limits = rate_limits
         self.config_name = cos_config_name or DEFAULT_COS_CONFIG
         self.cos_config = COS_CONFIGS.get(self.config_name)
         
         if not self.cos_config:
             raise ValueError(f"未找到COS配置: {self.config_name}")
             
-        # 初始化COS客户端
-        config = CosConfig(
-            Region=self.cos_config['region'],
-            SecretId=self.cos_config['secret_id'],
-            SecretKey=self.cos_config['secret_key'],
-            Token='',
-            Scheme='https'
-        )
-        self.client = CosS3Client(config)
-        self.bucket_name = self.cos_config['bucket']
+        # 初始化默认COS客户端
+        self.handle = self.registry.get(self.config_name)
+        self.client = self.handle.client
+        self.bucket_name = self.handle.bucket
         
         logging.info(f"初始化COS下载器: {self.config_name}, bucket: {self.bucket_name}")
     
+    def resolve_handle(self, url, bucket_hint=None):
+        """
+        根据URL或bucket hint解析COS源端客户端句柄（线程安全，不修改下载器状态）
+
+        Args:
+            url: COS文件URL
+            bucket_hint: 来自Excel的bucket名称提示
+
+        Returns:
+            COSHandle: 客户端句柄，未找到匹配配置返回None
+        """
+        try:
+            handle = self.registry.resolve(url, bucket_hint=bucket_hint)
+            if handle is None:
+                logging.warning(f"未找到匹配的COS源存储桶配置: {url}")
+            else:
+                logging.debug(f"COS源配置: {handle.config_name}, bucket: {handle.bucket}")
+            return handle
+        except Exception as e:
+            logging.error(f"解析COS源存储桶配置失败: {e}")
+            return None
+    
     def auto_detect_bucket_config(self, url, bucket_hint=None):
         """
         根据URL或bucket hint自动检测并设置正确的存储桶配置（用于COS源端）
+        
+        该方法会切换下载器的默认客户端，多线程场景请使用resolve_handle()
 
         Args:
             url: COS文件URL
@@ -49,50 +333,47 @@ class COSDownloader:
         Returns:
             bool: 是否成功检测到配置
         """
-        try:
-            # 优先使用 bucket_hint 进行匹配
-            if bucket_hint:
-                for config_name, config in COS_CONFIGS.items():
-                    if bucket_hint in config['bucket']:
-                        self._set_client_config(config_name, config)
-                        logging.info(f"通过Excel hint '{bucket_hint}' 切换到配置: {config_name}, bucket: {self.bucket_name}")
-                        return True
-
-            # 如果 hint 失败或未提供，则回退到基于URL的检测
-            from urllib.parse import urlparse
-            parsed_url = urlparse(url)
-            
-            host_parts = parsed_url.netloc.split('.')
-            if len(host_parts) > 0:
-                bucket_from_url = host_parts[0]
-                
-                for config_name, config in COS_CONFIGS.items():
-                    if bucket_from_url in config['bucket']:
-                        self._set_client_config(config_name, config)
-                        logging.info(f"通过URL自动切换到配置: {config_name}, bucket: {self.bucket_name}")
-                        return True
-                        
-            logging.warning(f"未找到匹配的COS源存储桶配置: {url}")
-            return False
-            
-        except Exception as e:
-            logging.error(f"自动检测COS源存储桶配置失败: {e}")
+        handle = self.resolve_handle(url, bucket_hint=bucket_hint)
+        if handle is None:
             return False
+        
+        self._set_client_config(handle)
+        logging.info(f"切换到配置: {self.config_name}, bucket: {self.bucket_name}")
+        return True
 
-    def _set_client_config(self, config_name, config):
-        """根据给定配置设置COS客户端"""
-        self.config_name = config_name
-        self.cos_config = config
+    def _set_client_config(self, handle):
+        """切换默认客户端到给定句柄"""
+        self.handle = handle
+        self.config_name = handle.config_name
+        self.cos_config = self.registry.configs[handle.config_name]
+        self.client = handle.client
+        self.bucket_name = handle.bucket
+    
+    def _client_and_bucket(self, handle=None):
+        """返回句柄对应的(client, bucket)，未指定句柄时使用默认客户端"""
+        if handle is None:
+            return self.client, self.bucket_name
+        return handle.client, handle.bucket
+    
+    def _rate_limit(self, handle=None):
+        """返回句柄对应COS配置的限速，未启用限速时返回None"""
+        if self.rate_limits is None:
+            return None
+        return self.rate_limits.cos(handle.config_name if handle is not None else self.config_name)
+    
+    def object_url(self, cos_path, handle=None):
+        """
+        生成对象的COS访问URL（与清单中的URL格式相同）
         
-        cos_config = CosConfig(
-            Region=self.cos_config['region'],
-            SecretId=self.cos_config['secret_id'],
-            SecretKey=self.cos_config['secret_key'],
-            Token='',
-            Scheme='https'
-        )
-        self.client = CosS3Client(cos_config)
-        self.bucket_name = self.cos_config['bucket']
+        Args:
+            cos_path: COS文件路径
+            handle: COS客户端句柄，如果为None则使用默认客户端
+            
+        Returns:
+            str: 对象URL
+        """
+        config = self.registry.configs[handle.config_name] if handle is not None else self.cos_config
+        return f"https://{config['bucket']}.cos.{config['region']}.myqcloud.com/{cos_path}"
     
     def download_file_from_url(self, url, local_path=None, temp_dir=None):
         """
@@ -107,13 +388,13 @@ class COSDownloader:
             str: 下载后的本地文件路径，失败返回None
         """
         try:
-            # 自动检测并切换到正确的存储桶配置
-            if not self.auto_detect_bucket_config(url):
+            # 自动检测正确的存储桶配置
+            handle = self.resolve_handle(url)
+            if handle is None:
                 logging.error(f"无法检测存储桶配置: {url}")
                 return None
             
             # 从URL提取文件路径
-            from urllib.parse import urlparse
             parsed_url = urlparse(url)
             cos_path = parsed_url.path.lstrip('/')
             
@@ -122,13 +403,14 @@ class COSDownloader:
                 return None
             
             # 调用原有的下载方法
-            return self.download_file(cos_path, local_path, temp_dir)
+            return self.download_file(cos_path, local_path, temp_dir, handle=handle)
             
         except Exception as e:
             logging.error(f"从URL下载文件失败: {url}, 错误: {e}")
             return None
     
-    def download_file(self, cos_path, local_path=None, temp_dir=None):
+    def download_file(self, cos_path, local_path=None, temp_dir=None, handle=None,
+                      part_size=None, concurrency=None, raise_errors=False, checksum=None, size=None):
         """
         从COS下载单个文件
         
@@ -136,24 +418,27 @@ class COSDownloader:
             cos_path: COS文件路径
             local_path: 本地保存路径，如果为None则使用临时文件
             temp_dir: 临时目录
+            handle: COS客户端句柄，如果为None则使用默认客户端
+            part_size: 分段下载的分段大小（字节），如果为None则使用SDK默认值
+            concurrency: 分段下载的并发数，如果为None则使用SDK默认值
+            raise_errors: 下载失败时是否抛出原始异常（供调用方识别限流等错误），默认返回None
+            checksum: Checksum实例，设置后在写入文件的同时计算校验值（不需要再次读取文件）
+            size: 对象大小（字节），与part_size同时设置时按字节范围并发读取；设置后校验下载的文件大小
             
         Returns:
             str: 下载后的本地文件路径，失败返回None
         """
+        client, bucket_name = self._client_and_bucket(handle)
         try:
             # 如果没有指定本地路径，使用临时文件
             if local_path is None:
                 if temp_dir and not os.path.exists(temp_dir):
                     os.makedirs(temp_dir, exist_ok=True)
                     
-                # 保持原始文件名
+                # 保留原始文件名作为后缀，mkstemp保证不同前缀下的同名文件不会互相覆盖
                 filename = os.path.basename(cos_path) or 'temp_file'
-                if temp_dir:
-                    local_path = os.path.join(temp_dir, filename)
-                else:
-                    # 使用系统临时目录
-                    fd, local_path = tempfile.mkstemp(suffix=f'_{filename}')
-                    os.close(fd)
+                fd, local_path = tempfile.mkstemp(dir=temp_dir or None, suffix=f'_{filename}')
+                os.close(fd)
             
             # 确保本地目录存在
             local_dir = os.path.dirname(local_path)
@@ -162,20 +447,36 @@ class COSDownloader:
             
             logging.info(f"开始下载: {cos_path} -> {local_path}")
             
-            # 下载文件
-            self.client.download_file(
-                Bucket=self.bucket_name,
-                Key=cos_path,
-                DestFilePath=local_path
-            )
-            
-            # 验证文件是否下载成功
-            if os.path.exists(local_path) and os.path.getsize(local_path) > 0:
-                logging.info(f"下载成功: {cos_path}")
-                return local_path
+            limit = self._rate_limit(handle)
+            if checksum is not None or (limit is not None and limit.limits_bandwidth):
+                # 需要校验或限制带宽时读取响应流写入文件，读取的同时计算校验值、按字节数限速
+                self._download_stream(cos_path, local_path, handle, checksum, size, part_size, concurrency)
             else:
-                logging.error(f"下载的文件为空或不存在: {local_path}")
+                if limit is not None:
+                    limit.request()
+                # 下载文件（超过分段大小的文件由SDK按字节范围并发下载）
+                download_options = {}
+                if part_size:
+                    download_options['PartSize'] = max(part_size // (1024 * 1024), 1)
+                if concurrency:
+                    download_options['MAXThread'] = concurrency
+                client.download_file(
+                    Bucket=bucket_name,
+                    Key=cos_path,
+                    DestFilePath=local_path,
+                    **download_options
+                )
+            
+            # 验证文件是否下载成功（0字节对象是合法的，已知对象大小时比对文件大小）
+            if not os.path.exists(local_path):
+                logging.error(f"下载的文件不存在: {local_path}")
                 return None
+            if size is not None and os.path.getsize(local_path) != size:
+                logging.error(f"下载的文件大小不一致: {local_path}, "
+                              f"本地 {os.path.getsize(local_path)} 字节, 源端 {size} 字节")
+                return None
+            logging.info(f"下载成功: {cos_path}")
+            return local_path
                 
         except Exception as e:
             logging.error(f"下载文件失败: {cos_path}, 错误: {e}")
@@ -185,67 +486,177 @@ class COSDownloader:
                     os.remove(local_path)
                 except:
                     pass
+            if raise_errors:
+                raise
             return None
     
-    def check_file_exists(self, cos_path):
+    def _download_stream(self, cos_path, local_path, handle=None, checksum=None, size=None,
+                         part_size=None, concurrency=None):
+        """读取响应流写入文件，大对象按字节范围并发读取"""
+        with open(local_path, 'wb') as f:
+            self.download_fileobj(cos_path, f, handle, checksum, size, part_size, concurrency)
+    
+    def download_fileobj(self, cos_path, fileobj, handle=None, checksum=None, size=None,
+                         part_size=None, concurrency=None):
+        """
+        读取COS文件写入可写对象（如内存缓冲区），大对象按字节范围并发读取
+        
+        Args:
+            cos_path: COS文件路径
+            fileobj: 提供write()方法的对象
+            handle: COS客户端句柄，如果为None则使用默认客户端
+            checksum: Checksum实例，设置后在读取的同时计算校验值
+            size: 对象大小（字节），与part_size同时设置时按字节范围并发读取
+            part_size: 分段大小（字节）
+            concurrency: 分段并发数
+            
+        Returns:
+            int: 写入的字节数
+            
+        Raises:
+            Exception: 读取COS失败时抛出
+        """
+        if part_size and size:
+            stream = self.open_ranged_stream(cos_path, size, part_size, concurrency or 1, handle=handle)
+        else:
+            stream = self.open_stream(cos_path, handle=handle)
+        if checksum is not None:
+            stream = HashingReader(stream, checksum)
+        written = 0
+        try:
+            while True:
+                data = stream.read()
+                if not data:
+                    break
+                fileobj.write(data)
+                written += len(data)
+        finally:
+            stream.close()
+        return written
+    
+    def open_stream(self, cos_path, handle=None):
+        """
+        打开COS文件的读取流（不写入本地磁盘）
+        
+        Args:
+            cos_path: COS文件路径
+            handle: COS客户端句柄，如果为None则使用默认客户端
+            
+        Returns:
+            COSObjectStream: 读取流，size为None表示对象大小未知（chunked响应）
+            
+        Raises:
+            Exception: 请求COS失败时抛出
+        """
+        client, bucket_name = self._client_and_bucket(handle)
+        limit = self._rate_limit(handle)
+        if limit is not None:
+            limit.request()
+        response = client.get_object(Bucket=bucket_name, Key=cos_path)
+        content_length = response.get('Content-Length')
+        size = int(content_length) if content_length not in (None, '') else None
+        
+        logging.info(f"打开COS读取流: {cos_path} ({size if size is not None else '未知'} bytes)")
+        return COSObjectStream(response['Body'], size=size, limit=limit)
+    
+    def open_ranged_stream(self, cos_path, size, part_size, concurrency, handle=None):
+        """
+        打开COS大文件的分段并发读取流（不写入本地磁盘）
+        
+        Args:
+            cos_path: COS文件路径
+            size: 对象大小（字节）
+            part_size: 每个分段的大小（字节）
+            concurrency: 并发下载的分段数
+            handle: COS客户端句柄，如果为None则使用默认客户端
+            
+        Returns:
+            COSRangedStream: 分段读取流
+        """
+        client, bucket_name = self._client_and_bucket(handle)
+        logging.info(f"打开COS分段读取流: {cos_path} ({size} bytes, 分段: {part_size} bytes, 并发: {concurrency})")
+        return COSRangedStream(client, bucket_name, cos_path, size, part_size, concurrency,
+                               limit=self._rate_limit(handle))
+    
+    def check_file_exists(self, cos_path, handle=None):
         """
         检查COS文件是否存在
         
         Args:
             cos_path: COS文件路径
+            handle: COS客户端句柄，如果为None则使用默认客户端
             
         Returns:
             bool: 文件是否存在
         """
+        client, bucket_name = self._client_and_bucket(handle)
+        limit = self._rate_limit(handle)
+        if limit is not None:
+            limit.request()
         try:
-            response = self.client.head_object(Bucket=self.bucket_name, Key=cos_path)
+            response = client.head_object(Bucket=bucket_name, Key=cos_path)
             logging.debug(f"文件存在: {cos_path}")
             return True
         except Exception as e:
             # 检查是否是CosServiceError且包含NoSuchResource
             error_msg = str(e)
             if 'NoSuchResource' in error_msg or 'NoSuchKey' in error_msg:
-                logging.warning(f"COS文件不存在: {cos_path} (bucket: {self.bucket_name})")
+                logging.warning(f"COS文件不存在: {cos_path} (bucket: {bucket_name})")
             else:
                 logging.error(f"检查文件存在性时发生错误: {cos_path}, 错误: {e}")
             return False
     
-    def get_file_info(self, cos_path):
+    def get_file_info(self, cos_path, handle=None, raise_errors=False):
         """
         获取COS文件信息
         
         Args:
             cos_path: COS文件路径
+            handle: COS客户端句柄，如果为None则使用默认客户端
+            raise_errors: 文件不存在以外的错误是否抛出原始异常（避免把限流误判为文件不存在）
             
         Returns:
             dict: 文件信息，包含大小、最后修改时间等
         """
+        client, bucket_name = self._client_and_bucket(handle)
+        limit = self._rate_limit(handle)
+        if limit is not None:
+            limit.request()
         try:
-            response = self.client.head_object(Bucket=self.bucket_name, Key=cos_path)
+            response = client.head_object(Bucket=bucket_name, Key=cos_path)
             return {
-                'size': response.get('Content-Length', 0),
+                'size': int(response.get('Content-Length', 0)),
                 'last_modified': response.get('Last-Modified', ''),
-                'etag': response.get('ETag', ''),
+                'etag': response.get('ETag', '').strip('"'),
+                'crc64': response.get('x-cos-hash-crc64ecma'),
                 'content_type': response.get('Content-Type', '')
             }
         except Exception as e:
-            logging.error(f"获取文件信息失败: {cos_path}, 错误: {e}")
+            error_msg = str(e)
+            if 'NoSuchResource' in error_msg or 'NoSuchKey' in error_msg:
+                logging.warning(f"COS文件不存在: {cos_path} (bucket: {bucket_name})")
+            else:
+                logging.error(f"获取文件信息失败: {cos_path}, 错误: {e}")
+                if raise_errors:
+                    raise
             return None
     
-    def list_objects(self, prefix='', max_keys=1000):
+    def list_objects(self, prefix='', max_keys=1000, handle=None):
         """
         列出COS存储桶中的对象
         
         Args:
             prefix: 前缀过滤
             max_keys: 最大返回数量
+            handle: COS客户端句柄，如果为None则使用默认客户端
             
         Returns:
             list: 对象列表
         """
+        client, bucket_name = self._client_and_bucket(handle)
         try:
-            response = self.client.list_objects(
-                Bucket=self.bucket_name,
+            response = client.list_objects(
+                Bucket=bucket_name,
                 Prefix=prefix,
                 MaxKeys=max_keys
             )
@@ -254,17 +665,61 @@ class COSDownloader:
             logging.error(f"列出对象失败: {e}")
             return []
     
-    def debug_list_similar_files(self, cos_path, prefix_depth=2):
+    def iter_objects(self, prefix='', max_keys=1000, handle=None, delimiter=''):
+        """
+        分页列出COS存储桶中的全部对象（Marker/NextMarker翻页）
+        
+        Args:
+            prefix: 前缀过滤
+            max_keys: 单页最大返回数量（COS上限为1000）
+            handle: COS客户端句柄，如果为None则使用默认客户端
+            delimiter: 分隔符，设置时只列出当前一层，下一层的公共前缀以 {'Prefix': ...} 形式返回
+            
+        Returns:
+            generator: 对象信息字典的迭代器（Key、Size、ETag、LastModified等），列举失败时抛出异常
+        """
+        client, bucket_name = self._client_and_bucket(handle)
+        limit = self._rate_limit(handle)
+        marker = ''
+        while True:
+            if limit is not None:
+                limit.request()
+            response = client.list_objects(
+                Bucket=bucket_name,
+                Prefix=prefix,
+                Marker=marker,
+                MaxKeys=max_keys,
+                Delimiter=delimiter
+            )
+            contents = response.get('Contents', [])
+            prefixes = response.get('CommonPrefixes', []) if delimiter else []
+            for obj in contents:
+                yield obj
+            for common_prefix in prefixes:
+                yield common_prefix
+            
+            if str(response.get('IsTruncated', 'false')).lower() != 'true':
+                break
+            # 未指定Delimiter时COS可能不返回NextMarker，此时以最后一个Key（或公共前缀）作为下一页起点
+            marker = response.get('NextMarker') or max(
+                [obj['Key'] for obj in contents[-1:]] + [p['Prefix'] for p in prefixes[-1:]], default=''
+            )
+            if not marker:
+                break
+    
+    def debug_list_similar_files(self, cos_path, prefix_depth=2, handle=None):
         """
         调试方法：列出与给定路径相似的文件，用于排查文件不存在的问题
         
         Args:
             cos_path: 要查找的COS文件路径
             prefix_depth: 前缀深度，用于确定搜索范围
+            handle: COS客户端句柄，如果为None则使用默认客户端
             
         Returns:
             list: 相似的文件列表
         """
+        client, bucket_name = self._client_and_bucket(handle)
         try:
             # 获取前缀路径
             path_parts = cos_path.split('/')
@@ -273,10 +728,10 @@ class COSDownloader:
             else:
                 prefix = ''
             
-            logging.info(f"搜索存储桶 {self.bucket_name} 中前缀为 '{prefix}' 的文件...")
+            logging.info(f"搜索存储桶 {bucket_name} 中前缀为 '{prefix}' 的文件...")
             
-            response = self.client.list_objects(
-                Bucket=self.bucket_name,
+            response = client.list_objects(
+                Bucket=bucket_name,
                 Prefix=prefix,
                 MaxKeys=20  # 限制返回数量，避免过多输出
             )
@@ -291,9 +746,9 @@ class COSDownloader:
                 
             if not files:
                 # 如果没有找到文件，尝试列出根目录的一些文件
-                logging.info(f"尝试列出存储桶 {self.bucket_name} 根目录的前20个文件...")
-                response = self.client.list_objects(
-                    Bucket=self.bucket_name,
+                logging.info(f"尝试列出存储桶 {bucket_name} 根目录的前20个文件...")
+                response = client.list_objects(
+                    Bucket=bucket_name,
                     MaxKeys=20
                 )
                 if 'Contents' in response:
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+内容去重模块 - 清单中内容相同（源端ETag和大小相同）的对象只从COS传输一次
+
+第一个任务（首个副本）正常传输；其余任务在首个副本完成后，在MinIO上以服务端复制生成各自的目标对象，
+不再访问COS。首个副本仍在传输时claim()返回PENDING，由调用方延迟后重新认领（不阻塞工作线程）；
+首个副本失败时由重新认领的任务之一接替传输。去重范围为单个进程内。
+"""
+import threading
+
+
+# 内容相同的对象仍在传输中（首个副本尚未完成）
+PENDING = object()
+
+
+class ContentDedup:
+    """
+    按(源端ETag, 大小)跟踪已迁移的内容
+    
+    传输中的内容对应一个Event，首个副本成功后替换为其目标位置(bucket, 对象名)，
+    只有在途的内容才占用Event。
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+    
+    @staticmethod
+    def content_key(result):
+        """
+        去重键
+        
+        Args:
+            result: 迁移结果（包含源端etag和size）
+            
+        Returns:
+            tuple: (etag, size)，源端信息不完整时返回None（不参与去重）
+        """
+        etag = (result.get('etag') or '').strip('"')
+        if not etag or result.get('size') is None:
+            return None
+        return etag, result['size']
+    
+    def claim(self, result, wait=False):
+        """
+        查询内容相同的已迁移对象；内容尚未迁移时当前任务成为首个副本
+        
+        Args:
+            result: 迁移结果（成为首个副本时写入dedup_key，完成后须调用finish()）
+            wait: 内容相同的对象正在传输时是否阻塞等待其完成（只用于没有延迟队列的单个任务）
+            
+        Returns:
+            tuple: 可复制的(bucket, 对象名)；返回None时由调用方正常传输，
+                   首个副本仍在传输且wait=False时返回PENDING
+        """
+        key = self.content_key(result)
+        if key is None:
+            return None
+        
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._entries[key] = threading.Event()
+                    result['dedup_key'] = key
+                    return None
+                if not isinstance(entry, threading.Event):
+                    return entry
+            if not wait:
+                return PENDING
+            # 首个副本完成（成功或失败）后重新检查，失败时由其中一个等待者接替
+            entry.wait()
+    
+    def finish(self, result):
+        """
+        首个副本完成：成功时记录目标位置供其他任务复制，失败时移除记录（并唤醒阻塞等待者），由下一次认领接替传输
+        
+        Args:
+            result: claim()成为首个副本的任务的迁移结果（其他任务调用时忽略）
+        """
+        key = result.pop('dedup_key', None)
+        if key is None:
+            return
+        with self._lock:
+            event = self._entries.pop(key)
+            if result.get('status') == 'success':
+                self._entries[key] = (result['bucket'], result['cos_path'])
+        event.set()
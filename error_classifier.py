@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+错误分类模块 - 从COS SDK、MinIO SDK和异步引擎的异常中识别限流、可重试和永久错误
+
+可重试错误（超时、5xx、连接重置、限流）进入延迟重试队列；永久错误（NoSuchKey、AccessDenied等）
+重试也不会成功，直接标记失败。
+"""
+import socket
+
+from checksum import ChecksumMismatchError
+from cos_downloader import IncompleteRangeError
+
+try:
+    import requests
+except ImportError:  # pragma: no cover - requests随cos-python-sdk-v5安装
+    requests = None
+
+try:
+    import urllib3
+except ImportError:  # pragma: no cover - urllib3随minio安装
+    urllib3 = None
+
+
+# 表示服务端限流或过载的HTTP状态码
+THROTTLE_STATUS = {429, 503}
+
+# 表示服务端限流或过载的错误码（COS、MinIO和S3）
+THROTTLE_CODES = {
+    'SlowDown',
+    'RequestLimitExceeded',
+    'RequestRateLimitExceeded',
+    'TooManyRequests',
+    'Throttling',
+    'ThrottlingException',
+    'ServiceUnavailable',
+    'XMinioServerNotInitialized'
+}
+
+# 重试也不会成功的错误码
+PERMANENT_CODES = {
+    'NoSuchKey',
+    'NoSuchResource',
+    'NoSuchBucket',
+    'AccessDenied',
+    'InvalidAccessKeyId',
+    'SignatureDoesNotMatch',
+    'InvalidBucketName',
+    'InvalidObjectName',
+    'EntityTooLarge',
+    'MethodNotAllowed'
+}
+
+# 可重试的HTTP状态码（除5xx以外）
+RETRYABLE_STATUS = {408, 409, 429}
+
+# 错误分类
+THROTTLED = 'throttled'
+RETRYABLE = 'retryable'
+PERMANENT = 'permanent'
+
+# 无法取得错误码时，按错误信息中的关键字识别限流
+THROTTLE_MESSAGES = ('SlowDown', 'Too Many Requests', 'Please reduce your request rate')
+
+
+def error_code(error):
+    """
+    提取异常中的错误码
+    
+    Args:
+        error: 异常对象
+        
+    Returns:
+        str: 错误码（如NoSuchKey、SlowDown），无法取得时返回None
+    """
+    # CosServiceError
+    get_code = getattr(error, 'get_error_code', None)
+    if callable(get_code):
+        return get_code() or None
+    # minio.error.S3Error、async_engine.S3RequestError
+    code = getattr(error, 'code', None)
+    if isinstance(code, str) and code:
+        return code
+    return None
+
+
+def status_code(error):
+    """
+    提取异常中的HTTP状态码
+    
+    Args:
+        error: 异常对象
+        
+    Returns:
+        int: HTTP状态码，无法取得时返回None
+    """
+    # CosServiceError
+    get_status = getattr(error, 'get_status_code', None)
+    if callable(get_status):
+        return get_status()
+    # async_engine.S3RequestError
+    status = getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status
+    # minio.error.S3Error
+    response = getattr(error, 'response', None)
+    if response is not None and isinstance(getattr(response, 'status', None), int):
+        return response.status
+    # minio.error.ServerError
+    status = getattr(error, '_status_code', None)
+    if isinstance(status, int):
+        return status
+    return None
+
+
+def is_throttle_error(error):
+    """
+    判断异常是否表示服务端限流或过载（429/503、SlowDown）
+    
+    连接被重置不视为限流（按瞬时错误重试），避免网络抖动使自适应并发减半
+    
+    Args:
+        error: 异常对象
+        
+    Returns:
+        bool: 是否为限流错误
+    """
+    if error is None:
+        return False
+    if error_code(error) in THROTTLE_CODES or status_code(error) in THROTTLE_STATUS:
+        return True
+    message = str(error)
+    return any(keyword in message for keyword in THROTTLE_MESSAGES)
+
+
+def _transient_error_types():
+    """网络层的瞬时错误类型（超时、连接失败、响应中断）"""
+    types = [ConnectionError, TimeoutError, socket.timeout]
+    if requests is not None:
+        types += [requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                  requests.exceptions.ChunkedEncodingError]
+    if urllib3 is not None:
+        types += [urllib3.exceptions.ProtocolError, urllib3.exceptions.TimeoutError,
+                  urllib3.exceptions.MaxRetryError, urllib3.exceptions.NewConnectionError]
+    return tuple(types)
+
+
+TRANSIENT_ERRORS = _transient_error_types()
+
+
+def classify_error(error):
+    """
+    判断异常的类别
+    
+    Args:
+        error: 异常对象
+        
+    Returns:
+        str: THROTTLED（限流）、RETRYABLE（超时、5xx、连接重置等瞬时错误）或 PERMANENT（其他错误）
+    """
+    if is_throttle_error(error):
+        return THROTTLED
+    if error_code(error) in PERMANENT_CODES:
+        return PERMANENT
+    
+    status = status_code(error)
+    if status is not None:
+        return RETRYABLE if status >= 500 or status in RETRYABLE_STATUS else PERMANENT
+    
+    if isinstance(error, TRANSIENT_ERRORS):
+        return RETRYABLE
+    # 传输的数据与源端不一致，重新传输
+    if isinstance(error, ChecksumMismatchError):
+        return RETRYABLE
+    # COS SDK把网络错误（超时、连接失败）包装为CosClientError
+    if type(error).__name__ == 'CosClientError':
+        return RETRYABLE
+    # 分段读取流收到的数据不完整，重新传输即可
+    if isinstance(error, IncompleteRangeError):
+        return RETRYABLE
+    return PERMANENT
+
+
+def is_retryable_error(error):
+    """
+    判断异常是否值得重试（限流和瞬时错误）
+    
+    Args:
+        error: 异常对象
+        
+    Returns:
+        bool: 是否可重试
+    """
+    return classify_error(error) != PERMANENT
@@ -6,6 +6,9 @@ import pandas as pd
 import logging
 from urllib.parse import urlparse
 import os
+import threading
+
+from manifest_io import iter_manifest_chunks, read_manifest, write_manifest, MANIFEST_READERS, manifest_format
 
 
 class ExcelProcessor:
@@ -26,6 +29,8 @@ class ExcelProcessor:
         self.status_column = status_column
         self.bucket_column = bucket_column
         self.df = None
+        # 工作线程、多进程结果汇总和预扫描过滤可能同时更新行状态
+        self._lock = threading.Lock()
         
     def read_excel(self):
         """读取Excel文件"""
@@ -38,8 +43,11 @@ class ExcelProcessor:
                 self.df = pd.read_excel(self.excel_path, engine='openpyxl')
             elif self.excel_path.endswith('.xls'):
                 self.df = pd.read_excel(self.excel_path, engine='xlrd')
+            elif manifest_format(self.excel_path) in MANIFEST_READERS:
+                # CSV/JSONL/Parquet格式的清单使用相同的列名
+                self.df = read_manifest(self.excel_path)
             else:
-                raise ValueError("不支持的文件格式，请使用.xlsx或.xls文件")
+                raise ValueError("不支持的文件格式，请使用.xlsx、.xls、.csv、.jsonl或.parquet文件")
                 
             # 检查必要的列是否存在
             if self.url_column not in self.df.columns:
@@ -61,21 +69,37 @@ class ExcelProcessor:
             logging.error(f"读取Excel文件失败: {e}")
             return False
     
-    def get_urls(self, status_filter=None):
+    # URL结构：scheme://netloc/path，与urlparse的scheme/netloc/path划分一致
+    URL_PATTERN = r'^(?P<scheme>[A-Za-z][A-Za-z0-9+.\-]*)://(?P<netloc>[^/?#]+)(?P<path>[^?#]*)'
+    
+    def get_url_frame(self, status_filter=None):
         """
-        获取URL列表
+        获取经过校验和解析的URL表（向量化处理，不逐行遍历）
         
         Args:
             status_filter: 状态过滤条件，如['pending', 'failed']
             
         Returns:
-            list: URL列表，每个元素为(index, url, bucket)元组
+            DataFrame: 以Excel行索引为索引，包含url、bucket、host、cos_path列
         """
         if self.df is None:
             logging.error("请先调用read_excel()方法读取Excel文件")
-            return []
+            return pd.DataFrame(columns=['url', 'bucket', 'host', 'cos_path'])
+        
+        return self.parse_url_frame(self.df, status_filter)
+    
+    def parse_url_frame(self, df, status_filter=None):
+        """
+        校验和解析清单数据中的URL（可用于整表或流式读取的数据块）
+        
+        Args:
+            df: 包含URL、状态和bucket列的DataFrame
+            status_filter: 状态过滤条件，如['pending', 'failed']
             
-        df_filtered = self.df.copy()
+        Returns:
+            DataFrame: 以Excel行索引为索引，包含url、bucket、host、cos_path列
+        """
+        df_filtered = df
         
         # 过滤空URL
         df_filtered = df_filtered[df_filtered[self.url_column].notna()]
@@ -84,19 +108,69 @@ class ExcelProcessor:
         # 状态过滤
         if status_filter:
             df_filtered = df_filtered[df_filtered[self.status_column].isin(status_filter)]
+        
+        urls = df_filtered[self.url_column].astype(str)
+        parts = urls.str.extract(self.URL_PATTERN)
+        valid = parts['netloc'].notna()
+        
+        for index, url in urls[~valid].items():
+            logging.warning(f"无效的URL (行{index+2}): {url}")
+        
+        # 处理bucket值，将NaN转换为None
+        if self.bucket_column in df_filtered.columns:
+            buckets = df_filtered[self.bucket_column]
+            buckets = buckets.astype(object).where(buckets.notna(), None)
+        else:
+            buckets = pd.Series(None, index=df_filtered.index, dtype=object)
+        
+        frame = pd.DataFrame({
+            'url': urls,
+            'bucket': buckets,
+            'host': parts['netloc'],
+            'cos_path': parts['path'].str.lstrip('/')
+        })[valid]
+        return frame
+    
+    def iter_chunks(self, chunk_size=None):
+        """
+        分块流式读取清单文件（xlsx/CSV/JSONL/Parquet，只读取URL、状态和bucket列），不在内存中保留整张表
+        
+        Args:
+            chunk_size: 每块的行数，如果为None则使用配置文件中的设置
             
-        urls = []
-        for index, row in df_filtered.iterrows():
-            url = row[self.url_column]
-            # 处理bucket值，将NaN转换为None
-            bucket = row.get(self.bucket_column, None) if self.bucket_column in row else None
-            if pd.isna(bucket):
-                bucket = None
-            if self.is_valid_url(url):
-                urls.append((index, url, bucket))
-            else:
-                logging.warning(f"无效的URL (行{index+2}): {url}")
-                
+        Yields:
+            DataFrame: 数据块，缺少的状态列和bucket列使用默认值填充
+        """
+        if not os.path.exists(self.excel_path):
+            raise FileNotFoundError(f"Excel文件不存在: {self.excel_path}")
+        
+        columns = [self.url_column, self.status_column, self.bucket_column]
+        for chunk in iter_manifest_chunks(self.excel_path, columns, chunk_size):
+            if self.url_column not in chunk.columns:
+                raise ValueError(f"Excel文件中未找到URL列: {self.url_column}")
+            if self.status_column not in chunk.columns:
+                chunk[self.status_column] = 'pending'
+            if self.bucket_column not in chunk.columns:
+                chunk[self.bucket_column] = None
+            yield chunk
+    
+    def get_urls(self, status_filter=None):
+        """
+        获取URL列表
+        
+        Args:
+            status_filter: 状态过滤条件，如['pending', 'failed']
+            
+        Returns:
+            list: URL列表，每个元素为(index, url, bucket)元组
+        """
+        if self.df is None:
+            logging.error("请先调用read_excel()方法读取Excel文件")
+            return []
+        
+        frame = self.get_url_frame(status_filter)
+        urls = list(zip(frame.index, frame['url'], frame['bucket']))
+        
         logging.info(f"获取到{len(urls)}个有效URL")
         return urls
     
@@ -140,9 +214,10 @@ class ExcelProcessor:
             return
             
         try:
-            self.df.at[index, self.status_column] = status
-            if error_msg and 'error_msg' in self.df.columns:
-                self.df.at[index, 'error_msg'] = error_msg
+            with self._lock:
+                self.df.at[index, self.status_column] = status
+                if error_msg and 'error_msg' in self.df.columns:
+                    self.df.at[index, 'error_msg'] = error_msg
         except Exception as e:
             logging.error(f"更新状态失败: {e}")
     
@@ -158,7 +233,10 @@ class ExcelProcessor:
             
         try:
             save_path = output_path or self.excel_path
-            self.df.to_excel(save_path, index=False, engine='openpyxl')
+            if manifest_format(save_path) in ('.xlsx', '.xls'):
+                self.df.to_excel(save_path, index=False, engine='openpyxl')
+            else:
+                write_manifest(self.df, save_path)
             logging.info(f"Excel文件已保存: {save_path}")
             return True
         except Exception as e:
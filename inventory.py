@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""
+对象清单模块 - 通过批量列举构建内存索引，替代逐个对象的存在性检查
+"""
+import bisect
+import hashlib
+import logging
+import math
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from config import INVENTORY_CONFIG
+
+
+def group_prefixes(keys, depth=None):
+    """
+    将对象key归并为少量需要列举的前缀
+    
+    Args:
+        keys: 对象key的可迭代对象
+        depth: 前缀目录深度，如果为None则使用配置文件中的设置
+        
+    Returns:
+        list: 排序后的前缀列表，互不包含
+    """
+    depth = depth or INVENTORY_CONFIG['prefix_depth']
+    prefixes = set()
+    for key in keys:
+        parts = key.split('/')
+        if len(parts) > depth:
+            prefixes.add('/'.join(parts[:depth]) + '/')
+        elif len(parts) > 1:
+            prefixes.add('/'.join(parts[:-1]) + '/')
+        else:
+            # 根目录下的对象直接以key本身作为前缀，避免列举整个bucket
+            prefixes.add(key)
+    
+    # 去除被更短前缀覆盖的前缀（排序后以同一前缀开头的字符串相邻）
+    result = []
+    for prefix in sorted(prefixes):
+        if result and prefix.startswith(result[-1]):
+            continue
+        result.append(prefix)
+    return result
+
+
+def is_covered(prefixes, key):
+    """
+    检查key是否落在已列举的前缀范围内
+    
+    Args:
+        prefixes: group_prefixes() 返回的排序前缀列表
+        key: 对象key
+        
+    Returns:
+        bool: 是否被覆盖
+    """
+    pos = bisect.bisect_right(prefixes, key)
+    return pos > 0 and key.startswith(prefixes[pos - 1])
+
+
+class BloomFilter:
+    """布隆过滤器，用于超大bucket的低内存存在性判断"""
+    
+    def __init__(self, capacity, error_rate=0.001):
+        """
+        初始化布隆过滤器
+        
+        Args:
+            capacity: 预计元素数量
+            error_rate: 期望的误判率
+        """
+        capacity = max(capacity, 1)
+        self.num_bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.num_bits + 7) // 8)
+    
+    def _positions(self, item):
+        """双重哈希计算各个比特位置"""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+    
+    def add(self, item):
+        """添加元素"""
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+    
+    def __contains__(self, item):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class ObjectInventory:
+    """
+    对象清单基类
+    
+    对清单中每个命名空间（bucket或COS配置）的公共前缀执行一次列举，
+    在本地回答"对象是否存在"及其元数据，替代逐个对象的HEAD/stat请求。
+    """
+    
+    label = '对象清单'
+    
+    def __init__(self, prefix_depth=None, max_workers=5):
+        """
+        初始化对象清单
+        
+        Args:
+            prefix_depth: 前缀目录深度，如果为None则使用配置文件中的设置
+            max_workers: 并发列举的线程数
+        """
+        self.prefix_depth = prefix_depth or INVENTORY_CONFIG['prefix_depth']
+        self.max_workers = max(max_workers, 1)
+        
+        self._indexes = {}    # 命名空间 -> dict 或 BloomFilter
+        self._prefixes = {}   # 命名空间 -> 已成功列举的前缀列表
+        self._lock = threading.Lock()
+    
+    def _new_index(self):
+        """创建单个命名空间的索引"""
+        return {}
+    
+    def _namespace_exists(self, namespace):
+        """检查命名空间是否存在，不存在时其中的对象都确定不存在"""
+        return True
+    
+    def _iter_listing(self, namespace, prefix):
+        """列举命名空间中指定前缀的对象，返回(key, 元数据)迭代器"""
+        raise NotImplementedError
+    
+    def _make_entry(self, meta):
+        """将列举得到的元数据转换为索引条目"""
+        return meta
+    
+    def build(self, targets):
+        """
+        列举对象并建立索引
+        
+        Args:
+            targets: (命名空间, key) 元组的可迭代对象
+        """
+        keys_by_namespace = {}
+        for namespace, key in targets:
+            keys_by_namespace.setdefault(namespace, set()).add(key)
+        
+        self.build_prefixes({
+            namespace: group_prefixes(keys, self.prefix_depth)
+            for namespace, keys in keys_by_namespace.items()
+        })
+    
+    def build_prefixes(self, prefixes_by_namespace):
+        """
+        列举指定前缀并建立索引（按前缀迁移时不需要逐个对象的key）
+        
+        Args:
+            prefixes_by_namespace: 命名空间 -> 前缀列表
+        """
+        tasks = []
+        for namespace, prefixes in prefixes_by_namespace.items():
+            self._indexes[namespace] = self._new_index()
+            self._prefixes[namespace] = []
+            try:
+                if not self._namespace_exists(namespace):
+                    self._prefixes[namespace].append('')
+                    continue
+            except Exception as e:
+                logging.warning(f"检查{self.label}失败，将回退到逐个检查: {namespace}, 错误: {e}")
+                continue
+            for prefix in prefixes:
+                tasks.append((namespace, prefix))
+        
+        logging.info(f"开始预扫描{self.label}: {len(prefixes_by_namespace)}个命名空间, {len(tasks)}个前缀")
+        
+        total = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for namespace, prefix, count in executor.map(lambda task: self._scan_prefix(*task), tasks):
+                if count is None:
+                    continue
+                total += count
+                self._prefixes[namespace].append(prefix)
+        
+        for namespace in self._prefixes:
+            self._prefixes[namespace].sort()
+        
+        logging.info(f"{self.label}预扫描完成: 共索引{total}个对象")
+    
+    def _scan_prefix(self, namespace, prefix):
+        """列举单个前缀，返回(命名空间, 前缀, 对象数)，失败时对象数为None"""
+        try:
+            count = 0
+            for key, meta in self._iter_listing(namespace, prefix):
+                self.add(namespace, key, meta)
+                count += 1
+            logging.debug(f"列举完成: {namespace}/{prefix} ({count}个对象)")
+            return namespace, prefix, count
+        except Exception as e:
+            logging.warning(f"列举{self.label}前缀失败，将回退到逐个检查: {namespace}/{prefix}, 错误: {e}")
+            return namespace, prefix, None
+    
+    def add(self, namespace, key, meta=None):
+        """
+        向索引中添加对象（列举结果或本次运行中新迁移的对象）
+        
+        Args:
+            namespace: 命名空间
+            key: 对象key
+            meta: 对象元数据
+        """
+        index = self._indexes.get(namespace)
+        if index is None:
+            return
+        with self._lock:
+            index[key] = self._make_entry(meta)
+    
+    def contains(self, namespace, key):
+        """
+        在本地索引中检查对象是否存在
+        
+        Args:
+            namespace: 命名空间
+            key: 对象key
+            
+        Returns:
+            bool: True表示确定存在，False表示确定不存在；
+                  None表示无法确定（未列举的前缀），需要回退到逐个检查
+        """
+        index = self._indexes.get(namespace)
+        if index is None or not is_covered(self._prefixes.get(namespace, []), key):
+            return None
+        return key in index
+    
+    def lookup(self, namespace, key):
+        """
+        获取索引中的对象元数据
+        
+        Returns:
+            索引条目，不存在或未知时返回None
+        """
+        index = self._indexes.get(namespace)
+        if index is None:
+            return None
+        return index.get(key)
+
+
+def user_metadata(headers):
+    """
+    从列举结果或响应头中提取用户元数据
+    
+    Args:
+        headers: MinIO列举结果的metadata或HEAD/stat响应头
+        
+    Returns:
+        dict: 去掉x-amz-meta-前缀、小写的用户元数据
+    """
+    metadata = {}
+    for key, value in (headers or {}).items():
+        key = key.lower()
+        if key.startswith('x-amz-meta-'):
+            metadata[key[len('x-amz-meta-'):]] = value
+    return metadata
+
+
+# 目标端索引条目（last_modified和用户元数据只在增量同步时使用）
+DestinationObject = namedtuple('DestinationObject', ['size', 'etag', 'last_modified', 'metadata'],
+                               defaults=[None, None])
+
+# 源端索引条目
+SourceObject = namedtuple('SourceObject', ['size', 'etag', 'last_modified'])
+
+
+class DestinationInventory(ObjectInventory):
+    """
+    MinIO目标端对象清单
+    
+    exact模式保存 key -> (size, etag)；bloom模式只保存布隆过滤器，命中时需再次确认。
+    增量同步时同时保存修改时间和用户元数据（列举时附带include_user_meta）。
+    """
+    
+    label = 'MinIO目标端'
+    
+    def __init__(self, uploader, mode=None, prefix_depth=None, max_workers=5, include_metadata=False):
+        """
+        初始化目标端清单
+        
+        Args:
+            uploader: MinIOUploader实例
+            mode: 索引模式，'exact' 或 'bloom'，如果为None则使用配置文件中的设置
+            prefix_depth: 前缀目录深度
+            max_workers: 并发列举的线程数
+            include_metadata: 是否保存修改时间和用户元数据（只支持exact模式）
+        """
+        super().__init__(prefix_depth=prefix_depth, max_workers=max_workers)
+        self.uploader = uploader
+        self.mode = mode or INVENTORY_CONFIG['dest_mode']
+        self.include_metadata = include_metadata
+        
+        if self.mode not in ('exact', 'bloom'):
+            raise ValueError(f"不支持的清单模式: {self.mode}")
+        if include_metadata and self.mode != 'exact':
+            raise ValueError("保存对象元数据需要exact清单模式")
+    
+    def _new_index(self):
+        if self.mode == 'bloom':
+            return BloomFilter(INVENTORY_CONFIG['bloom_capacity'], INVENTORY_CONFIG['bloom_error_rate'])
+        return {}
+    
+    def _namespace_exists(self, bucket):
+        return self.uploader.client.bucket_exists(bucket)
+    
+    def _iter_listing(self, bucket, prefix):
+        if self.include_metadata:
+            for obj in self.uploader.iter_objects(bucket, prefix=prefix, include_user_meta=True):
+                yield obj.object_name, (obj.size, obj.etag, obj.last_modified, obj.metadata)
+            return
+        for obj in self.uploader.iter_objects(bucket, prefix=prefix):
+            yield obj.object_name, (obj.size, obj.etag)
+    
+    def _make_entry(self, meta):
+        if isinstance(meta, DestinationObject):
+            return meta
+        size, etag, *extra = meta or (None, None)
+        if not self.include_metadata:
+            return DestinationObject(size, etag.strip('"') if etag else etag)
+        last_modified, metadata = extra or (None, None)
+        return DestinationObject(
+            size,
+            etag.strip('"') if etag else etag,
+            last_modified,
+            user_metadata(metadata)
+        )
+    
+    def add(self, bucket, key, meta=None):
+        if self.mode == 'bloom':
+            index = self._indexes.get(bucket)
+            if index is not None:
+                with self._lock:
+                    index.add(key)
+            return
+        super().add(bucket, key, meta)
+    
+    def contains(self, bucket, key):
+        exists = super().contains(bucket, key)
+        # 布隆过滤器命中可能是误判，交给调用方用stat确认
+        if self.mode == 'bloom' and exists:
+            return None
+        return exists
+    
+    def lookup(self, bucket, key):
+        if self.mode == 'bloom':
+            return None
+        return super().lookup(bucket, key)
+
+
+class SourceInventory(ObjectInventory):
+    """
+    COS源端对象清单
+    
+    按COS配置分组，对公共前缀分页列举（MaxKeys=1000），缓存 key -> (size, etag, last_modified)。
+    """
+    
+    label = 'COS源端'
+    
+    def __init__(self, downloader, prefix_depth=None, max_workers=5):
+        """
+        初始化源端清单
+        
+        Args:
+            downloader: COSDownloader实例
+            prefix_depth: 前缀目录深度
+            max_workers: 并发列举的线程数
+        """
+        super().__init__(prefix_depth=prefix_depth, max_workers=max_workers)
+        self.downloader = downloader
+        self._handles = {}
+    
+    def build(self, targets):
+        """
+        列举COS源端对象并建立索引
+        
+        Args:
+            targets: (COSHandle, key) 元组的可迭代对象
+        """
+        config_targets = []
+        for handle, key in targets:
+            self._handles[handle.config_name] = handle
+            config_targets.append((handle.config_name, key))
+        super().build(config_targets)
+    
+    def _iter_listing(self, config_name, prefix):
+        handle = self._handles[config_name]
+        for obj in self.downloader.iter_objects(prefix=prefix, handle=handle):
+            yield obj['Key'], obj
+    
+    def _make_entry(self, obj):
+        obj = obj or {}
+        size = obj.get('Size')
+        return SourceObject(
+            int(size) if size is not None else None,
+            obj.get('ETag', '').strip('"'),
+            obj.get('LastModified', '')
+        )
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+前缀列举模块 - 不使用清单，按COS前缀分页列举对象并直接送入迁移流水线
+
+大bucket按Delimiter逐层发现子前缀，各子前缀由线程池并行列举；
+列举结果经有界队列逐个产出，第一页列举完成即可开始迁移，不需要等待整个前缀列举结束。
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import LISTING_CONFIG
+
+
+# 列举结束标记
+_DONE = object()
+
+
+class PrefixLister:
+    """
+    并行分区列举器
+    
+    从起始前缀开始以Delimiter='/'逐层列举：当前层的对象直接产出，发现的子前缀提交到线程池并行列举；
+    超过fanout_depth层的子前缀不再拆分，直接递归分页列举。列举失败的前缀记录在failed_prefixes中。
+    """
+    
+    def __init__(self, downloader, handle, prefix='', max_workers=None, fanout_depth=None, queue_size=None):
+        """
+        初始化列举器
+        
+        Args:
+            downloader: COSDownloader实例
+            handle: COS客户端句柄
+            prefix: 起始前缀，为空时列举整个bucket
+            max_workers: 并行列举的线程数，如果为None则使用配置文件中的设置
+            fanout_depth: 按Delimiter拆分子前缀的最大层数，如果为None则使用配置文件中的设置
+            queue_size: 等待迁移的对象数上限，如果为None则使用配置文件中的设置
+        """
+        self.downloader = downloader
+        self.handle = handle
+        self.prefix = prefix or ''
+        self.max_workers = max(max_workers or LISTING_CONFIG['workers'], 1)
+        self.fanout_depth = LISTING_CONFIG['fanout_depth'] if fanout_depth is None else fanout_depth
+        self.queue_size = queue_size or LISTING_CONFIG['queue_size']
+        
+        self.listed = 0
+        self.prefixes = 0
+        self.failed_prefixes = []
+        
+        self._queue = None
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+    
+    def __iter__(self):
+        """
+        边列举边产出对象
+        
+        Yields:
+            dict: 对象信息（Key、Size、ETag、LastModified等）
+        """
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='cos-lister')
+        logging.info(f"开始列举COS前缀: {self.handle.bucket}/{self.prefix}（并行{self.max_workers}，"
+                     f"拆分{self.fanout_depth}层子前缀）")
+        self._submit(self.prefix, 0)
+        
+        try:
+            while True:
+                obj = self._queue.get()
+                if obj is _DONE:
+                    break
+                yield obj
+        finally:
+            # 迭代提前结束时停止列举，阻塞在队列上的列举线程随之退出
+            self._stop.set()
+            self._executor.shutdown(wait=False)
+        
+        logging.info(f"列举完成: {self.handle.bucket}/{self.prefix}，共{self.listed}个对象，{self.prefixes}个前缀")
+        if self.failed_prefixes:
+            logging.error(f"{len(self.failed_prefixes)}个前缀列举失败，其中的对象未迁移: "
+                          f"{', '.join(self.failed_prefixes[:10])}")
+    
+    def _submit(self, prefix, depth):
+        with self._lock:
+            self._pending += 1
+            self.prefixes += 1
+        try:
+            self._executor.submit(self._list_prefix, prefix, depth)
+        except RuntimeError:
+            # 迭代已结束，线程池已关闭
+            with self._lock:
+                self._pending -= 1
+    
+    def _put(self, obj):
+        """放入结果队列，队列满时等待（迁移停止后放弃）"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(obj, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _list_prefix(self, prefix, depth):
+        """列举单个前缀：未达到拆分层数时只列当前一层并提交子前缀，否则递归列举"""
+        try:
+            delimiter = '/' if depth < self.fanout_depth else ''
+            for entry in self.downloader.iter_objects(prefix, handle=self.handle, delimiter=delimiter):
+                if self._stop.is_set():
+                    return
+                if 'Key' not in entry:
+                    self._submit(entry['Prefix'], depth + 1)
+                    continue
+                # 目录占位对象（以/结尾且大小为0）不迁移
+                if entry['Key'].endswith('/') and int(entry.get('Size', 0)) == 0:
+                    continue
+                if not self._put(entry):
+                    return
+                with self._lock:
+                    self.listed += 1
+        except Exception as e:
+            logging.error(f"列举前缀失败: {self.handle.bucket}/{prefix}, 错误: {e}")
+            with self._lock:
+                self.failed_prefixes.append(prefix)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                finished = self._pending == 0
+            if finished:
+                self._put(_DONE)
@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""
+清单读写模块 - 分块流式读取迁移清单（xlsx/CSV/JSONL/Parquet），以追加方式写出迁移结果
+
+所有格式使用EXCEL_CONFIG中相同的url/status/buckets列名，内存占用与清单行数无关。
+"""
+import csv
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from config import EXCEL_CONFIG
+
+
+def _import_pyarrow():
+    """延迟导入pyarrow（仅Parquet格式需要）"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("读写Parquet格式需要pyarrow，请执行: pip install pyarrow")
+    return pyarrow
+
+
+def iter_excel_chunks(path, columns, chunk_size=None):
+    """
+    以只读模式逐行读取xlsx文件，按块返回DataFrame
+    
+    Args:
+        path: xlsx文件路径
+        columns: 需要读取的列名，表头中不存在的列会被忽略
+        chunk_size: 每块的行数，如果为None则使用配置文件中的设置
+        
+    Yields:
+        DataFrame: 只包含所需列的数据块，索引为数据行序号（与pandas.read_excel一致，从0开始）
+    """
+    if not path.endswith('.xlsx'):
+        raise ValueError("流式读取只支持.xlsx文件")
+    
+    chunk_size = chunk_size or EXCEL_CONFIG['chunk_size']
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        
+        positions = {name: header.index(name) for name in columns if name in header}
+        names = list(positions)
+        
+        offset = 0
+        buffer = []
+        for row in rows:
+            buffer.append(tuple(row[positions[name]] if positions[name] < len(row) else None for name in names))
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame.from_records(buffer, columns=names,
+                                                index=pd.RangeIndex(offset, offset + len(buffer)))
+                offset += len(buffer)
+                buffer = []
+        
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=names,
+                                            index=pd.RangeIndex(offset, offset + len(buffer)))
+        logging.info(f"流式读取完成: {path}, 共{offset + len(buffer)}行数据")
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(path, columns, chunk_size=None):
+    """
+    分块读取CSV文件
+    
+    Args:
+        path: CSV文件路径
+        columns: 需要读取的列名，表头中不存在的列会被忽略
+        chunk_size: 每块的行数
+        
+    Yields:
+        DataFrame: 只包含所需列的数据块，索引为数据行序号
+    """
+    reader = pd.read_csv(
+        path,
+        usecols=lambda name: name in columns,
+        dtype=object,
+        chunksize=chunk_size or EXCEL_CONFIG['chunk_size']
+    )
+    with reader:
+        yield from reader
+
+
+def iter_jsonl_chunks(path, columns, chunk_size=None):
+    """
+    分块读取JSON Lines文件（每行一个JSON对象）
+    
+    Args:
+        path: JSONL文件路径
+        columns: 需要读取的字段名，不存在的字段会被忽略
+        chunk_size: 每块的行数
+        
+    Yields:
+        DataFrame: 只包含所需列的数据块，索引为数据行序号
+    """
+    reader = pd.read_json(path, lines=True, dtype=False, chunksize=chunk_size or EXCEL_CONFIG['chunk_size'])
+    with reader:
+        for chunk in reader:
+            yield chunk[[name for name in columns if name in chunk.columns]]
+
+
+def iter_parquet_chunks(path, columns, chunk_size=None):
+    """
+    按记录批次读取Parquet文件（只读取所需的列）
+    
+    Args:
+        path: Parquet文件路径
+        columns: 需要读取的列名，不存在的列会被忽略
+        chunk_size: 每批的行数
+        
+    Yields:
+        DataFrame: 只包含所需列的数据块，索引为数据行序号
+    """
+    pyarrow = _import_pyarrow()
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    names = [name for name in columns if name in parquet_file.schema_arrow.names]
+    
+    offset = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_size or EXCEL_CONFIG['chunk_size'], columns=names):
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+# 清单扩展名 -> 分块读取函数
+MANIFEST_READERS = {
+    '.xlsx': iter_excel_chunks,
+    '.csv': iter_csv_chunks,
+    '.jsonl': iter_jsonl_chunks,
+    '.ndjson': iter_jsonl_chunks,
+    '.parquet': iter_parquet_chunks
+}
+
+
+def manifest_format(path):
+    """返回清单文件的扩展名（小写）"""
+    return os.path.splitext(path)[1].lower()
+
+
+def iter_manifest_chunks(path, columns, chunk_size=None):
+    """
+    按文件扩展名选择读取方式，分块读取清单
+    
+    Args:
+        path: 清单文件路径（.xlsx/.csv/.jsonl/.ndjson/.parquet）
+        columns: 需要读取的列名
+        chunk_size: 每块的行数
+        
+    Yields:
+        DataFrame: 数据块
+    """
+    reader = MANIFEST_READERS.get(manifest_format(path))
+    if reader is None:
+        raise ValueError(f"不支持流式读取的清单格式: {path}")
+    yield from reader(path, columns, chunk_size)
+
+
+def read_manifest(path):
+    """
+    一次性读取非Excel格式的清单
+    
+    Args:
+        path: 清单文件路径（.csv/.jsonl/.ndjson/.parquet）
+        
+    Returns:
+        DataFrame: 清单内容
+    """
+    fmt = manifest_format(path)
+    if fmt == '.csv':
+        return pd.read_csv(path, dtype=object)
+    if fmt in ('.jsonl', '.ndjson'):
+        return pd.read_json(path, lines=True, dtype=False)
+    if fmt == '.parquet':
+        _import_pyarrow()
+        return pd.read_parquet(path)
+    raise ValueError(f"不支持的清单格式: {path}")
+
+
+def write_manifest(df, path):
+    """
+    将清单写回非Excel格式的文件
+    
+    Args:
+        df: 清单内容
+        path: 输出路径（.csv/.jsonl/.ndjson/.parquet）
+    """
+    fmt = manifest_format(path)
+    if fmt == '.csv':
+        df.to_csv(path, index=False)
+    elif fmt in ('.jsonl', '.ndjson'):
+        df.to_json(path, orient='records', lines=True, force_ascii=False)
+    elif fmt == '.parquet':
+        _import_pyarrow()
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"不支持的清单格式: {path}")
+
+
+class ResultWriter:
+    """
+    迁移结果写出器基类
+    
+    结果以追加方式按批写出（每条包含行号、URL、bucket、状态、字节数、源端ETag、错误信息、重试次数、MinIO ETag和校验值），
+    不需要在内存中保留整张表，也不需要重写整个文件。
+    """
+    
+    def __init__(self, path, batch_size=1000):
+        """
+        初始化结果写出器
+        
+        Args:
+            path: 输出文件路径
+            batch_size: 缓冲多少条结果后写出
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.columns = [
+            'row', EXCEL_CONFIG['url_column'], EXCEL_CONFIG['bucket_column'],
+            EXCEL_CONFIG['status_column'], 'bytes', 'etag', 'error_msg', 'retries', 'dest_etag', 'checksum'
+        ]
+        self._buffer = []
+        self._lock = threading.Lock()
+    
+    def write(self, index, url, bucket, status, size=None, etag=None, error=None, retries=None,
+              dest_etag=None, checksum=None):
+        """
+        写入一行的迁移结果
+        
+        Args:
+            index: 清单中的行索引
+            url: COS文件URL
+            bucket: 目标MinIO bucket
+            status: 迁移状态
+            size: 字节数
+            etag: 源端ETag
+            error: 错误信息（重试后的最终失败原因）
+            retries: 重试次数
+            dest_etag: MinIO返回的ETag
+            checksum: 传输时计算的校验值
+        """
+        with self._lock:
+            self._buffer.append((int(index), url, bucket, status, size, etag, error, retries or 0,
+                                 dest_etag, checksum))
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+    
+    def flush(self):
+        """写出缓冲区中的所有结果"""
+        with self._lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        try:
+            self._write_batch(records)
+        except Exception as e:
+            logging.error(f"写入迁移结果失败: {self.path}, 错误: {e}")
+    
+    def _write_batch(self, records):
+        """写出一批结果"""
+        raise NotImplementedError
+    
+    def close(self):
+        """写出剩余结果并关闭文件"""
+        self.flush()
+
+
+class CSVResultWriter(ResultWriter):
+    """CSV格式结果写出器（追加写入，新文件时写表头）"""
+    
+    def _write_batch(self, records):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(self.columns)
+            writer.writerows(records)
+
+
+class JSONLResultWriter(ResultWriter):
+    """JSON Lines格式结果写出器（追加写入）"""
+    
+    def _write_batch(self, records):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(dict(zip(self.columns, record)), ensure_ascii=False))
+                f.write('\n')
+
+
+class ParquetResultWriter(ResultWriter):
+    """
+    Parquet格式结果写出器（每批写为一个row group，关闭时写入文件尾）
+    
+    Parquet文件不能追加，文件已存在时（如恢复运行）写入同目录下带时间戳的新文件，之前的结果保持不变。
+    """
+    
+    def __init__(self, path, batch_size=10000):
+        if os.path.exists(path):
+            stem, ext = os.path.splitext(path)
+            stem = f"{stem}-{datetime.now():%Y%m%d_%H%M%S}"
+            run_path, sequence = stem + ext, 1
+            while os.path.exists(run_path):
+                run_path, sequence = f"{stem}-{sequence}{ext}", sequence + 1
+            logging.info(f"结果文件已存在，本次运行的结果写入: {run_path}")
+            path = run_path
+        super().__init__(path, batch_size)
+        pyarrow = _import_pyarrow()
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([
+            ('row', pyarrow.int64()),
+            (self.columns[1], pyarrow.string()),
+            (self.columns[2], pyarrow.string()),
+            (self.columns[3], pyarrow.string()),
+            ('bytes', pyarrow.int64()),
+            ('etag', pyarrow.string()),
+            ('error_msg', pyarrow.string()),
+            ('retries', pyarrow.int64()),
+            ('dest_etag', pyarrow.string()),
+            ('checksum', pyarrow.string())
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+    
+    def _write_batch(self, records):
+        columns = list(zip(*records))
+        self._writer.write_table(self._pa.Table.from_arrays(
+            [self._pa.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+            schema=self._schema
+        ))
+    
+    def close(self):
+        super().close()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+# 结果文件扩展名 -> 写出器
+RESULT_WRITERS = {
+    '.csv': CSVResultWriter,
+    '.jsonl': JSONLResultWriter,
+    '.ndjson': JSONLResultWriter,
+    '.parquet': ParquetResultWriter
+}
+
+
+def open_result_writer(path):
+    """
+    按文件扩展名创建结果写出器
+    
+    Args:
+        path: 输出文件路径（.csv/.jsonl/.ndjson/.parquet）
+        
+    Returns:
+        ResultWriter: 结果写出器
+    """
+    writer_class = RESULT_WRITERS.get(manifest_format(path))
+    if writer_class is None:
+        raise ValueError(f"不支持的结果文件格式: {path}")
+    return writer_class(path)
+
+
+def result_files(path):
+    """
+    结果文件及恢复运行时写入的带时间戳的同名文件（如results-20240101_120000.parquet）
+    
+    Args:
+        path: --result-output指定的结果文件路径
+        
+    Returns:
+        list: 已存在的结果文件路径
+    """
+    stem, ext = os.path.splitext(path)
+    pattern = re.compile(re.escape(os.path.basename(stem)) + r'-\d{8}_\d{6}(-\d+)?' + re.escape(ext) + '$')
+    directory = os.path.dirname(path) or '.'
+    paths = [path] if os.path.exists(path) else []
+    if os.path.isdir(directory):
+        paths += sorted(os.path.join(directory, name) for name in os.listdir(directory) if pattern.match(name))
+    return paths
+
+
+def read_finished_rows(path, exclude=None):
+    """
+    从已有的结果文件中读取已完成的行号（未启用状态日志时，恢复迁移以结果文件为准，清单不会写回）
+    
+    Args:
+        path: --result-output指定的结果文件路径
+        exclude: 不读取的文件（本次运行新建的Parquet结果文件）
+        
+    Returns:
+        set: 状态为success或skipped的行号
+    """
+    status_column = EXCEL_CONFIG['status_column']
+    finished = set()
+    for result_path in result_files(path):
+        if exclude and os.path.abspath(result_path) == os.path.abspath(exclude):
+            continue
+        try:
+            for chunk in iter_manifest_chunks(result_path, ['row', status_column]):
+                done = chunk[chunk[status_column].isin(['success', 'skipped'])]
+                finished.update(int(row) for row in done['row'])
+        except Exception as e:
+            logging.warning(f"读取结果文件失败: {result_path}, 错误: {e}")
+    return finished
+
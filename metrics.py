@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+监控指标模块 - 线程安全的迁移统计、各阶段耗时直方图，以及Prometheus格式的本地HTTP指标接口
+
+阶段耗时按源端HEAD、目标端stat、下载、上传、流式传输和清理分别统计，
+通过直方图和进行中的任务数即可在运行中找出最慢的阶段。
+"""
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS_CONFIG
+
+
+class MigrationStats(dict):
+    """
+    迁移统计
+    
+    读取方式与普通字典相同；多个线程同时累加时通过add()在锁内完成，避免计数丢失。
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+    
+    def add(self, key, amount=1):
+        """
+        累加统计值
+        
+        Args:
+            key: 统计项
+            amount: 增加的数量
+        """
+        with self._lock:
+            self[key] = self.get(key, 0) + amount
+    
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+
+class Histogram:
+    """累积直方图（调用方负责加锁）"""
+    
+    def __init__(self, buckets):
+        """
+        初始化直方图
+        
+        Args:
+            buckets: 桶上限（升序）
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        """记录一个样本"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def cumulative(self):
+        """
+        各桶的累积样本数
+        
+        Returns:
+            list: [(桶上限, 累积样本数)]，最后一项的上限为'+Inf'
+        """
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class MigrationMetrics:
+    """
+    迁移监控指标
+    
+    stage()统计各阶段的耗时和进行中的数量，error()按错误类别计数，
+    transferred()记录完成传输的字节数用于计算近期吞吐。
+    """
+    
+    def __init__(self, stats, buckets=None, window=None):
+        """
+        初始化监控指标
+        
+        Args:
+            stats: MigrationStats实例（对象数、字节数等计数）
+            buckets: 耗时直方图的桶上限（秒），如果为None则使用配置文件中的设置
+            window: 计算近期吞吐的时间窗口（秒），如果为None则使用配置文件中的设置
+        """
+        self.stats = stats
+        self.buckets = tuple(buckets or METRICS_CONFIG['buckets'])
+        self.window = window or METRICS_CONFIG['window']
+        self.started = time.monotonic()
+        
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._in_flight = {}
+        self._errors = {}
+        self._transfers = deque()
+        self._gauges = {}
+        
+        # --profile模式下的TraceWriter，各阶段结束时同时写出跨度
+        self.tracer = None
+    
+    @contextmanager
+    def stage(self, name, result=None):
+        """
+        统计一个阶段的耗时
+        
+        Args:
+            name: 阶段名称（source_head、dest_stat、download、upload、stream、copy、cleanup、object）
+            result: 迁移结果，指定时把耗时累加到result['timings']（多进程时由父进程汇总）
+        """
+        with self._lock:
+            self._in_flight[name] = self._in_flight.get(name, 0) + 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight[name] -= 1
+            self.record(name, time.monotonic() - started, result)
+    
+    def record(self, name, elapsed, result=None):
+        """
+        记录一个阶段的耗时（由调用方自行计时，如异步引擎中跨越多个await的整个任务）
+        
+        Args:
+            name: 阶段名称
+            elapsed: 耗时（秒）
+            result: 迁移结果，指定时把耗时累加到result['timings']
+        """
+        with self._lock:
+            self._observe_locked(name, elapsed)
+        if result is not None:
+            timings = result.setdefault('timings', {})
+            timings[name] = timings.get(name, 0.0) + elapsed
+        if self.tracer is not None:
+            self.tracer.span(name, elapsed, result)
+    
+    def _observe_locked(self, name, elapsed):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = Histogram(self.buckets)
+        histogram.observe(elapsed)
+    
+    def observe_timings(self, timings):
+        """
+        汇总工作进程回传的阶段耗时
+        
+        Args:
+            timings: 阶段名称 -> 耗时（秒）
+        """
+        if not timings:
+            return
+        with self._lock:
+            for name, elapsed in timings.items():
+                self._observe_locked(name, elapsed)
+    
+    def error(self, category):
+        """
+        按类别记录一次错误
+        
+        Args:
+            category: 错误类别（throttled、retryable、permanent）
+        """
+        with self._lock:
+            self._errors[category] = self._errors.get(category, 0) + 1
+    
+    def transferred(self, size):
+        """记录完成传输的字节数（用于计算近期吞吐）"""
+        now = time.monotonic()
+        with self._lock:
+            self._transfers.append((now, size or 0))
+            self._trim_locked(now)
+    
+    def _trim_locked(self, now):
+        while self._transfers and self._transfers[0][0] < now - self.window:
+            self._transfers.popleft()
+    
+    def throughput(self):
+        """近期吞吐（字节/秒）"""
+        now = time.monotonic()
+        with self._lock:
+            self._trim_locked(now)
+            total = sum(size for _, size in self._transfers)
+        return total / min(self.window, max(now - self.started, 1e-9))
+    
+    def register_gauge(self, name, help_text, func):
+        """
+        注册一个按需取值的指标（如自适应并发的当前上限）
+        
+        Args:
+            name: 指标名称（不含前缀）
+            help_text: 指标说明
+            func: 返回当前值的函数
+        """
+        self._gauges[name] = (help_text, func)
+    
+    def render(self):
+        """
+        生成Prometheus文本格式的指标
+        
+        Returns:
+            str: 指标文本
+        """
+        lines = []
+        
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP cos2minio_{name} {help_text}")
+            lines.append(f"# TYPE cos2minio_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{val}"' for key, val in labels)
+                lines.append(f"cos2minio_{name}{{{label_text}}} {value}" if label_text
+                             else f"cos2minio_{name} {value}")
+        
+        stats = dict(self.stats)
+        with self._lock:
+            in_flight = dict(self._in_flight)
+            errors = dict(self._errors)
+            histograms = {name: (h.cumulative(), h.sum, h.count) for name, h in self._histograms.items()}
+        
+        metric('objects_planned', 'gauge', '计划迁移的对象数', [((), stats.get('total', 0))])
+        metric('objects_total', 'counter', '已完成的对象数',
+               [((('status', status),), stats.get(status, 0)) for status in ('success', 'skipped', 'failed')])
+        metric('retries_total', 'counter', '放入重试队列的次数', [((), stats.get('retried', 0))])
+        metric('bytes_total', 'counter', '已传输的字节数', [((), stats.get('bytes', 0))])
+        metric('throughput_bytes_per_second', 'gauge', f'最近{self.window:g}秒的传输速率（字节/秒）',
+               [((), f"{self.throughput():.1f}")])
+        metric('in_flight', 'gauge', '各阶段进行中的数量',
+               [((('stage', name),), count) for name, count in sorted(in_flight.items())])
+        metric('errors_total', 'counter', '按类别统计的错误次数',
+               [((('class', category),), count) for category, count in sorted(errors.items())])
+        
+        lines.append("# HELP cos2minio_stage_duration_seconds 各阶段耗时（秒）")
+        lines.append("# TYPE cos2minio_stage_duration_seconds histogram")
+        for name, (cumulative, total, count) in sorted(histograms.items()):
+            for bound, value in cumulative:
+                lines.append(f'cos2minio_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {value}')
+            lines.append(f'cos2minio_stage_duration_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'cos2minio_stage_duration_seconds_count{{stage="{name}"}} {count}')
+        
+        for name, (help_text, func) in sorted(self._gauges.items()):
+            metric(name, 'gauge', help_text, [((), func())])
+        metric('uptime_seconds', 'gauge', '运行时间（秒）', [((), f"{time.monotonic() - self.started:.1f}")])
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Prometheus格式的本地HTTP指标接口（GET /metrics）"""
+    
+    def __init__(self, metrics, port, host=None):
+        """
+        初始化指标接口
+        
+        Args:
+            metrics: MigrationMetrics实例
+            port: 监听端口
+            host: 监听地址，如果为None则使用配置文件中的设置（默认只监听本机）
+        """
+        self.metrics = metrics
+        self.host = host or METRICS_CONFIG['host']
+        self.port = port
+        self._server = None
+        self._thread = None
+    
+    def start(self):
+        """在后台线程中启动HTTP服务"""
+        metrics = self.metrics
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                logging.debug(f"指标请求: {format % args}")
+        
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+        logging.info(f"监控指标接口: http://{self.host}:{self._server.server_port}/metrics")
+    
+    def close(self):
+        """停止HTTP服务"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -4,22 +4,27 @@ MinIO上传模块 - 上传文件到MinIO服务器
 """
 import os
 import logging
+import threading
 from minio import Minio
+from minio.commonconfig import REPLACE, CopySource
 from minio.error import S3Error
-from config import MINIO_CONFIG
+from config import MINIO_CONFIG, TRANSFER_CONFIG
+from rate_limiter import LimitedReader
 
 
 class MinIOUploader:
     """MinIO上传器"""
     
-    def __init__(self, config=None):
+    def __init__(self, config=None, rate_limits=None):
         """
         初始化MinIO上传器
         
         Args:
             config: MinIO配置字典，如果为None则使用默认配置
+            rate_limits: RateLimiterRegistry实例，按endpoint和bucket限制带宽和请求速率，为None时不限速
         """
         self.config = config or MINIO_CONFIG
+        self.rate_limits = rate_limits
         
         # 初始化MinIO客户端
         try:
@@ -31,6 +36,10 @@ class MinIOUploader:
             )
             self.bucket_name = self.config['bucket_name']  # 默认bucket
             
+            # 已确认存在的bucket，避免每次上传都调用bucket_exists
+            self._known_buckets = set()
+            self._bucket_lock = threading.Lock()
+            
             # 检查默认存储桶是否存在，如果不存在则创建
             self._ensure_bucket_exists(self.bucket_name)
             
@@ -41,19 +50,55 @@ class MinIOUploader:
             raise
     
     def _ensure_bucket_exists(self, bucket_name=None):
-        """确保存储桶存在"""
+        """确保存储桶存在（每个bucket只检查一次）"""
         bucket_name = bucket_name or self.bucket_name
-        try:
-            if not self.client.bucket_exists(bucket_name):
-                self.client.make_bucket(bucket_name)
-                logging.info(f"创建存储桶: {bucket_name}")
-            else:
-                logging.debug(f"存储桶已存在: {bucket_name}")
-        except S3Error as e:
-            logging.error(f"检查/创建存储桶失败: {e}")
-            raise
+        if bucket_name in self._known_buckets:
+            return
+        
+        with self._bucket_lock:
+            if bucket_name in self._known_buckets:
+                return
+            try:
+                if not self.client.bucket_exists(bucket_name):
+                    self.client.make_bucket(bucket_name)
+                    logging.info(f"创建存储桶: {bucket_name}")
+                else:
+                    logging.debug(f"存储桶已存在: {bucket_name}")
+                self._known_buckets.add(bucket_name)
+            except S3Error as e:
+                logging.error(f"检查/创建存储桶失败: {e}")
+                raise
+    
+    def _rate_limits(self, bucket_name, requests=1):
+        """
+        按请求数消耗目标bucket的请求速率令牌
+        
+        Args:
+            bucket_name: 目标bucket
+            requests: 本次操作的请求数
+            
+        Returns:
+            tuple: 限制带宽的RateLimit，未限制带宽时为空
+        """
+        if self.rate_limits is None:
+            return ()
+        limits = self.rate_limits.minio(bucket_name)
+        for limit in limits:
+            limit.request(requests)
+        return tuple(limit for limit in limits if limit.limits_bandwidth)
     
-    def upload_file(self, local_path, object_name, bucket_name=None):
+    def ensure_buckets(self, bucket_names):
+        """
+        批量确保存储桶存在，每个bucket只检查/创建一次
+        
+        Args:
+            bucket_names: bucket名称的可迭代对象
+        """
+        for bucket_name in sorted(set(bucket_names)):
+            self._ensure_bucket_exists(bucket_name)
+    
+    def upload_file(self, local_path, object_name, bucket_name=None, part_size=0, parallel=None,
+                    raise_errors=False, metadata=None):
         """
         上传文件到MinIO
         
@@ -61,9 +106,13 @@ class MinIOUploader:
             local_path: 本地文件路径
             object_name: MinIO中的对象名称
             bucket_name: 目标bucket名称，如果为None则使用默认bucket
+            part_size: 分片大小，为0时由SDK自动计算
+            parallel: 并发上传的分片数，如果为None则使用SDK默认值
+            raise_errors: 上传失败时是否抛出原始异常（供调用方识别限流等错误），默认返回False
+            metadata: 写入对象的用户元数据（如源端ETag）
             
         Returns:
-            bool: 上传是否成功
+            str: 上传成功返回MinIO的ETag，失败返回False
         """
         try:
             # 确定目标bucket
@@ -81,18 +130,167 @@ class MinIOUploader:
             logging.info(f"开始上传: {local_path} -> {object_name} ({file_size} bytes)")
             
             # 上传文件
-            result = self.client.fput_object(
+            upload_options = {}
+            if parallel:
+                upload_options['num_parallel_uploads'] = parallel
+            limits = self._rate_limits(target_bucket)
+            if limits:
+                # 限制带宽时以限速读取流上传，按写入的字节数限速
+                with open(local_path, 'rb') as f:
+                    result = self.client.put_object(
+                        bucket_name=target_bucket,
+                        object_name=object_name,
+                        data=LimitedReader(f, limits),
+                        length=file_size,
+                        content_type=content_type,
+                        metadata=metadata,
+                        part_size=part_size or 0,
+                        **upload_options
+                    )
+            else:
+                result = self.client.fput_object(
+                    bucket_name=target_bucket,
+                    object_name=object_name,
+                    file_path=local_path,
+                    content_type=content_type,
+                    metadata=metadata,
+                    part_size=part_size or 0,
+                    **upload_options
+                )
+            
+            logging.info(f"上传成功: {object_name}, ETag: {result.etag}")
+            return result.etag
+            
+        except Exception as e:
+            logging.error(f"上传文件失败: {local_path} -> {object_name}, 错误: {e}")
+            if raise_errors:
+                raise
+            return False
+
+    def calc_part_size(self, object_size, parallel=1):
+        """
+        根据对象大小计算分片大小
+        
+        分片大小按MiB对齐，保证分片数不超过S3上限，同时不超过内存缓冲上限。
+        并发上传时让每个并发线程至少分到若干个分片。
+        
+        Args:
+            object_size: 对象大小（字节）
+            parallel: 并发上传的分片数
+            
+        Returns:
+            int: 分片大小，对象过大无法在缓冲上限内完成时返回None
+        """
+        min_part_size = TRANSFER_CONFIG['min_part_size']
+        max_part_size = TRANSFER_CONFIG['max_part_size']
+        max_parts = TRANSFER_CONFIG['max_parts']
+        
+        mib = 1024 * 1024
+        part_size = -(-object_size // max_parts)  # 向上取整
+        if parallel > 1:
+            part_size = max(part_size, min(object_size // (parallel * 4), max_part_size))
+        part_size = -(-part_size // mib) * mib     # 按MiB对齐
+        part_size = max(part_size, min_part_size)
+        
+        if part_size > max_part_size:
+            return None
+        return part_size
+    
+    def upload_stream(self, stream, object_name, length, bucket_name=None, part_size=None, parallel=1,
+                      raise_errors=False, metadata=None):
+        """
+        从读取流直接上传到MinIO（不落盘）
+        
+        Args:
+            stream: 提供read()方法的读取流
+            object_name: MinIO中的对象名称
+            length: 流的总长度（字节）
+            bucket_name: 目标bucket名称，如果为None则使用默认bucket
+            part_size: 分片大小，如果为None则根据length自动计算
+            parallel: 并发上传的分片数，内存中最多缓冲 parallel + 1 个分片
+            raise_errors: 上传失败时是否抛出原始异常，默认返回False
+            metadata: 写入对象的用户元数据（如源端ETag）
+            
+        Returns:
+            str: 上传成功返回MinIO的ETag，失败返回False
+        """
+        try:
+            # 确定目标bucket
+            target_bucket = bucket_name or self.bucket_name
+            
+            # 确保bucket存在
+            self._ensure_bucket_exists(target_bucket)
+            
+            part_size = part_size or self.calc_part_size(length, parallel)
+            if part_size is None:
+                raise ValueError(f"对象过大，超出流式传输缓冲上限: {length} bytes")
+            
+            content_type = self._guess_content_type(object_name)
+            
+            logging.info(f"开始流式上传: {object_name} ({length} bytes, 分片: {part_size} bytes, 并发: {parallel})")
+            
+            limits = self._rate_limits(target_bucket)
+            if limits:
+                stream = LimitedReader(stream, limits)
+            
+            # 分片按顺序读取，默认单线程上传，内存占用不超过一个分片
+            result = self.client.put_object(
                 bucket_name=target_bucket,
                 object_name=object_name,
-                file_path=local_path,
-                content_type=content_type
+                data=stream,
+                length=length,
+                content_type=content_type,
+                metadata=metadata,
+                part_size=part_size,
+                num_parallel_uploads=max(parallel, 1)
             )
             
-            logging.info(f"上传成功: {object_name}, ETag: {result.etag}")
-            return True
+            logging.info(f"流式上传成功: {object_name}, ETag: {result.etag}")
+            return result.etag
             
         except Exception as e:
-            logging.error(f"上传文件失败: {local_path} -> {object_name}, 错误: {e}")
+            logging.error(f"流式上传失败: {object_name}, 错误: {e}")
+            if raise_errors:
+                raise
+            return False
+
+    def copy_object(self, source_bucket, source_object, object_name, bucket_name=None,
+                    raise_errors=False, metadata=None):
+        """
+        服务端复制MinIO中已有的对象（数据不经过本机，超过5GiB时SDK自动改为分片复制）
+        
+        Args:
+            source_bucket: 源对象所在的bucket
+            source_object: 源对象名称
+            object_name: 目标对象名称
+            bucket_name: 目标bucket名称，如果为None则使用默认bucket
+            raise_errors: 复制失败时是否抛出原始异常，默认返回False
+            metadata: 写入对象的用户元数据（如源端ETag），Content-Type按目标对象名称重新设置
+            
+        Returns:
+            str: 复制成功返回MinIO的ETag，失败返回False
+        """
+        try:
+            target_bucket = bucket_name or self.bucket_name
+            self._ensure_bucket_exists(target_bucket)
+            self._rate_limits(target_bucket)
+            
+            result = self.client.copy_object(
+                target_bucket,
+                object_name,
+                CopySource(source_bucket, source_object),
+                metadata=dict(metadata or {}, **{'Content-Type': self._guess_content_type(object_name)}),
+                metadata_directive=REPLACE
+            )
+            
+            logging.info(f"服务端复制成功: {source_bucket}/{source_object} -> {target_bucket}/{object_name}, "
+                         f"ETag: {result.etag}")
+            return result.etag
+            
+        except Exception as e:
+            logging.error(f"服务端复制失败: {source_bucket}/{source_object} -> {object_name}, 错误: {e}")
+            if raise_errors:
+                raise
             return False
 
     def check_object_exists(self, object_name, bucket_name=None):
@@ -108,6 +306,7 @@ class MinIOUploader:
         """
         try:
             target_bucket = bucket_name or self.bucket_name
+            self._rate_limits(target_bucket)
             self.client.stat_object(target_bucket, object_name)
             return True
         except Exception:
@@ -137,24 +336,45 @@ class MinIOUploader:
             logging.error(f"获取对象信息失败: {object_name}, 错误: {e}")
             return None
 
+    def stat_object(self, object_name, bucket_name=None):
+        """
+        获取对象的大小、ETag、修改时间和用户元数据（供增量同步比对）
+        
+        Args:
+            object_name: 对象名称
+            bucket_name: bucket名称，如果为None则使用默认bucket
+            
+        Returns:
+            minio Object: 对象信息，对象不存在返回None，其他错误抛出异常
+        """
+        target_bucket = bucket_name or self.bucket_name
+        self._rate_limits(target_bucket)
+        try:
+            return self.client.stat_object(target_bucket, object_name)
+        except S3Error as e:
+            if e.code in ('NoSuchKey', 'NoSuchObject', 'NoSuchBucket', 'ResourceNotFound'):
+                return None
+            raise
+    
     def _guess_content_type(self, file_path):
         """根据文件扩展名猜测内容类型"""
         import mimetypes
         content_type, _ = mimetypes.guess_type(file_path)
         return content_type or 'application/octet-stream'
     
-    def delete_object(self, object_name):
+    def delete_object(self, object_name, bucket_name=None):
         """
         删除对象
         
         Args:
             object_name: 对象名称
+            bucket_name: bucket名称，如果为None则使用默认bucket
             
         Returns:
             bool: 删除是否成功
         """
         try:
-            self.client.remove_object(self.bucket_name, object_name)
+            self.client.remove_object(bucket_name or self.bucket_name, object_name)
             logging.info(f"删除对象成功: {object_name}")
             return True
         except Exception as e:
@@ -187,6 +407,25 @@ class MinIOUploader:
             logging.error(f"列出对象失败: {e}")
             return []
     
+    def iter_objects(self, bucket_name=None, prefix='', recursive=True, include_user_meta=False):
+        """
+        逐个迭代列出对象（不一次性加载全部结果）
+        
+        Args:
+            bucket_name: bucket名称，如果为None则使用默认bucket
+            prefix: 前缀过滤
+            recursive: 是否递归列出
+            include_user_meta: 是否在列举结果中附带用户元数据（MinIO扩展）
+            
+        Returns:
+            generator: minio Object对象的迭代器，列举失败时抛出异常
+        """
+        target_bucket = bucket_name or self.bucket_name
+        if include_user_meta:
+            return self.client.list_objects(target_bucket, prefix=prefix, recursive=recursive,
+                                            include_user_meta=True)
+        return self.client.list_objects(target_bucket, prefix=prefix, recursive=recursive)
+    
     def generate_presigned_url(self, object_name, expires_in=3600):
         """
         生成预签名URL
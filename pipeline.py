@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+流水线模块 - 有界的生产者/消费者队列，任务按处理能力从清单中逐个取出
+
+生产者线程从任务来源中取任务放入有界队列，队列满时阻塞，背压一直传递到清单读取；
+内存占用只与并发数和队列长度有关，与清单行数无关。
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+
+# 队列结束标记
+_STOP = object()
+
+
+class BoundedPipeline:
+    """
+    有界流水线
+    
+    由一个或多个通道（lane）组成，每个通道有独立的有界队列和固定数量的工作线程；
+    任务完成回调在调用run()的线程中依次执行。
+    """
+    
+    def __init__(self, lanes, queue_size=None):
+        """
+        初始化流水线
+        
+        Args:
+            lanes: (通道名称, 工作线程数) 序列
+            queue_size: 每个通道的队列长度，如果为None则为该通道工作线程数的2倍
+        """
+        self.lanes = [(name, max(workers, 1)) for name, workers in lanes]
+        self.queue_size = queue_size
+    
+    def run(self, worker, sources, on_done):
+        """
+        执行所有任务（阻塞直到全部完成）
+        
+        Args:
+            worker: 执行单个任务的函数
+            sources: (任务可迭代对象, 路由) 序列，每个来源由一个生产者线程读取；
+                     路由为通道名称，或根据任务返回通道名称的函数
+            on_done: 任务完成回调，参数为(item, future)
+        """
+        queues = {
+            name: queue.Queue(maxsize=self.queue_size or workers * 2)
+            for name, workers in self.lanes
+        }
+        results = queue.Queue()
+        errors = []
+        
+        def consume(tasks):
+            try:
+                while True:
+                    item = tasks.get()
+                    if item is _STOP:
+                        return
+                    future = Future()
+                    try:
+                        future.set_result(worker(item))
+                    except BaseException as e:
+                        # SystemExit等非Exception异常同样交给完成回调，工作线程继续取任务
+                        future.set_exception(e)
+                    results.put((item, future))
+            finally:
+                # 无论工作线程因何退出都发送结束标记，否则run()会一直等待
+                results.put(_STOP)
+        
+        def produce(items, route):
+            try:
+                for item in items:
+                    queues[route(item) if callable(route) else route].put(item)
+            except Exception as e:
+                logging.error(f"读取迁移任务失败: {e}")
+                errors.append(e)
+        
+        consumers = []
+        for name, workers in self.lanes:
+            for i in range(workers):
+                thread = threading.Thread(target=consume, args=(queues[name],), name=f'{name}-{i}', daemon=True)
+                thread.start()
+                consumers.append(thread)
+        
+        producers = []
+        for items, route in sources:
+            thread = threading.Thread(target=produce, args=(items, route), name='producer', daemon=True)
+            thread.start()
+            producers.append(thread)
+        
+        # 所有生产者结束后通知各通道的工作线程退出
+        def close():
+            for thread in producers:
+                thread.join()
+            for name, workers in self.lanes:
+                for _ in range(workers):
+                    queues[name].put(_STOP)
+        
+        closer = threading.Thread(target=close, name='pipeline-closer', daemon=True)
+        closer.start()
+        
+        stopped = 0
+        while stopped < len(consumers):
+            message = results.get()
+            if message is _STOP:
+                stopped += 1
+                continue
+            on_done(*message)
+        
+        closer.join()
+        if errors:
+            raise errors[0]
+
+
+class ByteBudget:
+    """
+    字节预算
+    
+    暂存数据总量达到上限时阻塞申请方，直到其他任务释放空间；
+    单个对象超过上限时，只在没有其他暂存数据时放行，避免永久阻塞。
+    """
+    
+    def __init__(self, limit=None):
+        """
+        初始化字节预算
+        
+        Args:
+            limit: 字节上限，为None或0时不限制（只统计用量）
+        """
+        self.limit = limit or 0
+        self.used = 0
+        self.peak = 0
+        self._condition = threading.Condition()
+    
+    def acquire(self, size):
+        """
+        申请空间，超出预算时阻塞
+        
+        Args:
+            size: 字节数
+        """
+        with self._condition:
+            if self.limit:
+                while self.used > 0 and self.used + size > self.limit:
+                    self._condition.wait()
+            self.used += size
+            self.peak = max(self.peak, self.used)
+    
+    def release(self, size):
+        """
+        释放空间
+        
+        Args:
+            size: 字节数
+        """
+        if not size:
+            return
+        with self._condition:
+            self.used -= size
+            self._condition.notify_all()
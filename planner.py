@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+迁移计划模块 - 在执行迁移前完成校验、去重、源端配置解析和目标bucket创建
+"""
+import logging
+import zlib
+from collections import namedtuple
+from urllib.parse import urlparse
+
+
+# 单个迁移任务，duplicates为指向同一(源配置, COS路径, 目标bucket)的其他行索引，size为对象大小提示，
+# attempts为已重试的次数；source_info为列举或预扫描得到的源端信息（迁移时不再发送HEAD请求），
+# needs_transfer表示预扫描已确定目标端不存在或已过期（迁移时不再检查目标端）
+WorkItem = namedtuple('WorkItem', [
+    'index', 'url', 'cos_path', 'bucket_hint', 'target_bucket', 'config_name', 'duplicates', 'size', 'attempts',
+    'source_info', 'needs_transfer'
+], defaults=[None, 0, None, False])
+
+# 不可变的迁移计划
+MigrationPlan = namedtuple('MigrationPlan', ['items', 'total_rows', 'duplicate_rows'])
+
+
+def shard_of(key, shard_count):
+    """
+    计算key所属的分片（CRC32取模，与进程、主机和运行次数无关）
+    
+    Args:
+        key: 分片键（COS路径）
+        shard_count: 分片总数
+        
+    Returns:
+        int: 分片序号
+    """
+    return zlib.crc32(key.encode('utf-8')) % shard_count
+
+
+class MigrationPlanner:
+    """迁移计划生成器"""
+    
+    def __init__(self, excel_processor, cos_downloader, minio_uploader):
+        """
+        初始化计划生成器
+        
+        Args:
+            excel_processor: ExcelProcessor实例
+            cos_downloader: COSDownloader实例（用于解析COS源端配置）
+            minio_uploader: MinIOUploader实例（用于确定默认bucket并创建目标bucket）
+        """
+        self.excel_processor = excel_processor
+        self.cos_downloader = cos_downloader
+        self.minio_uploader = minio_uploader
+    
+    def resolve_config_name(self, host, bucket_hint=None):
+        """
+        解析COS源端配置名称，优先使用bucket hint，失败时回退到URL域名中的bucket
+        
+        Args:
+            host: URL域名
+            bucket_hint: 来自Excel的bucket名称提示
+            
+        Returns:
+            str: 配置名称，未找到返回None
+        """
+        registry = self.cos_downloader.registry
+        config_name = registry.find_config_name(bucket_hint)
+        if config_name is None and host:
+            config_name = registry.find_config_name(host.split('.')[0])
+        return config_name
+    
+    def plan(self, status_filter=None, shard_index=0, shard_count=1):
+        """
+        生成迁移计划
+        
+        Args:
+            status_filter: 状态过滤条件，如['pending', 'failed']
+            shard_index: 当前分片序号（多台主机分担同一份清单时使用）
+            shard_count: 分片总数，为1时不分片
+            
+        Returns:
+            MigrationPlan: 迁移计划
+        """
+        frame = self.excel_processor.get_url_frame(status_filter)
+        plan = self._plan_frame(frame, shard_index, shard_count)
+        
+        if plan.items:
+            logging.info(f"迁移计划: 共{plan.total_rows}行，去重后{len(plan.items)}个任务，"
+                         f"{len({item.target_bucket for item in plan.items})}个目标bucket")
+        return plan
+    
+    def plan_stream(self, chunks, status_filter=None, shard_index=0, shard_count=1):
+        """
+        按数据块流式生成迁移计划，不需要先读取整个清单
+        
+        块内的重复行合并为一个任务；跨块的重复行作为独立任务生成，
+        迁移时由目标端存在性检查跳过。
+        
+        Args:
+            chunks: 清单数据块的可迭代对象（如ExcelProcessor.iter_chunks()）
+            status_filter: 状态过滤条件，如['pending', 'failed']
+            shard_index: 当前分片序号
+            shard_count: 分片总数
+            
+        Yields:
+            MigrationPlan: 每个数据块的迁移计划
+        """
+        for chunk in chunks:
+            frame = self.excel_processor.parse_url_frame(chunk, status_filter)
+            plan = self._plan_frame(frame, shard_index, shard_count)
+            if plan.total_rows:
+                logging.debug(f"数据块迁移计划: 共{plan.total_rows}行，去重后{len(plan.items)}个任务")
+            yield plan
+    
+    def _plan_frame(self, frame, shard_index=0, shard_count=1):
+        """根据解析后的URL表生成迁移计划（分片、配置解析、去重、创建bucket）"""
+        # 按COS路径分片：同一路径的重复行总是落在同一分片
+        if shard_count > 1 and not frame.empty:
+            shards = frame['cos_path'].fillna('').map(lambda path: shard_of(path, shard_count))
+            frame = frame[shards == shard_index]
+            logging.debug(f"分片 {shard_index}/{shard_count}: 本分片共{len(frame)}行")
+        
+        if frame.empty:
+            return MigrationPlan((), 0, 0)
+        
+        default_bucket = self.minio_uploader.bucket_name
+        frame = frame.assign(
+            target_bucket=frame['bucket'].where(frame['bucket'].notna(), default_bucket)
+        )
+        
+        # 每个不同的(bucket hint, 域名)组合只解析一次
+        pairs = frame[['bucket', 'host']].drop_duplicates()
+        resolved = {
+            (hint, host): self.resolve_config_name(host, hint)
+            for hint, host in zip(pairs['bucket'], pairs['host'])
+        }
+        frame['config_name'] = [
+            resolved[(hint, host)] for hint, host in zip(frame['bucket'], frame['host'])
+        ]
+        
+        unresolved = frame['config_name'].isna()
+        if unresolved.any():
+            logging.warning(f"{int(unresolved.sum())}行未找到匹配的COS源存储桶配置")
+        
+        # 相同(源配置, COS路径, 目标bucket)只迁移一次，其余行共享结果
+        key_columns = ['config_name', 'cos_path', 'target_bucket']
+        duplicated = frame.duplicated(subset=key_columns, keep='first')
+        duplicates = {}
+        if duplicated.any():
+            first_index = frame.index.to_series().groupby(
+                [frame[column].fillna('') for column in key_columns], sort=False
+            ).transform('first')
+            for index, first in first_index[duplicated].items():
+                duplicates.setdefault(first, []).append(index)
+            logging.info(f"发现{int(duplicated.sum())}行重复的迁移任务，将只迁移一次")
+        
+        unique = frame[~duplicated]
+        
+        # 所有目标bucket在开始迁移前统一创建一次
+        self.minio_uploader.ensure_buckets(unique['target_bucket'])
+        
+        # 未找到配置的任务config_name为None（pandas字符串列中的缺失值为NaN）
+        config_names = unique['config_name'].astype(object).where(unique['config_name'].notna(), None)
+        items = tuple(
+            WorkItem(index, url, cos_path, hint, target_bucket, config_name,
+                     tuple(duplicates.get(index, ())))
+            for index, url, cos_path, hint, target_bucket, config_name in zip(
+                unique.index, unique['url'], unique['cos_path'], unique['bucket'],
+                unique['target_bucket'], config_names
+            )
+        )
+        return MigrationPlan(items, len(frame), int(duplicated.sum()))
+    
+    def plan_row(self, index, url, bucket=None):
+        """
+        为单行生成迁移任务（不去重、不创建bucket）
+        
+        Args:
+            index: Excel行索引
+            url: COS文件URL
+            bucket: 目标MinIO bucket名称
+            
+        Returns:
+            WorkItem: 迁移任务
+        """
+        cos_path = self.excel_processor.extract_cos_path(url)
+        host = urlparse(url).netloc
+        return WorkItem(
+            index, url, cos_path, bucket,
+            bucket or self.minio_uploader.bucket_name,
+            self.resolve_config_name(host, bucket),
+            ()
+        )
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+限速模块 - 按COS源配置和MinIO endpoint/bucket限制带宽（字节/秒）和请求速率（请求/秒）
+
+限速使用令牌桶：读写数据流时按字节数消耗令牌，令牌不足时当前线程等待；
+速率可在运行中通过限速文件修改，无需重启迁移任务。
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from config import COS_CONFIGS, MINIO_CONFIG, RATE_LIMIT_CONFIG
+
+
+class TokenBucket:
+    """令牌桶，rate为0或None时不限速"""
+    
+    def __init__(self, rate=None, burst=None):
+        """
+        初始化令牌桶
+        
+        Args:
+            rate: 每秒补充的令牌数
+            burst: 桶容量（允许的突发量），如果为None则为1秒的令牌数
+        """
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.rate = 0
+        self.burst = 0
+        self.set_rate(rate, burst)
+    
+    def set_rate(self, rate, burst=None):
+        """
+        修改速率（运行中调用时立即生效）
+        
+        Args:
+            rate: 每秒补充的令牌数，0或None表示不限速
+            burst: 桶容量，如果为None则为1秒的令牌数
+        """
+        with self._lock:
+            self.rate = max(rate or 0, 0)
+            self.burst = burst or self.rate
+            self._tokens = min(self._tokens, self.burst)
+            self._last = time.monotonic()
+    
+    def reserve(self, amount=1):
+        """
+        预扣令牌，返回需要等待的秒数（不阻塞，供异步引擎使用）
+        
+        单次消耗量可以超过桶容量：令牌余额记为负数，等待到余额补回0为止，
+        并发调用时各调用方按到达顺序分摊等待时间。
+        
+        Args:
+            amount: 消耗的令牌数
+            
+        Returns:
+            float: 需要等待的秒数
+        """
+        if not self.rate or amount <= 0:
+            return 0
+        
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._last) * self.rate, self.burst)
+            self._last = now
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0
+    
+    def consume(self, amount=1):
+        """
+        消耗令牌，令牌不足时等待
+        
+        Args:
+            amount: 消耗的令牌数
+        """
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RateLimit:
+    """一组带宽和请求速率限制"""
+    
+    def __init__(self, name, bandwidth=None, requests=None, share=1):
+        """
+        初始化限速
+        
+        Args:
+            name: 限速名称（用于日志）
+            bandwidth: 带宽上限（字节/秒），0或None表示不限
+            requests: 请求速率上限（请求/秒），0或None表示不限
+            share: 分摊该限额的进程数（多进程时每个进程只使用1/share的限额）
+        """
+        self.name = name
+        self.share = max(share, 1)
+        self.bandwidth = None
+        self.requests = None
+        self._bytes = TokenBucket()
+        self._requests = TokenBucket()
+        self.update(bandwidth, requests)
+    
+    def update(self, bandwidth=None, requests=None):
+        """
+        修改限额
+        
+        Args:
+            bandwidth: 带宽上限（字节/秒）
+            requests: 请求速率上限（请求/秒）
+            
+        Returns:
+            bool: 限额是否有变化
+        """
+        bandwidth, requests = bandwidth or 0, requests or 0
+        if (bandwidth, requests) == (self.bandwidth, self.requests):
+            return False
+        self.bandwidth, self.requests = bandwidth, requests
+        self._bytes.set_rate(bandwidth / self.share)
+        self._requests.set_rate(requests / self.share)
+        return True
+    
+    @property
+    def limits_bandwidth(self):
+        """是否限制带宽"""
+        return bool(self.bandwidth)
+    
+    def request(self, count=1):
+        """发送请求前调用"""
+        self._requests.consume(count)
+    
+    def transfer(self, size):
+        """读取或写入size字节数据后调用"""
+        self._bytes.consume(size)
+    
+    def reserve_request(self, count=1):
+        """预扣请求令牌，返回需要等待的秒数（不阻塞）"""
+        return self._requests.reserve(count)
+    
+    def reserve_transfer(self, size):
+        """预扣带宽令牌，返回需要等待的秒数（不阻塞）"""
+        return self._bytes.reserve(size)
+    
+    def describe(self):
+        """限额说明"""
+        bandwidth = f"{self.bandwidth / 1024 / 1024:.2f}MB/秒" if self.bandwidth else '不限'
+        requests = f"{self.requests}个/秒" if self.requests else '不限'
+        return f"带宽{bandwidth}，请求{requests}"
+
+
+class LimitedReader:
+    """为读取流附加限速：每次read()返回的数据按字节数消耗所有限速的令牌"""
+    
+    def __init__(self, stream, limits):
+        """
+        初始化限速读取流
+        
+        Args:
+            stream: 提供read()方法的读取流
+            limits: RateLimit序列
+        """
+        self._stream = stream
+        self._limits = tuple(limits)
+    
+    def read(self, size=-1):
+        data = self._stream.read(size)
+        if data:
+            for limit in self._limits:
+                limit.transfer(len(data))
+        return data
+    
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class RateLimiterRegistry:
+    """
+    限速注册表
+    
+    COS按配置名称限速（COS_CONFIGS中的bandwidth_limit/request_limit），MinIO按endpoint
+    （MINIO_CONFIG中的bandwidth_limit/request_limit）和bucket（RATE_LIMIT_CONFIG['minio_buckets']）限速。
+    未配置的名称也会创建不限速的RateLimit，运行中通过限速文件开启限速时对新的请求立即生效。
+    
+    限速文件为JSON格式，内容与配置项对应：
+        {"cos": {"<配置名>": {"bandwidth_limit": 10485760, "request_limit": 100}},
+         "minio": {"bandwidth_limit": 52428800},
+         "minio_buckets": {"<bucket>": {"request_limit": 50}}}
+    """
+    
+    def __init__(self, share=1):
+        """
+        初始化限速注册表
+        
+        Args:
+            share: 分摊限额的进程数
+        """
+        self.share = max(share, 1)
+        self._lock = threading.Lock()
+        self._cos = {}
+        self._buckets = {}
+        self._endpoint = RateLimit(
+            f"minio:{MINIO_CONFIG.get('endpoint')}",
+            MINIO_CONFIG.get('bandwidth_limit'),
+            MINIO_CONFIG.get('request_limit'),
+            share
+        )
+        self._watcher = None
+        self._stop = threading.Event()
+        
+        for name, config in COS_CONFIGS.items():
+            if config.get('bandwidth_limit') or config.get('request_limit'):
+                self.cos(name)
+        for bucket in RATE_LIMIT_CONFIG['minio_buckets']:
+            self._bucket(bucket)
+        
+        for limit in self.limits():
+            if limit.bandwidth or limit.requests:
+                logging.info(f"限速 {limit.name}: {limit.describe()}")
+    
+    def cos(self, config_name):
+        """
+        获取COS配置对应的限速
+        
+        Args:
+            config_name: COS配置名称
+            
+        Returns:
+            RateLimit: 限速
+        """
+        limit = self._cos.get(config_name)
+        if limit is None:
+            with self._lock:
+                limit = self._cos.get(config_name)
+                if limit is None:
+                    config = COS_CONFIGS.get(config_name, {})
+                    limit = RateLimit(f"cos:{config_name}", config.get('bandwidth_limit'),
+                                      config.get('request_limit'), self.share)
+                    self._cos[config_name] = limit
+        return limit
+    
+    def _bucket(self, bucket):
+        limit = self._buckets.get(bucket)
+        if limit is None:
+            with self._lock:
+                limit = self._buckets.get(bucket)
+                if limit is None:
+                    config = RATE_LIMIT_CONFIG['minio_buckets'].get(bucket, {})
+                    limit = RateLimit(f"minio:{bucket}", config.get('bandwidth_limit'),
+                                      config.get('request_limit'), self.share)
+                    self._buckets[bucket] = limit
+        return limit
+    
+    def minio(self, bucket):
+        """
+        获取写入MinIO bucket时适用的限速（endpoint和bucket两级）
+        
+        Args:
+            bucket: 目标bucket名称
+            
+        Returns:
+            tuple: (endpoint限速, bucket限速)
+        """
+        return self._endpoint, self._bucket(bucket)
+    
+    def limits(self):
+        """所有已创建的限速"""
+        with self._lock:
+            return [self._endpoint] + list(self._cos.values()) + list(self._buckets.values())
+    
+    def update(self, spec):
+        """
+        按限速文件的内容修改限额（未出现在文件中的限速保持不变）
+        
+        Args:
+            spec: 限速文件解析后的字典
+        """
+        changes = []
+        for name, values in (spec.get('cos') or {}).items():
+            changes.append(self._apply(self.cos(name), values))
+        if spec.get('minio'):
+            changes.append(self._apply(self._endpoint, spec['minio']))
+        for bucket, values in (spec.get('minio_buckets') or {}).items():
+            changes.append(self._apply(self._bucket(bucket), values))
+        
+        for limit in filter(None, changes):
+            logging.info(f"修改限速 {limit.name}: {limit.describe()}")
+    
+    def _apply(self, limit, values):
+        if limit.update(values.get('bandwidth_limit'), values.get('request_limit')):
+            return limit
+        return None
+    
+    def load(self, path):
+        """
+        读取限速文件
+        
+        Args:
+            path: JSON格式的限速文件路径
+            
+        Returns:
+            bool: 是否读取成功
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                spec = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"读取限速文件失败: {path}, 错误: {e}")
+            return False
+        self.update(spec)
+        return True
+    
+    def watch(self, path, interval=None):
+        """
+        在后台线程中定期检查限速文件，文件修改后重新读取
+        
+        Args:
+            path: 限速文件路径
+            interval: 检查间隔（秒），如果为None则使用配置文件中的设置
+        """
+        interval = interval or RATE_LIMIT_CONFIG['reload_interval']
+        # 读取前记录修改时间，读取后到后台线程启动前的修改也能被检测到
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        if mtime is not None:
+            self.load(path)
+        
+        def poll():
+            nonlocal mtime
+            while not self._stop.wait(interval):
+                current = os.path.getmtime(path) if os.path.exists(path) else None
+                if current is not None and current != mtime:
+                    mtime = current
+                    self.load(path)
+        
+        self._watcher = threading.Thread(target=poll, name='rate-limit-watcher', daemon=True)
+        self._watcher.start()
+        logging.info(f"监视限速文件: {path}（每{interval}秒检查一次）")
+    
+    def close(self):
+        """停止监视限速文件"""
+        self._stop.set()
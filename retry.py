@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+重试模块 - 可重试的失败任务按带抖动的指数退避延迟后重新进入流水线
+
+失败的任务放入延迟队列后立即释放工作线程，不在工作线程中sleep等待；
+延迟队列作为流水线的一个任务来源，到期的任务由生产者线程重新放入通道队列。
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from config import RETRY_CONFIG
+
+
+def backoff_delay(attempt, base_delay=None, max_delay=None):
+    """
+    计算第attempt次重试前的等待时间（指数退避，全抖动）
+    
+    Args:
+        attempt: 重试次数（从1开始）
+        base_delay: 第一次重试的基准等待时间（秒），如果为None则使用配置文件中的设置
+        max_delay: 等待时间上限（秒），如果为None则使用配置文件中的设置
+        
+    Returns:
+        float: 等待秒数，在[0, min(max_delay, base_delay * 2^(attempt-1))]之间均匀分布
+    """
+    base_delay = RETRY_CONFIG['base_delay'] if base_delay is None else base_delay
+    max_delay = RETRY_CONFIG['max_delay'] if max_delay is None else max_delay
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+class RetryQueue:
+    """
+    延迟重试队列
+    
+    记录尚未得到最终结果的任务数（包括正在执行、在队列中等待和等待重试的任务）：
+    主任务来源读完、没有未完成的任务且延迟队列为空时，重试来源结束，流水线随之结束。
+    """
+    
+    def __init__(self, max_retries=None, base_delay=None, max_delay=None):
+        """
+        初始化重试队列
+        
+        Args:
+            max_retries: 每个任务的最大重试次数，如果为None则使用配置文件中的设置
+            base_delay: 第一次重试的基准等待时间（秒）
+            max_delay: 等待时间上限（秒）
+        """
+        self.max_retries = RETRY_CONFIG['max_retries'] if max_retries is None else max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        
+        self._condition = threading.Condition()
+        self._heap = []
+        self._sequence = itertools.count()
+        self._open = 0
+        self._sources_done = False
+        self.scheduled = 0
+    
+    def track(self, items):
+        """
+        登记主任务来源中的任务
+        
+        Args:
+            items: WorkItem序列或迭代器
+            
+        Returns:
+            序列原样返回；迭代器返回逐个登记的迭代器
+        """
+        if isinstance(items, (list, tuple)):
+            with self._condition:
+                self._open += len(items)
+            self.close_sources()
+            return items
+        return self._track_iter(items)
+    
+    def _track_iter(self, items):
+        try:
+            for item in items:
+                with self._condition:
+                    self._open += 1
+                yield item
+        finally:
+            self.close_sources()
+    
+    def close_sources(self):
+        """主任务来源已读完"""
+        with self._condition:
+            self._sources_done = True
+            self._condition.notify_all()
+    
+    def can_retry(self, item):
+        """任务是否还有重试次数"""
+        return item.attempts < self.max_retries
+    
+    def schedule(self, item):
+        """
+        将任务放入延迟队列（任务仍计为未完成）
+        
+        Args:
+            item: 失败的WorkItem
+            
+        Returns:
+            tuple: (重试后的WorkItem, 等待秒数)
+        """
+        retry_item = item._replace(attempts=item.attempts + 1)
+        delay = backoff_delay(retry_item.attempts, self.base_delay, self.max_delay)
+        with self._condition:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), retry_item))
+            self.scheduled += 1
+            self._condition.notify_all()
+        return retry_item, delay
+    
+    def defer(self, item, delay):
+        """
+        将任务延迟后重新放入流水线（不计为重试，如等待内容相同的首个副本完成）
+        
+        Args:
+            item: WorkItem
+            delay: 等待秒数
+        """
+        with self._condition:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), item))
+            self._condition.notify_all()
+    
+    def finish(self):
+        """一个任务得到最终结果（成功、跳过、永久失败或重试次数用尽）"""
+        with self._condition:
+            self._open -= 1
+            self._condition.notify_all()
+    
+    def __iter__(self):
+        """
+        按到期时间逐个取出待重试的任务，所有任务都得到最终结果后结束
+        
+        Yields:
+            WorkItem: 到期的重试任务
+        """
+        while True:
+            with self._condition:
+                while True:
+                    if self._heap and self._heap[0][0] <= time.monotonic():
+                        item = heapq.heappop(self._heap)[2]
+                        break
+                    if self._sources_done and self._open <= 0 and not self._heap:
+                        return
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+            yield item
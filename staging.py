@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+暂存模块 - 管理下载后等待上传的对象数据
+
+小对象暂存在内存缓冲区中，省去创建、写入、读取和删除临时文件的开销；超过阈值的对象，
+或内存缓冲总量已达上限时，写入临时目录。临时文件位于每个进程独立的子目录中，文件名唯一，
+不同前缀下的同名对象（如a/1.jpg和b/1.jpg）并发下载时不会互相覆盖。
+内存和磁盘上的暂存数据合计受ByteBudget限制，超出时阻塞下载直到其他任务释放空间。
+"""
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from config import TRANSFER_CONFIG
+from pipeline import ByteBudget
+
+
+class StagedData:
+    """一个对象的暂存数据（内存缓冲区或临时文件）"""
+    
+    def __init__(self, manager, size, path=None):
+        """
+        初始化暂存数据
+        
+        Args:
+            manager: 所属的StagingManager
+            size: 预留的字节数
+            path: 临时文件路径，为None时暂存在内存中
+        """
+        self.manager = manager
+        self.size = size
+        self.path = path
+        self.buffer = io.BytesIO() if path is None else None
+        self._released = False
+    
+    @property
+    def in_memory(self):
+        return self.path is None
+    
+    def reader(self):
+        """
+        打开读取流（从头读取）
+        
+        Returns:
+            io.BytesIO: 内存缓冲区；磁盘暂存时调用方应直接使用path
+        """
+        self.buffer.seek(0)
+        return self.buffer
+    
+    def release(self):
+        """释放内存缓冲区或删除临时文件，并归还预留的空间（可重复调用）"""
+        if self._released:
+            return
+        self._released = True
+        try:
+            if self.in_memory:
+                self.buffer.close()
+                self.buffer = None
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+        finally:
+            self.manager._release(self)
+
+
+class StagingManager:
+    """
+    暂存管理器
+    
+    不超过memory_threshold的对象在内存缓冲总量未超过memory_limit时暂存在内存中，其余写入临时文件；
+    所有暂存数据合计受quota限制。
+    """
+    
+    def __init__(self, temp_dir, quota=None, memory_threshold=None, memory_limit=None):
+        """
+        初始化暂存管理器
+        
+        Args:
+            temp_dir: 临时目录
+            quota: 暂存数据总量上限（ByteBudget实例或字节数），为None时使用配置文件中的设置
+            memory_threshold: 暂存在内存中的对象大小上限（字节），如果为None则使用配置文件中的设置，0表示不使用内存暂存
+            memory_limit: 内存缓冲总量上限（字节），如果为None则使用配置文件中的设置
+        """
+        self.temp_dir = temp_dir
+        if not isinstance(quota, ByteBudget):
+            quota = ByteBudget(TRANSFER_CONFIG['staging_budget'] if quota is None else quota)
+        self.quota = quota
+        self.memory_threshold = TRANSFER_CONFIG['memory_staging_threshold'] \
+            if memory_threshold is None else memory_threshold
+        self.memory_limit = TRANSFER_CONFIG['memory_staging_limit'] if memory_limit is None else memory_limit
+        
+        self.memory_used = 0
+        self.memory_objects = 0
+        self.disk_objects = 0
+        self._lock = threading.Lock()
+        
+        # 每个进程使用独立的子目录，多进程共用同一临时目录时互不干扰
+        self.worker_dir = os.path.join(temp_dir, f"worker-{os.getpid()}")
+    
+    def allocate(self, name, size):
+        """
+        为对象分配暂存空间，暂存数据总量超出上限时阻塞
+        
+        Args:
+            name: 对象名称（临时文件名保留其文件名部分，便于排查）
+            size: 对象大小（字节）
+            
+        Returns:
+            StagedData: 暂存数据，使用完毕后调用release()
+        """
+        size = size or 0
+        self.quota.acquire(size)
+        try:
+            with self._lock:
+                if self.memory_threshold and size <= self.memory_threshold \
+                        and self.memory_used + size <= self.memory_limit:
+                    self.memory_used += size
+                    self.memory_objects += 1
+                    return StagedData(self, size)
+                self.disk_objects += 1
+            
+            # 超过阈值或内存缓冲已满时写入临时文件（mkstemp保证文件名唯一）
+            os.makedirs(self.worker_dir, exist_ok=True)
+            filename = os.path.basename(name) or 'object'
+            fd, path = tempfile.mkstemp(dir=self.worker_dir, suffix=f"_{filename[-100:]}")
+            os.close(fd)
+            return StagedData(self, size, path)
+        except Exception:
+            self.quota.release(size)
+            raise
+    
+    def _release(self, staged):
+        if staged.in_memory:
+            with self._lock:
+                self.memory_used -= staged.size
+        self.quota.release(staged.size)
+    
+    def close(self):
+        """删除本进程的临时子目录"""
+        try:
+            if os.path.exists(self.worker_dir):
+                shutil.rmtree(self.worker_dir)
+        except Exception as e:
+            logging.warning(f"清理临时目录失败: {self.worker_dir}, 错误: {e}")
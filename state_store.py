@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+状态日志模块 - 以SQLite（WAL模式）持久化每行的迁移状态，进程中断后可直接恢复
+
+迁移过程中的状态更新先写入内存缓冲区，按条数或时间批量提交，避免逐行提交的fsync开销；
+恢复迁移时直接从日志读取各行状态，不再重新读取Excel文件。
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from config import STATE_CONFIG
+
+
+class StateStore:
+    """迁移状态日志"""
+    
+    # 在rows表创建后增加的列，打开旧日志时自动补上
+    EXTRA_COLUMNS = (
+        ('retries', 'INTEGER DEFAULT 0'),
+        ('dest_etag', 'TEXT'),
+        ('checksum', 'TEXT')
+    )
+    
+    def __init__(self, path, batch_size=None, flush_interval=None):
+        """
+        初始化状态日志
+        
+        Args:
+            path: SQLite数据库文件路径
+            batch_size: 缓冲多少条状态更新后提交，如果为None则使用配置文件中的设置
+            flush_interval: 距上次提交超过多少秒后提交，如果为None则使用配置文件中的设置
+        """
+        self.path = path
+        self.batch_size = batch_size or STATE_CONFIG['batch_size']
+        self.flush_interval = flush_interval or STATE_CONFIG['flush_interval']
+        
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_flush = time.monotonic()
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS rows (
+                idx INTEGER PRIMARY KEY,
+                url TEXT,
+                bucket TEXT,
+                status TEXT NOT NULL,
+                bytes INTEGER,
+                etag TEXT,
+                error TEXT,
+                updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        # 旧版本创建的日志缺少后来增加的列
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(rows)')}
+        for column, definition in self.EXTRA_COLUMNS:
+            if column not in columns:
+                self._conn.execute(f'ALTER TABLE rows ADD COLUMN {column} {definition}')
+        self._conn.commit()
+    
+    @staticmethod
+    def default_path(manifest_path):
+        """清单文件对应的默认日志路径（与清单文件放在同一目录）"""
+        return manifest_path + STATE_CONFIG['suffix']
+    
+    def has_rows(self):
+        """日志中是否已有行记录"""
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM rows LIMIT 1').fetchone() is not None
+    
+    def is_seeded(self):
+        """日志是否已用完整的清单初始化（初始化中途中断时返回False）"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'seeded'").fetchone()
+        return row is not None
+    
+    def mark_seeded(self):
+        """标记清单已全部写入日志"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seeded', '1')")
+    
+    def seed(self, df, url_column, status_column, bucket_column, manifest_path=None):
+        """
+        用清单内容初始化日志，可按数据块多次调用；已存在的行保留日志中的状态
+        
+        Args:
+            df: 清单DataFrame
+            url_column: URL列名
+            status_column: 状态列名
+            bucket_column: bucket列名
+            manifest_path: 清单文件路径，用于恢复时检查清单是否被修改
+        """
+        buckets = df[bucket_column].astype(object).where(df[bucket_column].notna(), None)
+        statuses = df[status_column].astype(object).where(df[status_column].notna(), 'pending')
+        urls = df[url_column].astype(object).where(df[url_column].notna(), None)
+        records = [
+            (int(index), None if url is None else str(url), bucket, str(status))
+            for index, url, bucket, status in zip(df.index, urls, buckets, statuses)
+        ]
+        
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO rows (idx, url, bucket, status) VALUES (?, ?, ?, ?)', records
+                )
+                if manifest_path:
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                        ('manifest_mtime', str(os.path.getmtime(manifest_path)))
+                    )
+        logging.debug(f"写入状态日志: {self.path}, {len(records)}行")
+    
+    def load_frame(self, url_column, status_column, bucket_column, manifest_path=None):
+        """
+        从日志读取所有行，格式与ExcelProcessor.df一致
+        
+        Args:
+            url_column: URL列名
+            status_column: 状态列名
+            bucket_column: bucket列名
+            manifest_path: 清单文件路径，用于检查清单在日志初始化后是否被修改
+            
+        Returns:
+            DataFrame: 以行索引为索引的清单
+        """
+        frames = list(self.iter_frames(None, url_column, status_column, bucket_column, manifest_path))
+        return frames[0]
+    
+    def iter_frames(self, chunk_size, url_column, status_column, bucket_column, manifest_path=None):
+        """
+        按行索引顺序分块读取日志中的行
+        
+        Args:
+            chunk_size: 每块的行数，为None时一次读取全部
+            url_column: URL列名
+            status_column: 状态列名
+            bucket_column: bucket列名
+            manifest_path: 清单文件路径，用于检查清单在日志初始化后是否被修改
+            
+        Yields:
+            DataFrame: 以行索引为索引的数据块
+        """
+        self.flush()
+        with self._lock:
+            mtime = self._conn.execute("SELECT value FROM meta WHERE key = 'manifest_mtime'").fetchone()
+        
+        if manifest_path and mtime and os.path.exists(manifest_path):
+            if os.path.getmtime(manifest_path) > float(mtime[0]):
+                logging.warning(f"清单文件在状态日志创建后被修改，将以日志中的内容为准: {manifest_path}")
+        
+        columns = ['idx', url_column, bucket_column, status_column, 'error_msg']
+        last = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT idx, url, bucket, status, error FROM rows WHERE idx > ? ORDER BY idx LIMIT ?',
+                    (last, chunk_size or -1)
+                ).fetchall()
+            
+            frame = pd.DataFrame.from_records(rows, columns=columns, index='idx')
+            frame.index.name = None
+            yield frame
+            
+            if not chunk_size or len(rows) < chunk_size:
+                return
+            last = rows[-1][0]
+    
+    def record(self, index, status, size=None, etag=None, error=None, retries=None, dest_etag=None, checksum=None):
+        """
+        记录一行的状态（写入缓冲区，按批提交）
+        
+        Args:
+            index: 行索引
+            status: 新状态
+            size: 传输的字节数
+            etag: 源端对象ETag
+            error: 错误信息（重试后的最终失败原因）
+            retries: 重试次数
+            dest_etag: MinIO返回的ETag
+            checksum: 传输时计算的校验值（如 "crc64:..."）
+        """
+        with self._lock:
+            self._pending.append((status, size, etag, error, retries or 0, dest_etag, checksum,
+                                  time.time(), int(index)))
+            if len(self._pending) >= self.batch_size or \
+                    time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+    
+    def flush(self):
+        """提交缓冲区中的所有状态更新"""
+        with self._lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    'UPDATE rows SET status = ?, bytes = ?, etag = ?, error = ?, retries = ?, dest_etag = ?, '
+                    'checksum = ?, updated_at = ? WHERE idx = ?',
+                    pending
+                )
+        except sqlite3.Error as e:
+            logging.error(f"写入状态日志失败: {e}")
+            self._pending = pending + self._pending
+    
+    def statuses(self):
+        """
+        获取所有行的状态
+        
+        Returns:
+            DataFrame: 以行索引为索引，包含status、bytes、etag、error、retries、dest_etag、checksum列
+        """
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT idx, status, bytes, etag, error, retries, dest_etag, checksum FROM rows ORDER BY idx'
+            ).fetchall()
+        frame = pd.DataFrame.from_records(
+            rows, columns=['idx', 'status', 'bytes', 'etag', 'error', 'retries', 'dest_etag', 'checksum'],
+            index='idx'
+        )
+        frame.index.name = None
+        return frame
+    
+    def close(self):
+        """提交剩余更新并关闭数据库"""
+        if self._conn is None:
+            return
+        self.flush()
+        with self._lock:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+增量同步模块 - 比对源端和目标端的大小、ETag/校验值和修改时间，只传输新增或已变更的对象
+
+上传时把源端的ETag和CRC64写入MinIO对象的用户元数据，下次同步时直接与源端清单比对；
+比对数据来自批量列举（MinIO列举时附带用户元数据），不需要逐个对象发送HEAD/stat请求。
+"""
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from checksum import is_md5_etag
+from inventory import DestinationObject, user_metadata
+
+
+# 写入MinIO用户元数据的源端信息（SDK自动加上x-amz-meta-前缀）
+SOURCE_ETAG_META = 'cos-etag'
+SOURCE_CRC64_META = 'cos-crc64'
+
+
+def source_metadata(info):
+    """
+    生成上传时写入MinIO的源端元数据
+    
+    Args:
+        info: 源端对象信息（包含etag，可选crc64）
+        
+    Returns:
+        dict: 用户元数据，源端信息为空时返回None
+    """
+    metadata = {}
+    if info.get('etag'):
+        metadata[SOURCE_ETAG_META] = info['etag'].strip('"')
+    if info.get('crc64'):
+        metadata[SOURCE_CRC64_META] = str(info['crc64'])
+    return metadata or None
+
+
+def dest_object(size, etag, last_modified=None, headers=None):
+    """
+    构建目标端对象条目（用于清单未覆盖时的stat/HEAD结果）
+    
+    Args:
+        size: 对象大小
+        etag: MinIO ETag
+        last_modified: 修改时间
+        headers: 响应头或元数据
+        
+    Returns:
+        DestinationObject: 目标端对象条目
+    """
+    return DestinationObject(
+        int(size) if size is not None else None,
+        etag.strip('"') if etag else etag,
+        last_modified,
+        user_metadata(headers)
+    )
+
+
+def parse_time(value):
+    """
+    解析修改时间（列举结果的ISO 8601格式、HEAD响应的RFC 1123格式或datetime）
+    
+    Args:
+        value: 修改时间
+        
+    Returns:
+        datetime: 带时区的时间，无法解析时返回None
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            try:
+                parsed = parsedate_to_datetime(str(value))
+            except (TypeError, ValueError):
+                return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def change_reason(source, dest):
+    """
+    判断目标端对象是否需要重新同步
+    
+    依次比对：大小；目标端记录的源端CRC64/ETag；两端均为MD5 ETag时直接比对ETag；
+    都无法比对时（分片上传的ETag），源端修改时间晚于目标端时重新同步。
+    
+    Args:
+        source: 源端对象信息（size、etag、crc64、last_modified）
+        dest: 目标端DestinationObject，不存在时为None
+        
+    Returns:
+        str: 需要同步的原因，已是最新时返回None
+    """
+    if dest is None:
+        return '目标端不存在'
+    if source.get('size') is not None and dest.size is not None and int(source['size']) != dest.size:
+        return f"大小不一致（源端{source['size']}，目标端{dest.size}）"
+    
+    source_etag = (source.get('etag') or '').strip('"')
+    metadata = dest.metadata or {}
+    if source.get('crc64') and metadata.get(SOURCE_CRC64_META):
+        return None if str(source['crc64']) == metadata[SOURCE_CRC64_META] else '源端CRC64已变更'
+    if source_etag and metadata.get(SOURCE_ETAG_META):
+        return None if source_etag == metadata[SOURCE_ETAG_META] else '源端ETag已变更'
+    if is_md5_etag(source_etag) and is_md5_etag(dest.etag):
+        return None if source_etag.lower() == dest.etag.lower() else 'ETag不一致'
+    
+    source_time, dest_time = parse_time(source.get('last_modified')), parse_time(dest.last_modified)
+    if source_time and dest_time and source_time > dest_time:
+        return '源端修改时间晚于目标端'
+    return None
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共配置 - 模块位于仓库根目录，测试前设置COS和MinIO的环境变量（不访问真实服务）
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+for key, value in {
+    'COS_FRCDAP_DEV_SECRET_ID': 'test-id',
+    'COS_FRCDAP_DEV_SECRET_KEY': 'test-key',
+    'COS_FRCDAP_DEV_REGION': 'ap-guangzhou',
+    'COS_FRCDAP_DEV_BUCKET': 'test-1250000000',
+    'MINIO_ENDPOINT': '127.0.0.1:9',
+    'MINIO_ACCESS_KEY': 'minio',
+    'MINIO_SECRET_KEY': 'minio-secret',
+    'MINIO_BUCKET_NAME': 'default'
+}.items():
+    os.environ.setdefault(key, value)
+
+
+import pytest  # noqa: E402
+
+from benchmark import COS_BUCKET, FakeS3Server, NetworkLink, SyntheticObjects  # noqa: E402
+from config import COS_CONFIGS, MINIO_CONFIG  # noqa: E402
+
+
+@pytest.fixture
+def fake_services(monkeypatch):
+    """
+    在本进程中启动模拟的COS和MinIO服务（benchmark.FakeS3Server），COS配置'bucket'和MinIO配置指向它们
+    
+    Returns:
+        function: start(sizes)，sizes为源端对象名称 -> 大小（相同大小的对象内容相同），
+                  返回包含cos、minio、objects的命名空间
+    """
+    from types import SimpleNamespace
+    servers = []
+    
+    def start(sizes=None, seed=1):
+        objects = SyntheticObjects(dict(sizes or {}), seed)
+        cos = FakeS3Server('cos', NetworkLink(), objects)
+        minio = FakeS3Server('minio', NetworkLink())
+        for server in (cos, minio):
+            server.start()
+            servers.append(server)
+        cos_config = COS_CONFIGS['bucket']
+        monkeypatch.setitem(cos_config, 'bucket', COS_BUCKET)
+        monkeypatch.setitem(cos_config, 'domain', cos.endpoint)
+        monkeypatch.setitem(cos_config, 'scheme', 'http')
+        monkeypatch.setitem(MINIO_CONFIG, 'endpoint', minio.endpoint)
+        monkeypatch.setitem(MINIO_CONFIG, 'secure', False)
+        return SimpleNamespace(cos=cos, minio=minio, objects=objects)
+    
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from async_engine import AsyncTransferEngine
+
+
+def make_engine(engine_class, concurrency=4):
+    migrator = SimpleNamespace(
+        minio_uploader=SimpleNamespace(config={'endpoint': '127.0.0.1:9', 'secure': False}),
+        rate_limits=None
+    )
+    return engine_class(migrator, concurrency=concurrency)
+
+
+class RecordingEngine(AsyncTransferEngine):
+    """不发送请求，只记录任务的开始和结束"""
+    
+    def __init__(self, *args, events, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = events
+    
+    async def _migrate(self, session, item):
+        self.events.append(('start', item))
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+        self.events.append(('done', item))
+        return {'status': 'success'}
+
+
+def test_blocking_source_does_not_stall_running_tasks():
+    events = []
+    
+    def items():
+        yield 1
+        # 模拟读取清单块或等待列举结果
+        time.sleep(0.5)
+        events.append(('read', 2))
+        yield 2
+    
+    engine = make_engine(lambda *args, **kwargs: RecordingEngine(*args, events=events, **kwargs))
+    finished = []
+    engine.run(items(), lambda item, task: finished.append((item, task.result()['status'])))
+    
+    assert events.index(('done', 1)) < events.index(('read', 2))
+    assert sorted(finished) == [(1, 'success'), (2, 'success')]
+
+
+def test_source_error_is_raised_after_running_tasks_finish():
+    events = []
+    
+    def items():
+        yield 1
+        raise RuntimeError('manifest broken')
+    
+    engine = make_engine(lambda *args, **kwargs: RecordingEngine(*args, events=events, **kwargs))
+    with pytest.raises(RuntimeError, match='manifest broken'):
+        engine.run(items(), lambda item, task: None)
+    assert ('done', 1) in events
+
+
+def test_concurrency_limits_in_flight_tasks():
+    in_flight = []
+    peak = []
+    
+    class Engine(AsyncTransferEngine):
+        async def _migrate(self, session, item):
+            in_flight.append(item)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(item)
+            return {'status': 'success'}
+    
+    done = []
+    make_engine(Engine, concurrency=3).run(iter(range(20)), lambda item, task: done.append(item))
+    assert sorted(done) == list(range(20))
+    assert max(peak) <= 3
+
+
+class FlakyEngine(AsyncTransferEngine):
+    """第一次执行时抛出可重试错误，重试时成功；结果通过迁移器记录，与真实引擎一致"""
+    
+    def __init__(self, *args, error, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.error = error
+        self.attempts = []
+    
+    async def _migrate(self, session, item):
+        migrator = self.migrator
+        result = migrator._new_result(item)
+        self.attempts.append(item.attempts)
+        try:
+            if item.attempts == 0:
+                raise self.error
+            result.update(status='success', success=True)
+        except Exception as e:
+            migrator._mark_failed(item, result, e)
+        migrator._record_result(item, result)
+        return result
+
+
+@pytest.fixture
+def migrator(tmp_path, monkeypatch, fake_services):
+    import cos2minio
+    import retry
+    fake_services()
+    # 重试不等待
+    monkeypatch.setitem(retry.RETRY_CONFIG, 'base_delay', 0.0)
+    migrator = cos2minio.COS2MinIOMigrator(None, cos_config_name='bucket', engine='async', max_retries=2,
+                                           temp_dir=str(tmp_path / 'tmp'))
+    yield migrator
+    migrator.cleanup()
+
+
+def run_flaky(migrator, monkeypatch, error, items):
+    import async_engine
+    engines = []
+    
+    def engine_class(owner, concurrency=None):
+        engine = FlakyEngine(owner, concurrency=concurrency, error=error)
+        engines.append(engine)
+        return engine
+    
+    monkeypatch.setattr(async_engine, 'AsyncTransferEngine', engine_class)
+    finished = []
+    migrator.execute(items, lambda item, task: finished.append((item.index, task.result()['status'])))
+    return engines[0], finished
+
+
+def test_async_retryable_errors_go_through_retry_queue(migrator, monkeypatch):
+    from checksum import ChecksumMismatchError
+    from planner import WorkItem
+    
+    items = [WorkItem(i, f'https://x/{i}', f'{i}.bin', None, 'default', 'bucket', ()) for i in range(3)]
+    engine, finished = run_flaky(migrator, monkeypatch, ChecksumMismatchError('a.bin', 'md5', 'x', 'y'), items)
+    
+    assert sorted(engine.attempts) == [0, 0, 0, 1, 1, 1]
+    assert sorted(finished) == [(0, 'success'), (1, 'success'), (2, 'success')]
+    assert migrator.stats['retried'] == 3
+    assert 'permanent' not in migrator.metrics.render().split('errors_total')[-1]
+
+
+def test_async_permanent_errors_are_classified(migrator, monkeypatch):
+    from planner import WorkItem
+    
+    error = ValueError('COS文件不存在: 0.bin')
+    items = [WorkItem(0, 'https://x/0', '0.bin', None, 'default', 'bucket', ())]
+    engine, finished = run_flaky(migrator, monkeypatch, error, items)
+    
+    assert engine.attempts == [0]
+    assert finished == [(0, 'failed')]
+    assert migrator.stats['failed'] == 1
+    assert 'cos2minio_errors_total{class="permanent"} 1' in migrator.metrics.render()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+传输校验测试 - 增量校验值、MinIO ETag比对，以及校验失败时删除目标端对象并重试
+"""
+import hashlib
+
+import pytest
+
+from checksum import Checksum, ChecksumMismatchError, HashingReader, verify_dest_etag
+
+
+DATA = b'123456789'
+MD5 = hashlib.md5(DATA).hexdigest()
+# CRC-64/XZ（COS的x-cos-hash-crc64ecma）标准校验值
+CRC64 = str(0x995DC9BBDF1939FA)
+
+
+def test_md5_etag_is_verified_incrementally():
+    checksum = Checksum('a.bin', f'"{MD5}"', size=len(DATA))
+    checksum.update(DATA[:4])
+    checksum.update(DATA[4:])
+    checksum.verify()
+    assert checksum.describe() == f'md5:{MD5}'
+
+
+def test_crc64_is_verified_without_md5_etag():
+    checksum = Checksum('a.bin', 'd41d8cd98f00b204e9800998ecf8427e-2', CRC64, len(DATA))
+    checksum.update(DATA)
+    checksum.verify()
+    assert checksum.md5 is None
+    assert checksum.crc64 == CRC64
+
+
+@pytest.mark.parametrize('etag, crc64, data, algorithm', [
+    (MD5, None, DATA[:-1] + b'0', 'md5'),
+    (None, CRC64, DATA[:-1] + b'0', 'crc64'),
+    (MD5, None, DATA[:-1], 'size')
+])
+def test_mismatch_is_reported(etag, crc64, data, algorithm):
+    checksum = Checksum('a.bin', etag, crc64, len(DATA))
+    checksum.update(data)
+    with pytest.raises(ChecksumMismatchError) as info:
+        checksum.verify()
+    assert info.value.algorithm == algorithm
+
+
+def test_hashing_reader_feeds_checksum():
+    import io
+    checksum = Checksum('a.bin', MD5, size=len(DATA))
+    reader = HashingReader(io.BytesIO(DATA), checksum)
+    while reader.read(4):
+        pass
+    checksum.verify()
+
+
+def test_verify_dest_etag():
+    verify_dest_etag('a.bin', MD5, f'"{MD5.upper()}"')
+    # 分片上传的ETag不是内容MD5，不比对
+    verify_dest_etag('a.bin', MD5, 'd41d8cd98f00b204e9800998ecf8427e-3')
+    verify_dest_etag('a.bin', None, MD5)
+    with pytest.raises(ChecksumMismatchError):
+        verify_dest_etag('a.bin', MD5, 'd41d8cd98f00b204e9800998ecf8427e')
+
+
+@pytest.fixture
+def migrate(tmp_path, monkeypatch, fake_services):
+    """通过模拟服务迁移一个对象，返回(迁移器, 完成状态, 模拟服务)"""
+    import cos2minio
+    import retry
+    from planner import WorkItem
+    
+    monkeypatch.setitem(retry.RETRY_CONFIG, 'base_delay', 0.0)
+    services = fake_services({'a.bin': 1000})
+    migrators = []
+    
+    def run(source_etag=None, **options):
+        migrator = cos2minio.COS2MinIOMigrator(None, cos_config_name='bucket', max_workers=2,
+                                               temp_dir=str(tmp_path / 'tmp'), **options)
+        migrators.append(migrator)
+        source_info = {'size': 1000, 'etag': source_etag or services.objects.etag(1000), 'last_modified': None}
+        item = WorkItem(0, 'https://x/a.bin', 'a.bin', None, 'default', 'bucket', (), 1000, source_info=source_info)
+        finished = []
+        migrator.execute([item], lambda item, future: finished.append(future.result()), prescan=False)
+        return migrator, finished
+    
+    yield run, services
+    for migrator in migrators:
+        migrator.cleanup()
+
+
+@pytest.mark.parametrize('stream_mode', [False, True])
+def test_verified_transfer_records_checksum(migrate, stream_mode):
+    run, services = migrate
+    migrator, finished = run(verify_checksum=True, stream_mode=stream_mode)
+    
+    [result] = finished
+    assert result['status'] == 'success'
+    assert result['checksum'] == f'md5:{services.objects.etag(1000)}'
+    assert 'a.bin' in services.minio.buckets['default']
+
+
+@pytest.mark.parametrize('stream_mode', [False, True])
+def test_checksum_mismatch_deletes_object_and_retries(migrate, stream_mode):
+    run, services = migrate
+    migrator, finished = run('0' * 32, verify_checksum=True, stream_mode=stream_mode, max_retries=1)
+    
+    [result] = finished
+    assert result['status'] == 'failed'
+    assert result['error_type'] == 'retryable'
+    assert '校验失败' in result['error']
+    assert migrator.stats['retried'] == 1
+    # 校验失败的对象不能留在目标端
+    assert 'a.bin' not in services.minio.buckets.get('default', {})
+
+
+def test_verification_is_off_by_default(migrate):
+    run, services = migrate
+    migrator, finished = run('0' * 32)
+    
+    [result] = finished
+    assert result['status'] == 'success'
+    assert not result.get('checksum')
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+自适应并发测试 - AIMD控制器的加性增、乘性减和上下限
+"""
+import threading
+
+import pytest
+
+import concurrency
+from concurrency import AdjustableLimiter, AIMDController
+
+
+class FakeClock:
+    """替代time.monotonic，由测试推进时间"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(concurrency.time, 'monotonic', fake)
+    monkeypatch.setitem(concurrency.CONCURRENCY_CONFIG, 'min_samples', 5)
+    return fake
+
+
+def controller(**options):
+    options = {'min_limit': 2, 'max_limit': 10, 'initial': 4, 'interval': 1.0, 'latency_target': 0, **options}
+    return AIMDController(**options)
+
+
+def run_window(aimd, clock, samples=5, elapsed=0.1, size=1000, throttled=False):
+    """报告一个统计周期的传输结果（最后一个样本在周期结束时报告）"""
+    for i in range(samples):
+        if i == samples - 1:
+            clock.now += aimd.interval
+        aimd.observe(elapsed, size, throttled=throttled and i == samples - 1)
+    return aimd.limit
+
+
+def test_good_windows_increase_additively(clock):
+    aimd = controller(increase_step=2)
+    assert [run_window(aimd, clock) for _ in range(3)] == [6, 8, 10]
+    assert aimd.adjustments == 3
+
+
+def test_no_adjustment_before_interval_or_min_samples(clock):
+    aimd = controller()
+    for _ in range(10):
+        aimd.observe(0.1, 1000)
+    assert aimd.limit == 4
+    
+    clock.now += aimd.interval
+    aimd.observe(0.1, 1000)
+    assert aimd.limit == 5
+
+
+def test_throttling_decreases_multiplicatively(clock):
+    aimd = controller(initial=8, decrease_factor=0.5)
+    # 出现限流时不要求样本数
+    assert run_window(aimd, clock, samples=1, throttled=True) == 4
+    assert run_window(aimd, clock, throttled=True) == 2
+
+
+def test_p95_latency_breach_decreases(clock):
+    aimd = controller(initial=8, latency_target=1.0)
+    assert run_window(aimd, clock, elapsed=0.5) == 9
+    assert run_window(aimd, clock, elapsed=2.0) == 4
+
+
+def test_throughput_drop_after_increase_backs_off(clock):
+    aimd = controller()
+    assert run_window(aimd, clock, size=1000) == 5
+    assert run_window(aimd, clock, size=100) == 4
+
+
+def test_limit_is_clamped_to_bounds(clock):
+    aimd = controller(initial=9)
+    assert [run_window(aimd, clock) for _ in range(3)] == [10, 10, 10]
+    for _ in range(4):
+        run_window(aimd, clock, throttled=True)
+    assert aimd.limit == 2
+    
+    assert controller(initial=100).limit == 10
+    assert controller(initial=0).limit == 2
+
+
+def test_lowered_limit_pauses_new_acquires():
+    limiter = AdjustableLimiter(2)
+    limiter.acquire()
+    limiter.acquire()
+    limiter.set_limit(1)
+    acquired = threading.Event()
+    
+    def waiter():
+        limiter.acquire()
+        acquired.set()
+    
+    thread = threading.Thread(target=waiter, daemon=True)
+    thread.start()
+    limiter.release()
+    assert not acquired.wait(0.2)
+    limiter.release()
+    assert acquired.wait(5)
+    thread.join(5)
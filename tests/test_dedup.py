@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+内容去重测试 - 首个副本的认领和接替，等待首个副本时不占用工作线程
+"""
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from dedup import PENDING, ContentDedup
+
+
+def test_first_claim_transfers_and_others_copy():
+    dedup = ContentDedup()
+    leader, follower = {'etag': '"abc"', 'size': 10}, {'etag': 'abc', 'size': 10}
+    
+    assert dedup.claim(leader) is None
+    assert leader['dedup_key'] == ('abc', 10)
+    assert dedup.claim(follower) is PENDING
+    
+    leader.update(status='success', bucket='default', cos_path='a.bin')
+    dedup.finish(leader)
+    assert dedup.claim(follower) == ('default', 'a.bin')
+    assert 'dedup_key' not in follower
+
+
+def test_failed_leader_hands_over_to_next_claim():
+    dedup = ContentDedup()
+    leader, follower = {'etag': 'abc', 'size': 10}, {'etag': 'abc', 'size': 10}
+    
+    assert dedup.claim(leader) is None
+    leader['status'] = 'failed'
+    dedup.finish(leader)
+    # 首个副本失败后，下一个认领的任务自己传输
+    assert dedup.claim(follower) is None
+    assert follower['dedup_key'] == ('abc', 10)
+
+
+def test_unknown_content_is_not_deduplicated():
+    dedup = ContentDedup()
+    assert dedup.claim({'etag': None, 'size': 10}) is None
+    assert dedup.claim({'etag': 'abc', 'size': None}) is None
+    # 非首个副本调用finish时忽略
+    dedup.finish({'status': 'success'})
+
+
+@pytest.fixture
+def migrator(tmp_path, monkeypatch, fake_services):
+    import cos2minio
+    services = fake_services({'a.bin': 1000, 'b.bin': 1000, 'c.bin': 3000})
+    migrator = cos2minio.COS2MinIOMigrator(None, cos_config_name='bucket', max_workers=1, max_retries=0,
+                                           dedup=True, temp_dir=str(tmp_path / 'tmp'))
+    migrator.services = services
+    yield migrator
+    migrator.cleanup()
+
+
+def run_items(migrator, cos_paths, on_done):
+    from planner import WorkItem
+    items = [WorkItem(i, f'https://x/{path}', path, None, 'default', 'bucket', ()) for i, path in enumerate(cos_paths)]
+    runner = threading.Thread(target=migrator.execute, args=(items, on_done), kwargs={'prescan': False}, daemon=True)
+    runner.start()
+    runner.join(10)
+    assert not runner.is_alive(), "等待首个副本的任务阻塞了工作线程"
+
+
+@pytest.mark.parametrize('leader_status', ['success', 'failed'])
+def test_waiting_duplicate_does_not_block_worker(migrator, leader_status):
+    services = migrator.services
+    etag = services.objects.etag(1000)
+    # 模拟首个副本（a.bin）正在由其他任务传输
+    leader = {'etag': etag, 'size': 1000}
+    assert migrator.dedup.claim(leader) is None
+    services.minio.buckets.setdefault('default', {})['a.bin'] = (1000, etag, datetime.now(timezone.utc), {})
+    
+    finished = []
+    
+    def on_done(item, future):
+        result = future.result()
+        finished.append((item.cos_path, result['status'], result.get('dedup_source')))
+        if item.cos_path == 'c.bin':
+            # 只有一个工作线程：b.bin等待期间c.bin仍能完成，之后首个副本才结束
+            leader.update(status=leader_status, bucket='default', cos_path='a.bin')
+            migrator.dedup.finish(leader)
+    
+    run_items(migrator, ['b.bin', 'c.bin'], on_done)
+    
+    copied_from = 'default/a.bin' if leader_status == 'success' else None
+    assert finished == [('c.bin', 'success', None), ('b.bin', 'success', copied_from)]
+    assert migrator.stats['deduplicated'] == (1 if copied_from else 0)
+    assert migrator.stats['retried'] == 0
+    assert set(services.minio.buckets['default']) == {'a.bin', 'b.bin', 'c.bin'}
+
+
+@pytest.mark.parametrize('staged', [False, True])
+def test_duplicates_are_copied_on_server(tmp_path, fake_services, staged):
+    import cos2minio
+    services = fake_services({'a.bin': 1000, 'b.bin': 1000, 'c.bin': 1000})
+    options = {'download_workers': 2, 'upload_workers': 2} if staged else {'max_workers': 3}
+    migrator = cos2minio.COS2MinIOMigrator(None, cos_config_name='bucket', dedup=True,
+                                           temp_dir=str(tmp_path / 'tmp'), **options)
+    try:
+        finished = []
+        run_items(migrator, ['a.bin', 'b.bin', 'c.bin'],
+                  lambda item, future: finished.append(future.result()['status']))
+    finally:
+        migrator.cleanup()
+    
+    assert finished == ['success'] * 3
+    assert migrator.stats['deduplicated'] == 2
+    assert migrator.stats['bytes'] == 1000
+    stored = services.minio.buckets['default']
+    assert {key: entry[:2] for key, entry in stored.items()} == {
+        key: (1000, services.objects.etag(1000)) for key in ('a.bin', 'b.bin', 'c.bin')
+    }
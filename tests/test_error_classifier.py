@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+错误分类测试 - 限流、可重试和永久错误的识别
+"""
+from checksum import ChecksumMismatchError
+from cos_downloader import IncompleteRangeError
+from error_classifier import PERMANENT, RETRYABLE, THROTTLED, classify_error, is_throttle_error
+
+
+class FakeS3Error(Exception):
+    """模拟带错误码和状态码的SDK异常"""
+    
+    def __init__(self, code, status):
+        super().__init__(code)
+        self.code = code
+        self.status = status
+
+
+def test_incomplete_range_is_retryable():
+    assert classify_error(IncompleteRangeError("分段下载不完整: a.bin bytes=0-9, 实际5字节")) == RETRYABLE
+
+
+def test_other_io_errors_are_permanent():
+    # 只按异常类型识别，与错误信息的内容和语言无关
+    assert classify_error(IOError("不完整")) == PERMANENT
+    assert classify_error(FileNotFoundError("missing")) == PERMANENT
+
+
+def test_checksum_mismatch_is_retryable():
+    assert classify_error(ChecksumMismatchError('a.bin', 'crc64', '1', '2')) == RETRYABLE
+
+
+def test_status_and_code_classification():
+    assert classify_error(FakeS3Error('SlowDown', 503)) == THROTTLED
+    assert classify_error(FakeS3Error('TooManyRequests', 429)) == THROTTLED
+    assert classify_error(FakeS3Error('InternalError', 500)) == RETRYABLE
+    assert classify_error(FakeS3Error('NoSuchKey', 404)) == PERMANENT
+    assert classify_error(FakeS3Error('AccessDenied', 403)) == PERMANENT
+
+
+def test_connection_reset_is_retryable_not_throttled():
+    assert classify_error(ConnectionResetError(104, 'Connection reset by peer')) == RETRYABLE
+    assert not is_throttle_error(ConnectionResetError(104, 'Connection reset by peer'))
+    assert not is_throttle_error(RuntimeError("('Connection aborted.', ConnectionResetError(104, 'Connection reset by peer'))"))
+
+
+def test_throttle_messages_without_status():
+    assert is_throttle_error(RuntimeError('Please reduce your request rate.'))
+    assert classify_error(RuntimeError('SlowDown')) == THROTTLED
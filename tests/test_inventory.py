@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+对象清单测试 - 前缀归并、覆盖判断、布隆过滤器和目标端批量列举
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from inventory import BloomFilter, DestinationInventory, DestinationObject, group_prefixes, is_covered
+
+
+def test_group_prefixes_merges_nested_prefixes():
+    keys = ['a/b/c/1.bin', 'a/b/2.bin', 'a/x.bin', 'root.bin', 'd/e/f.bin', 'd/g.bin']
+    assert group_prefixes(keys, depth=2) == ['a/', 'd/', 'root.bin']
+    assert group_prefixes(['a/b/c/1.bin', 'a/b/2.bin', 'a/c/3.bin'], depth=2) == ['a/b/', 'a/c/']
+    assert group_prefixes([], depth=2) == []
+
+
+def test_is_covered():
+    prefixes = group_prefixes(['a/b/1.bin', 'c/2.bin', 'root.bin'], depth=2)
+    assert is_covered(prefixes, 'a/b/other.bin')
+    assert is_covered(prefixes, 'c/d/e.bin')
+    assert is_covered(prefixes, 'root.bin')
+    assert not is_covered(prefixes, 'a/c.bin')
+    assert not is_covered(prefixes, 'b.bin')
+    assert not is_covered([], 'a/b/1.bin')
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f'present/{i}')
+    assert all(f'present/{i}' in bloom for i in range(1000))
+    false_positives = sum(f'absent/{i}' in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+@pytest.fixture
+def uploader(fake_services):
+    from minio_uploader import MinIOUploader
+    services = fake_services()
+    uploader = MinIOUploader()
+    modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    services.minio.buckets.setdefault('default', {}).update({
+        'a/b/1.bin': (10, 'etag-1', modified, {'cos-etag': 'src-1'}),
+        'a/b/2.bin': (20, 'etag-2', modified, {}),
+        'c/3.bin': (30, 'etag-3', modified, {})
+    })
+    return uploader
+
+
+def test_exact_inventory_answers_locally(uploader):
+    inventory = DestinationInventory(uploader, mode='exact', prefix_depth=2)
+    inventory.build([('default', 'a/b/1.bin'), ('default', 'a/b/9.bin'), ('missing', 'a/b/1.bin')])
+    
+    assert inventory.contains('default', 'a/b/1.bin') is True
+    assert inventory.contains('default', 'a/b/9.bin') is False
+    # 未列举的前缀无法确定
+    assert inventory.contains('default', 'c/3.bin') is None
+    assert inventory.contains('other', 'a/b/1.bin') is None
+    # 不存在的bucket中的对象都不存在
+    assert inventory.contains('missing', 'a/b/1.bin') is False
+    assert inventory.lookup('default', 'a/b/2.bin') == DestinationObject(20, 'etag-2')
+    
+    inventory.add('default', 'a/b/9.bin', (90, '"etag-9"'))
+    assert inventory.contains('default', 'a/b/9.bin') is True
+    assert inventory.lookup('default', 'a/b/9.bin').etag == 'etag-9'
+
+
+def test_exact_inventory_with_metadata(uploader):
+    inventory = DestinationInventory(uploader, mode='exact', prefix_depth=2, include_metadata=True)
+    inventory.build([('default', 'a/b/1.bin')])
+    entry = inventory.lookup('default', 'a/b/1.bin')
+    assert (entry.size, entry.etag, entry.metadata) == (10, 'etag-1', {'cos-etag': 'src-1'})
+    assert entry.last_modified == datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_bloom_inventory_only_rules_out_missing_objects(uploader):
+    inventory = DestinationInventory(uploader, mode='bloom', prefix_depth=2)
+    inventory.build([('default', 'a/b/1.bin')])
+    
+    # 命中可能是误判，需要调用方确认
+    assert inventory.contains('default', 'a/b/1.bin') is None
+    assert inventory.contains('default', 'a/b/9.bin') is False
+    assert inventory.lookup('default', 'a/b/1.bin') is None
+    
+    with pytest.raises(ValueError):
+        DestinationInventory(uploader, mode='bloom', include_metadata=True)
+
+
+def test_source_inventory_lists_cos_prefixes(fake_services):
+    from cos_downloader import COSDownloader
+    from inventory import SourceInventory, SourceObject
+    
+    services = fake_services({f'logs/2024/{i:04d}.bin': 100 + i for i in range(1500)} | {'root.bin': 7})
+    downloader = COSDownloader('bucket')
+    handle = downloader.registry.get('bucket')
+    inventory = SourceInventory(downloader, prefix_depth=2)
+    # 超过一页（1000个对象）时按Marker翻页
+    inventory.build([(handle, 'logs/2024/0000.bin'), (handle, 'root.bin')])
+    
+    assert inventory.contains('bucket', 'logs/2024/1499.bin') is True
+    assert inventory.contains('bucket', 'logs/2024/1500.bin') is False
+    assert inventory.contains('bucket', 'other/1.bin') is None
+    entry = inventory.lookup('bucket', 'logs/2024/0042.bin')
+    assert isinstance(entry, SourceObject)
+    assert (entry.size, entry.etag) == (142, services.objects.etag(142))
+    assert inventory.lookup('bucket', 'root.bin').size == 7
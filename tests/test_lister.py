@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+前缀列举测试 - 嵌套前缀的并行分区列举和列举失败的前缀
+"""
+import pytest
+
+from lister import PrefixLister
+
+
+TREE = {
+    'top.bin': 10,
+    'a/1.bin': 11,
+    'a/b/2.bin': 12,
+    'a/b/c/3.bin': 13,
+    'a/b/c/4.bin': 14,
+    'a/b/c/d/e/5.bin': 15,
+    'a/x/6.bin': 16,
+    'z/7.bin': 17
+}
+
+
+def fail_prefix(downloader, monkeypatch, failing):
+    """列举指定前缀时抛出异常"""
+    iter_objects = downloader.iter_objects
+    
+    def flaky(prefix='', *args, **kwargs):
+        if prefix == failing:
+            raise ConnectionError(f'list failed: {prefix}')
+        return iter_objects(prefix, *args, **kwargs)
+    
+    monkeypatch.setattr(downloader, 'iter_objects', flaky)
+
+
+@pytest.fixture
+def downloader(fake_services):
+    from cos_downloader import COSDownloader
+    
+    # 目录占位对象不迁移
+    fake_services({**TREE, 'a/b/': 0})
+    return COSDownloader('bucket')
+
+
+@pytest.mark.parametrize('prefix, fanout_depth', [('', 0), ('', 2), ('', 10), ('a/', 3), ('a/b/c/', 1)])
+def test_every_key_is_listed_once(downloader, prefix, fanout_depth):
+    lister = PrefixLister(downloader, downloader.handle, prefix, max_workers=4, fanout_depth=fanout_depth,
+                          queue_size=2)
+    keys = [obj['Key'] for obj in lister]
+    assert sorted(keys) == sorted(key for key in TREE if key.startswith(prefix))
+    assert lister.listed == len(keys)
+    assert lister.failed_prefixes == []
+
+
+def test_failed_prefix_is_recorded(downloader, monkeypatch):
+    fail_prefix(downloader, monkeypatch, 'a/b/')
+    lister = PrefixLister(downloader, downloader.handle, '', max_workers=4, fanout_depth=2)
+    keys = set(obj['Key'] for obj in lister)
+    assert lister.failed_prefixes == ['a/b/']
+    assert {'top.bin', 'a/1.bin', 'a/x/6.bin', 'z/7.bin'} <= keys
+    assert not keys & {'a/b/2.bin', 'a/b/c/3.bin', 'a/b/c/4.bin', 'a/b/c/d/e/5.bin'}
+
+
+def test_migrate_all_fails_when_a_prefix_cannot_be_listed(tmp_path, fake_services, monkeypatch):
+    import cos2minio
+    
+    services = fake_services(TREE)
+    migrator = cos2minio.COS2MinIOMigrator(None, cos_config_name='bucket', source_prefix='a/',
+                                           result_output=str(tmp_path / 'results.csv'),
+                                           temp_dir=str(tmp_path / 'tmp'))
+    fail_prefix(migrator.cos_downloader, monkeypatch, 'a/x/')
+    try:
+        assert migrator.migrate_all() is False
+    finally:
+        migrator.cleanup()
+    
+    assert migrator.lister.failed_prefixes == ['a/x/']
+    assert migrator.stats['failed'] == 0
+    assert sorted(services.minio.buckets['default']) == ['a/1.bin', 'a/b/2.bin', 'a/b/c/3.bin', 'a/b/c/4.bin',
+                                                         'a/b/c/d/e/5.bin']
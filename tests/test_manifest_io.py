@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pandas as pd
+import pytest
+
+from manifest_io import open_result_writer, read_finished_rows
+
+
+def write_run(path, rows):
+    writer = open_result_writer(str(path))
+    for index, status in rows:
+        writer.write(index, f'https://example.com/{index}.bin', 'default', status, size=index)
+    writer.close()
+    return writer
+
+
+def test_csv_results_are_appended_across_runs(tmp_path):
+    path = tmp_path / 'results.csv'
+    write_run(path, [(0, 'success'), (1, 'failed')])
+    write_run(path, [(1, 'success')])
+    
+    frame = pd.read_csv(path)
+    assert list(frame['row']) == [0, 1, 1]
+    assert list(frame['status']) == ['success', 'failed', 'success']
+
+
+def test_jsonl_results_are_appended_across_runs(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    write_run(path, [(0, 'failed')])
+    write_run(path, [(0, 'success')])
+    
+    records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [record['status'] for record in records] == ['failed', 'success']
+
+
+def test_parquet_resumed_run_keeps_earlier_results(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'results.parquet'
+    first = write_run(path, [(0, 'success'), (1, 'failed')])
+    second = write_run(path, [(1, 'success')])
+    
+    assert first.path == str(path)
+    assert second.path != first.path
+    assert list(pd.read_parquet(path)['status']) == ['success', 'failed']
+    assert list(pd.read_parquet(second.path)['row']) == [1]
+
+
+def test_finished_rows_are_read_from_all_runs(tmp_path):
+    path = tmp_path / 'results.csv'
+    write_run(path, [(0, 'success'), (1, 'failed'), (2, 'skipped')])
+    write_run(path, [(1, 'success'), (3, 'failed')])
+    assert read_finished_rows(str(path)) == {0, 1, 2}
+    assert read_finished_rows(str(tmp_path / 'missing.csv')) == set()
+
+
+def test_finished_rows_include_resumed_parquet_runs(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'results.parquet'
+    write_run(path, [(0, 'success'), (1, 'failed')])
+    second = write_run(path, [(1, 'success')])
+    current = open_result_writer(str(path))
+    try:
+        assert read_finished_rows(str(path)) >= {0, 1}
+        # 本次运行新建的文件（尚未写入文件尾）不读取
+        assert read_finished_rows(str(path), exclude=current.path) == {0, 1}
+    finally:
+        current.close()
+    assert second.path != str(path)
+
+
+def test_resume_with_result_file_skips_finished_rows(tmp_path, fake_services):
+    import cos2minio
+    from benchmark import COS_BUCKET
+    
+    fake_services({'a.bin': 10, 'b.bin': 20, 'c.bin': 30})
+    host = f'{COS_BUCKET}.cos.ap-guangzhou.myqcloud.com'
+    manifest = tmp_path / 'manifest.csv'
+    urls = [f'https://{host}/{name}' for name in ('a.bin', 'b.bin', 'c.bin')]
+    pd.DataFrame({'url': urls, 'buckets': ['default'] * 3}).to_csv(manifest, index=False)
+    output = tmp_path / 'results.csv'
+    write_run(output, [(0, 'success'), (1, 'failed')])
+    
+    migrator = cos2minio.COS2MinIOMigrator(str(manifest), cos_config_name='bucket', result_output=str(output),
+                                           temp_dir=str(tmp_path / 'tmp'))
+    try:
+        assert migrator.migrate_all(resume=True)
+    finally:
+        migrator.cleanup()
+    
+    assert migrator.stats['total'] == 2
+    resumed = pd.read_csv(output).iloc[2:].sort_values('row')
+    assert list(resumed['row']) == [1, 2]
+    assert list(resumed['status']) == ['success', 'success']
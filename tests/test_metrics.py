@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+监控指标测试 - 多线程累加计数和Prometheus文本格式
+"""
+import pickle
+import re
+import threading
+import urllib.request
+
+from metrics import MetricsServer, MigrationMetrics, MigrationStats
+
+
+THREADS = 8
+ROUNDS = 500
+
+SAMPLE = re.compile(r'^(cos2minio_[a-z_]+)(?:\{((?:[a-z]+="[^"]*",?)+)\})? (\S+)$')
+
+
+def parse(text):
+    """
+    解析指标文本
+    
+    Returns:
+        tuple: ({指标名: 类型}, {(指标名, 标签文本): 值})
+    """
+    types, samples = {}, {}
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if line.startswith('# HELP '):
+            # 每个指标的HELP后紧跟TYPE
+            name = line.split()[2]
+            kind = lines[i + 1].split()
+            assert kind[:3] == ['#', 'TYPE', name], line
+            types[name] = kind[3]
+        elif not line.startswith('#'):
+            match = SAMPLE.match(line)
+            assert match, f"格式错误: {line}"
+            name, labels, value = match.groups()
+            assert (name, labels) not in samples
+            samples[(name, labels)] = float(value)
+    return types, samples
+
+
+def run_threads(target):
+    threads = [threading.Thread(target=target) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_counters_are_not_lost():
+    stats = MigrationStats(total=0, success=0, failed=0, bytes=0)
+    metrics = MigrationMetrics(stats, buckets=(0.1, 1))
+    
+    def worker():
+        for i in range(ROUNDS):
+            stats.add('success')
+            stats.add('bytes', 10)
+            metrics.error('throttled' if i % 2 else 'retryable')
+            metrics.record('upload', 0.5)
+    
+    run_threads(worker)
+    total = THREADS * ROUNDS
+    assert stats['success'] == total
+    assert stats['bytes'] == total * 10
+    
+    types, samples = parse(metrics.render())
+    assert samples[('cos2minio_objects_total', 'status="success"')] == total
+    assert samples[('cos2minio_bytes_total', None)] == total * 10
+    assert samples[('cos2minio_errors_total', 'class="throttled"')] == total // 2
+    assert samples[('cos2minio_errors_total', 'class="retryable"')] == total // 2
+    assert samples[('cos2minio_stage_duration_seconds_count', 'stage="upload"')] == total
+    assert samples[('cos2minio_stage_duration_seconds_sum', 'stage="upload"')] == total * 0.5
+    assert types['cos2minio_errors_total'] == 'counter'
+    assert types['cos2minio_stage_duration_seconds'] == 'histogram'
+
+
+def test_render_histogram_and_gauges():
+    stats = MigrationStats(total=3, success=2, skipped=0, failed=1, retried=1, bytes=300)
+    metrics = MigrationMetrics(stats, buckets=(0.1, 1, 10))
+    metrics.register_gauge('concurrency_limit', '自适应并发的当前上限', lambda: 7)
+    for elapsed in (0.05, 0.5, 0.5, 20):
+        metrics.record('download', elapsed)
+    with metrics.stage('upload'):
+        _, in_flight = parse(metrics.render())
+        assert in_flight[('cos2minio_in_flight', 'stage="upload"')] == 1
+    
+    types, samples = parse(metrics.render())
+    buckets = [samples[('cos2minio_stage_duration_seconds_bucket', f'stage="download",le="{bound}"')]
+               for bound in (0.1, 1, 10, '+Inf')]
+    assert buckets == [1, 3, 3, 4]
+    assert samples[('cos2minio_stage_duration_seconds_count', 'stage="download"')] == 4
+    assert samples[('cos2minio_in_flight', 'stage="upload"')] == 0
+    assert samples[('cos2minio_objects_planned', None)] == 3
+    assert samples[('cos2minio_objects_total', 'status="failed"')] == 1
+    assert samples[('cos2minio_retries_total', None)] == 1
+    assert samples[('cos2minio_concurrency_limit', None)] == 7
+    assert types['cos2minio_concurrency_limit'] == 'gauge'
+    assert 'cos2minio_uptime_seconds' in types
+
+
+def test_stats_survive_pickling():
+    stats = MigrationStats(success=1)
+    copy = pickle.loads(pickle.dumps(stats))
+    copy.add('success')
+    assert copy == {'success': 2}
+
+
+def test_metrics_server_serves_exposition_text():
+    metrics = MigrationMetrics(MigrationStats(total=1, success=1))
+    server = MetricsServer(metrics, 0, host='127.0.0.1')
+    server.start()
+    try:
+        url = f'http://127.0.0.1:{server._server.server_port}/metrics'
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            _, samples = parse(response.read().decode('utf-8'))
+    finally:
+        server.close()
+    assert samples[('cos2minio_objects_total', 'status="success"')] == 1
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from pipeline import BoundedPipeline, ByteBudget
+
+
+def run_pipeline(worker, items, lanes=(('worker', 4),), route='worker', timeout=5):
+    """在后台线程中运行流水线，超时视为卡死"""
+    outcomes = []
+    error = []
+    
+    def on_done(item, future):
+        exception = future.exception()
+        outcomes.append((item, exception if exception is not None else future.result()))
+    
+    def target():
+        try:
+            BoundedPipeline(list(lanes), queue_size=2).run(worker, [(items, route)], on_done)
+        except Exception as e:
+            error.append(e)
+    
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "流水线未结束"
+    return outcomes, error
+
+
+def test_all_items_complete_and_callbacks_run_once():
+    outcomes, error = run_pipeline(lambda item: item * 2, iter(range(50)))
+    assert not error
+    assert sorted(outcomes) == [(i, i * 2) for i in range(50)]
+
+
+def test_worker_exception_is_delivered_through_future():
+    def worker(item):
+        if item == 3:
+            raise ValueError('bad item')
+        return item
+    
+    outcomes, error = run_pipeline(worker, iter(range(6)))
+    assert not error
+    failures = [(item, result) for item, result in outcomes if isinstance(result, Exception)]
+    assert len(outcomes) == 6
+    assert [item for item, _ in failures] == [3]
+    assert isinstance(failures[0][1], ValueError)
+
+
+def test_worker_base_exception_does_not_hang_pipeline():
+    def worker(item):
+        if item % 2:
+            raise SystemExit('library exit')
+        return item
+    
+    outcomes, error = run_pipeline(worker, iter(range(10)), lanes=(('worker', 2),))
+    assert not error
+    assert len(outcomes) == 10
+    assert sum(isinstance(result, SystemExit) for _, result in outcomes) == 5
+
+
+def test_producer_error_is_raised_after_queued_items_finish():
+    def items():
+        yield 1
+        yield 2
+        raise RuntimeError('manifest broken')
+    
+    outcomes, error = run_pipeline(lambda item: item, items())
+    assert sorted(outcomes) == [(1, 1), (2, 2)]
+    assert isinstance(error[0], RuntimeError)
+
+
+def test_items_are_routed_to_lanes():
+    seen = {}
+    
+    def worker(item):
+        seen[item] = threading.current_thread().name.rsplit('-', 1)[0]
+        return item
+    
+    outcomes, error = run_pipeline(worker, iter(range(8)), lanes=(('even', 1), ('odd', 1)),
+                                   route=lambda item: 'odd' if item % 2 else 'even')
+    assert not error
+    assert all(seen[item] == ('odd' if item % 2 else 'even') for item in range(8))
+
+
+def test_queue_is_bounded():
+    read = []
+    release = threading.Event()
+    
+    def items():
+        for i in range(100):
+            read.append(i)
+            yield i
+    
+    def worker(item):
+        release.wait()
+        return item
+    
+    thread = threading.Thread(target=run_pipeline, args=(worker, items(), (('worker', 1),)), daemon=True)
+    thread.start()
+    time.sleep(0.2)
+    # 1个工作线程 + 长度为2的队列 + 生产者手中的1个任务
+    assert len(read) <= 4
+    release.set()
+    thread.join(5)
+    assert len(read) == 100
+
+
+def test_byte_budget_blocks_until_released():
+    budget = ByteBudget(100)
+    budget.acquire(80)
+    acquired = threading.Event()
+    
+    def second():
+        budget.acquire(50)
+        acquired.set()
+    
+    threading.Thread(target=second, daemon=True).start()
+    assert not acquired.wait(0.1)
+    budget.release(80)
+    assert acquired.wait(1)
+    assert budget.used == 50
+    assert budget.peak == 80
+
+
+def test_byte_budget_admits_oversized_object_when_empty():
+    budget = ByteBudget(10)
+    budget.acquire(1000)
+    assert budget.used == 1000
+    budget.release(1000)
+    assert budget.used == 0
+
+
+@pytest.mark.parametrize('limit', [None, 0])
+def test_byte_budget_without_limit_only_counts(limit):
+    budget = ByteBudget(limit)
+    budget.acquire(10 ** 12)
+    budget.acquire(10 ** 12)
+    assert budget.used == 2 * 10 ** 12
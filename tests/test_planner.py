@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+迁移计划测试 - URL校验、源端配置解析、重复行合并和分片
+"""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from cos_downloader import COSClientRegistry
+from excel_processor import ExcelProcessor
+from planner import MigrationPlanner, shard_of
+
+
+HOST = 'test-1250000000.cos.ap-guangzhou.myqcloud.com'
+
+
+@pytest.fixture
+def planner(tmp_path):
+    rows = [
+        (f'https://{HOST}/a/1.bin', None, 'pending'),
+        (f'https://{HOST}/a/1.bin', None, 'pending'),
+        (f'https://{HOST}/a/1.bin', 'archive', 'pending'),
+        (f'https://{HOST}/a/2.bin', 'test', 'failed'),
+        ('not a url', None, 'pending'),
+        ('https://unknown-1250000001.cos.ap-guangzhou.myqcloud.com/b.bin', None, 'pending'),
+        (f'https://{HOST}/a/3.bin', None, 'success')
+    ]
+    path = tmp_path / 'manifest.csv'
+    pd.DataFrame(rows, columns=['url', 'buckets', 'status']).to_csv(path, index=False)
+    processor = ExcelProcessor(str(path))
+    assert processor.read_excel()
+    
+    created = []
+    uploader = SimpleNamespace(bucket_name='default', ensure_buckets=lambda buckets: created.extend(buckets))
+    planner = MigrationPlanner(processor, SimpleNamespace(registry=COSClientRegistry()), uploader)
+    planner.created = created
+    return planner
+
+
+def test_plan_merges_duplicates_and_resolves_configs(planner):
+    plan = planner.plan(['pending', 'failed'])
+    
+    assert plan.total_rows == 5
+    assert plan.duplicate_rows == 1
+    summary = [(item.index, item.cos_path, item.target_bucket, item.config_name, item.duplicates) for item in plan.items]
+    assert summary == [
+        (0, 'a/1.bin', 'default', 'bucket', (1,)),
+        (2, 'a/1.bin', 'archive', 'bucket', ()),
+        # bucket提示"test"匹配COS bucket的短名称
+        (3, 'a/2.bin', 'test', 'bucket', ()),
+        (5, 'b.bin', 'default', None, ())
+    ]
+    assert plan.items[0].bucket_hint is None
+    assert sorted(planner.created) == ['archive', 'default', 'default', 'test']
+
+
+def test_plan_row_does_not_merge(planner):
+    item = planner.plan_row(7, f'https://{HOST}/a/1.bin')
+    assert (item.cos_path, item.target_bucket, item.config_name, item.duplicates) == ('a/1.bin', 'default', 'bucket', ())
+
+
+def test_shards_partition_rows_by_cos_path(planner):
+    shards = [planner.plan(['pending', 'failed'], shard_index, 3) for shard_index in range(3)]
+    
+    indexes = sorted(item.index for plan in shards for item in plan.items)
+    assert indexes == [0, 2, 3, 5]
+    for shard_index, plan in enumerate(shards):
+        # 同一路径的重复行落在同一分片
+        assert all(shard_of(item.cos_path, 3) == shard_index for item in plan.items)
+    assert sum(plan.duplicate_rows for plan in shards) == 1
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+限速测试 - 令牌桶补充和突发、请求速率限制和运行中重新读取限速文件
+"""
+import json
+import os
+import time
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimit, RateLimiterRegistry, TokenBucket
+
+
+class FakeClock:
+    """替代time.monotonic和time.sleep，sleep只推进时间并记录等待"""
+    
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', fake.sleep)
+    return fake
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.02)
+
+
+def test_token_bucket_refills_up_to_burst(clock):
+    bucket = TokenBucket(rate=10, burst=20)
+    assert bucket.reserve(5) == pytest.approx(0.5)
+    
+    # 空闲期间最多积累burst个令牌
+    clock.now += 100
+    assert bucket.reserve(20) == 0
+    assert bucket.reserve(10) == pytest.approx(1.0)
+    
+    clock.now += 0.5
+    assert bucket.reserve(5) == pytest.approx(1.0)
+
+
+def test_token_bucket_without_rate_does_not_wait(clock):
+    bucket = TokenBucket()
+    assert bucket.reserve(10 ** 9) == 0
+    bucket.set_rate(100)
+    assert bucket.burst == 100
+    assert bucket.reserve(50) == pytest.approx(0.5)
+
+
+def test_request_rate_limit(clock):
+    limit = RateLimit('cos:test', requests=4)
+    start = clock.now
+    for _ in range(8):
+        limit.request()
+    assert clock.now - start == pytest.approx(2.0)
+    assert not limit.limits_bandwidth
+    
+    # 多进程时每个进程只使用1/share的限额
+    shared = RateLimit('cos:test', requests=4, share=2)
+    start = clock.now
+    for _ in range(4):
+        shared.request()
+    assert clock.now - start == pytest.approx(2.0)
+
+
+def test_bandwidth_limit_counts_bytes(clock):
+    limit = RateLimit('minio:test', bandwidth=1000)
+    assert limit.limits_bandwidth
+    start = clock.now
+    limit.transfer(3000)
+    assert clock.now - start == pytest.approx(3.0)
+    assert not limit.update(1000, None)
+    assert limit.update(0, None)
+    limit.transfer(10 ** 9)
+    assert clock.now - start == pytest.approx(3.0)
+
+
+def write_limits(path, spec, mtime):
+    path.write_text(json.dumps(spec), encoding='utf-8')
+    # 显式设置修改时间，避免文件系统时间精度不足时检测不到修改
+    os.utime(path, (mtime, mtime))
+
+
+def test_limits_file_is_reloaded_while_running(tmp_path):
+    path = tmp_path / 'limits.json'
+    registry = RateLimiterRegistry()
+    try:
+        # 启动时文件不存在，之后创建的文件也会被读取
+        registry.watch(str(path), interval=0.02)
+        write_limits(path, {'cos': {'bucket': {'request_limit': 10}}}, 1000)
+        wait_for(lambda: registry.cos('bucket').requests == 10)
+        
+        write_limits(path, {'cos': {'bucket': {'request_limit': 20}},
+                            'minio_buckets': {'default': {'bandwidth_limit': 1024}}}, 2000)
+        wait_for(lambda: registry.minio('default')[1].bandwidth == 1024)
+        assert registry.cos('bucket').requests == 20
+        
+        # 内容无效或文件被删除时保持原有限额
+        path.write_text('{not json', encoding='utf-8')
+        os.utime(path, (3000, 3000))
+        time.sleep(0.2)
+        path.unlink()
+        time.sleep(0.1)
+        assert registry.cos('bucket').requests == 20
+        assert registry._watcher.is_alive()
+        
+        write_limits(path, {'cos': {'bucket': {'request_limit': 5}}}, 4000)
+        wait_for(lambda: registry.cos('bucket').requests == 5)
+    finally:
+        registry.close()
+
+
+def test_load_rejects_invalid_or_missing_file(tmp_path):
+    registry = RateLimiterRegistry()
+    invalid = tmp_path / 'invalid.json'
+    invalid.write_text('{not json', encoding='utf-8')
+    assert not registry.load(str(invalid))
+    assert not registry.load(str(tmp_path / 'missing.json'))
+    assert registry.cos('bucket').requests == 0
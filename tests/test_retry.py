@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+延迟重试队列测试 - 退避时间、到期顺序和结束条件
+"""
+import threading
+import time
+
+import pytest
+
+from planner import WorkItem
+from retry import RetryQueue, backoff_delay
+
+
+def make_item(index, attempts=0):
+    return WorkItem(index, f'https://x/{index}', f'{index}.bin', None, 'default', 'bucket', (), attempts=attempts)
+
+
+def test_backoff_delay_is_capped_full_jitter(monkeypatch):
+    import retry
+    monkeypatch.setattr(retry.random, 'uniform', lambda low, high: high)
+    assert [backoff_delay(attempt, 1.0, 5.0) for attempt in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+    monkeypatch.setattr(retry.random, 'uniform', lambda low, high: low)
+    assert backoff_delay(3, 1.0, 5.0) == 0
+
+
+def test_schedule_increments_attempts_until_limit():
+    retries = RetryQueue(max_retries=2, base_delay=0.0)
+    item = make_item(0)
+    assert retries.can_retry(item)
+    retry_item, delay = retries.schedule(item)
+    assert retry_item.attempts == 1 and delay == 0
+    assert retries.can_retry(retry_item)
+    assert not retries.can_retry(retry_item._replace(attempts=2))
+    assert retries.scheduled == 1
+
+
+def test_due_items_are_yielded_in_order_and_iteration_ends():
+    retries = RetryQueue(max_retries=3)
+    retries.track([make_item(0), make_item(1)])
+    retries.defer(make_item(1), 0.1)
+    retries.defer(make_item(0), 0.0)
+    
+    yielded = []
+    started = time.monotonic()
+    for item in retries:
+        yielded.append((item.index, round(time.monotonic() - started, 1)))
+        # 每个任务得到最终结果
+        retries.finish()
+    
+    assert [index for index, _ in yielded] == [0, 1]
+    assert yielded[1][1] >= 0.1
+
+
+def test_iteration_waits_for_open_items():
+    retries = RetryQueue(max_retries=1, base_delay=0.0)
+    items = retries.track(iter([make_item(0)]))
+    assert [item.index for item in items] == [0]
+    
+    def fail_then_finish():
+        time.sleep(0.1)
+        # 执行中的任务失败后放入重试队列，迭代器不能在此之前结束
+        retries.schedule(make_item(0))
+    
+    threading.Thread(target=fail_then_finish).start()
+    yielded = []
+    for item in retries:
+        yielded.append(item.attempts)
+        retries.finish()
+    assert yielded == [1]
+
+
+@pytest.mark.parametrize('engine', ['thread', 'staged'])
+def test_failed_transfers_are_retried_then_reported(tmp_path, monkeypatch, fake_services, engine):
+    import cos2minio
+    import retry
+    monkeypatch.setitem(retry.RETRY_CONFIG, 'base_delay', 0.0)
+    fake_services({'a.bin': 1000, 'b.bin': 2000})
+    options = {'download_workers': 2, 'upload_workers': 2} if engine == 'staged' else {'max_workers': 2}
+    # 经过临时文件上传（不使用流式传输和内存暂存）
+    migrator = cos2minio.COS2MinIOMigrator(None, cos_config_name='bucket', max_retries=2, stream_mode=False,
+                                           memory_threshold=0, temp_dir=str(tmp_path / 'tmp'), **options)
+    calls = []
+    upload_file = migrator.minio_uploader.upload_file
+    
+    def flaky_upload(local_path, object_name, *args, **kwargs):
+        calls.append(object_name)
+        if object_name == 'b.bin':
+            raise ConnectionResetError(104, 'Connection reset by peer')
+        return upload_file(local_path, object_name, *args, **kwargs)
+    
+    monkeypatch.setattr(migrator.minio_uploader, 'upload_file', flaky_upload)
+    items = [WorkItem(0, 'https://x/a.bin', 'a.bin', None, 'default', 'bucket', ()),
+             WorkItem(1, 'https://x/b.bin', 'b.bin', None, 'default', 'bucket', ())]
+    finished = {}
+    try:
+        migrator.execute(items, lambda item, future: finished.update({item.cos_path: future.result()}), prescan=False)
+    finally:
+        migrator.cleanup()
+    
+    assert calls.count('b.bin') == 3
+    assert finished['a.bin']['status'] == 'success'
+    assert finished['b.bin']['status'] == 'failed'
+    assert finished['b.bin']['retries'] == 2
+    assert '已重试2次' in finished['b.bin']['error']
+    assert migrator.stats['retried'] == 2
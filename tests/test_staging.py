@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+暂存测试 - 内存/磁盘暂存的选择、临时文件路径和暂存空间预算
+"""
+import os
+import threading
+
+import pytest
+
+from pipeline import ByteBudget
+from staging import StagingManager
+
+
+@pytest.fixture
+def staging(tmp_path):
+    managers = []
+    
+    def create(quota=0, memory_threshold=100, memory_limit=1000):
+        manager = StagingManager(str(tmp_path), quota, memory_threshold, memory_limit)
+        managers.append(manager)
+        return manager
+    
+    yield create
+    for manager in managers:
+        manager.close()
+
+
+def test_objects_up_to_threshold_are_staged_in_memory(staging):
+    manager = staging(memory_threshold=100)
+    at_threshold = manager.allocate('a.bin', 100)
+    above_threshold = manager.allocate('b.bin', 101)
+    assert at_threshold.in_memory and at_threshold.buffer is not None
+    assert not above_threshold.in_memory and os.path.exists(above_threshold.path)
+    assert (manager.memory_objects, manager.disk_objects) == (1, 1)
+    
+    at_threshold.release()
+    above_threshold.release()
+    assert manager.memory_used == 0
+    assert not os.path.exists(above_threshold.path)
+
+
+def test_full_memory_buffer_and_zero_threshold_spill_to_disk(staging):
+    manager = staging(memory_threshold=100, memory_limit=150)
+    first = manager.allocate('a.bin', 100)
+    second = manager.allocate('b.bin', 100)
+    assert first.in_memory and not second.in_memory
+    first.release()
+    assert manager.allocate('c.bin', 100).in_memory
+    
+    assert not staging(memory_threshold=0).allocate('d.bin', 1).in_memory
+
+
+def test_temp_files_are_unique_per_worker(staging, tmp_path):
+    manager = staging(memory_threshold=0)
+    first = manager.allocate('a/1.jpg', 10)
+    second = manager.allocate('b/1.jpg', 10)
+    worker_dir = os.path.join(str(tmp_path), f'worker-{os.getpid()}')
+    assert manager.worker_dir == worker_dir
+    assert first.path != second.path
+    for staged in (first, second):
+        assert os.path.dirname(staged.path) == worker_dir
+        assert staged.path.endswith('_1.jpg')
+    
+    manager.close()
+    assert not os.path.exists(worker_dir)
+
+
+def test_byte_budget_blocks_until_space_is_released():
+    budget = ByteBudget(100)
+    budget.acquire(80)
+    acquired = threading.Event()
+    
+    def waiter():
+        budget.acquire(50)
+        acquired.set()
+    
+    thread = threading.Thread(target=waiter, daemon=True)
+    thread.start()
+    assert not acquired.wait(0.2)
+    budget.release(80)
+    assert acquired.wait(5)
+    thread.join(5)
+    assert (budget.used, budget.peak) == (50, 80)
+
+
+def test_byte_budget_admits_oversized_object_when_empty():
+    budget = ByteBudget(100)
+    budget.acquire(500)
+    assert budget.used == 500
+    budget.release(500)
+    assert budget.used == 0
+
+
+def test_staging_quota_is_returned_on_release(staging):
+    manager = staging(quota=100, memory_threshold=0)
+    staged = manager.allocate('a.bin', 80)
+    assert manager.quota.used == 80
+    staged.release()
+    staged.release()
+    assert manager.quota.used == 0
+
+
+@pytest.mark.parametrize('memory_threshold', [0, None])
+def test_zero_byte_object_is_migrated(tmp_path, fake_services, memory_threshold):
+    import cos2minio
+    from planner import WorkItem
+    
+    services = fake_services({'empty.bin': 0})
+    migrator = cos2minio.COS2MinIOMigrator(None, cos_config_name='bucket', memory_threshold=memory_threshold,
+                                           temp_dir=str(tmp_path / 'tmp'))
+    try:
+        result = migrator.migrate_item(WorkItem(0, 'https://x/empty.bin', 'empty.bin', None, 'default', 'bucket', ()))
+    finally:
+        migrator.cleanup()
+    
+    assert result['status'] == 'success', result.get('error')
+    assert services.minio.buckets['default']['empty.bin'][0] == 0
+
+
+def test_download_file_rejects_size_mismatch(tmp_path, fake_services):
+    from cos_downloader import COSDownloader
+    
+    fake_services({'a.bin': 10})
+    downloader = COSDownloader('bucket')
+    path = downloader.download_file('a.bin', temp_dir=str(tmp_path), size=10)
+    assert path is not None and os.path.getsize(path) == 10
+    assert downloader.download_file('a.bin', temp_dir=str(tmp_path), size=11) is None
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+状态日志测试 - 初始化、批量提交、分块读取和旧版本日志的升级
+"""
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from state_store import StateStore
+
+
+COLUMNS = ('url', 'status', 'buckets')
+
+
+def manifest(count, offset=0):
+    return pd.DataFrame({
+        'url': [f'https://x/{i}.bin' for i in range(offset, offset + count)],
+        'status': ['pending'] * count,
+        'buckets': [None if i % 2 else 'archive' for i in range(offset, offset + count)]
+    }, index=range(offset, offset + count))
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StateStore(str(tmp_path / 'manifest.xlsx.state'), batch_size=100, flush_interval=3600)
+    yield store
+    store.close()
+
+
+def test_seed_keeps_recorded_statuses(store):
+    assert not store.has_rows()
+    store.seed(manifest(5), *COLUMNS)
+    store.record(1, 'success', 10, 'etag-1')
+    store.flush()
+    
+    # 中断后重新初始化：已有的行保留日志中的状态
+    store.seed(manifest(5), *COLUMNS)
+    assert not store.is_seeded()
+    store.mark_seeded()
+    assert store.is_seeded()
+    frame = store.load_frame(*COLUMNS)
+    assert frame['status'].tolist() == ['pending', 'success', 'pending', 'pending', 'pending']
+    assert frame.loc[0, 'buckets'] == 'archive' and pd.isna(frame.loc[1, 'buckets'])
+
+
+def test_records_are_committed_in_batches(store, tmp_path):
+    store.seed(manifest(3), *COLUMNS)
+    store.record(0, 'failed', error='boom', retries=2, dest_etag='d', checksum='md5:x')
+    
+    # 其他连接读不到尚未提交的更新
+    reader = sqlite3.connect(store.path)
+    assert reader.execute('SELECT status FROM rows WHERE idx = 0').fetchone() == ('pending',)
+    store.flush()
+    assert reader.execute('SELECT status, error, retries, dest_etag, checksum FROM rows WHERE idx = 0').fetchone() \
+        == ('failed', 'boom', 2, 'd', 'md5:x')
+    reader.close()
+    
+    statuses = store.statuses()
+    assert statuses.loc[0, 'retries'] == 2
+    assert statuses['status'].tolist() == ['failed', 'pending', 'pending']
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 4, 10])
+def test_iter_frames_reads_all_rows_in_index_order(store, chunk_size):
+    # 索引不连续（流式读取清单时按块写入）
+    store.seed(manifest(4), *COLUMNS)
+    store.seed(manifest(3, offset=100), *COLUMNS)
+    
+    frames = list(store.iter_frames(chunk_size, *COLUMNS))
+    assert all(len(frame) <= chunk_size for frame in frames)
+    assert [index for frame in frames for index in frame.index] == [0, 1, 2, 3, 100, 101, 102]
+
+
+def test_old_journal_gets_new_columns(tmp_path):
+    path = str(tmp_path / 'old.state')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE rows (idx INTEGER PRIMARY KEY, url TEXT, bucket TEXT, status TEXT NOT NULL,
+                           bytes INTEGER, etag TEXT, error TEXT, updated_at REAL);
+        INSERT INTO rows (idx, url, status) VALUES (0, 'https://x/0.bin', 'failed');
+    """)
+    conn.close()
+    
+    store = StateStore(path)
+    try:
+        store.record(0, 'success', retries=1, checksum='crc64:1')
+        statuses = store.statuses()
+    finally:
+        store.close()
+    assert statuses.loc[0, ['status', 'retries', 'checksum']].tolist() == ['success', 1, 'crc64:1']
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+增量同步测试 - 变更判断和基于批量列举的重复同步
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from inventory import DestinationObject
+from sync import SOURCE_CRC64_META, SOURCE_ETAG_META, change_reason, parse_time, source_metadata
+
+
+MD5_A = '0cc175b9c0f1b6a831c399e269772661'
+MD5_B = '92eb5ffee6ae2fec3ad71c777531578f'
+MULTIPART = '9e107d9d372bb6826bd81d3542a419d6-4'
+
+
+def dest(size=10, etag=MD5_A, last_modified='2024-01-02T00:00:00.000Z', **metadata):
+    return DestinationObject(size, etag, last_modified, metadata)
+
+
+@pytest.mark.parametrize('source, target, changed', [
+    ({'size': 10, 'etag': MD5_A}, None, True),
+    ({'size': 11, 'etag': MD5_A}, dest(), True),
+    ({'size': 10, 'etag': f'"{MD5_A}"'}, dest(), False),
+    ({'size': 10, 'etag': MD5_B}, dest(), True),
+    # 目标端记录的源端校验值优先于ETag比对
+    ({'size': 10, 'etag': MULTIPART, 'crc64': '123'}, dest(etag=MULTIPART, **{SOURCE_CRC64_META: '123'}), False),
+    ({'size': 10, 'etag': MULTIPART, 'crc64': '124'}, dest(etag=MULTIPART, **{SOURCE_CRC64_META: '123'}), True),
+    ({'size': 10, 'etag': MULTIPART}, dest(etag=MD5_A, **{SOURCE_ETAG_META: MULTIPART}), False),
+    ({'size': 10, 'etag': MD5_B}, dest(etag=MD5_B, **{SOURCE_ETAG_META: MD5_A}), True),
+    # 分片上传的ETag无法比对内容，按修改时间判断
+    ({'size': 10, 'etag': MULTIPART, 'last_modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}, dest(etag=MULTIPART), False),
+    ({'size': 10, 'etag': MULTIPART, 'last_modified': '2024-01-03T00:00:00Z'}, dest(etag=MULTIPART), True)
+])
+def test_change_reason(source, target, changed):
+    assert (change_reason(source, target) is not None) == changed
+
+
+def test_source_metadata_and_parse_time():
+    assert source_metadata({'etag': f'"{MD5_A}"', 'crc64': 123}) == {SOURCE_ETAG_META: MD5_A, SOURCE_CRC64_META: '123'}
+    assert source_metadata({'etag': None}) is None
+    expected = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert parse_time('2024-01-01T00:00:00.000Z') == expected
+    assert parse_time('Mon, 01 Jan 2024 00:00:00 GMT') == expected
+    assert parse_time(datetime(2024, 1, 1)) == expected
+    assert parse_time('yesterday') is None
+
+
+def test_repeated_sync_only_transfers_changed_objects(tmp_path, fake_services):
+    import cos2minio
+    from planner import WorkItem
+    
+    services = fake_services({'a.bin': 1000, 'b.bin': 2000, 'c.bin': 3000})
+    items = [WorkItem(i, f'https://x/{path}', path, None, 'default', 'bucket', ())
+             for i, path in enumerate(services.objects.keys)]
+    
+    def sync():
+        migrator = cos2minio.COS2MinIOMigrator(None, cos_config_name='bucket', sync=True,
+                                               temp_dir=str(tmp_path / 'tmp'))
+        finished = {}
+        try:
+            migrator.execute(items, lambda item, future: finished.update({item.cos_path: future.result()['status']}))
+        finally:
+            migrator.cleanup()
+        return finished
+    
+    assert sync() == {'a.bin': 'success', 'b.bin': 'success', 'c.bin': 'success'}
+    assert sync() == {'a.bin': 'skipped', 'b.bin': 'skipped', 'c.bin': 'skipped'}
+    
+    # 源端对象内容变更（大小和ETag均变化）
+    services.objects.sizes['b.bin'] = 2500
+    assert sync() == {'a.bin': 'skipped', 'b.bin': 'success', 'c.bin': 'skipped'}
+    assert services.minio.buckets['default']['b.bin'][:2] == (2500, services.objects.etag(2500))
+    assert services.minio.buckets['default']['b.bin'][3] == {SOURCE_ETAG_META: services.objects.etag(2500)}
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+多进程执行测试 - 工作进程回传结果在父进程中的汇总
+"""
+import pandas as pd
+import pytest
+
+from planner import WorkItem
+from retry import RetryQueue
+
+
+@pytest.fixture
+def make_migrator(tmp_path, fake_services):
+    import cos2minio
+    fake_services()
+    migrators = []
+    
+    def make(**options):
+        migrator = cos2minio.COS2MinIOMigrator(None, cos_config_name='bucket', temp_dir=str(tmp_path / 'tmp'),
+                                               **options)
+        migrators.append(migrator)
+        return migrator
+    
+    yield make
+    for migrator in migrators:
+        migrator.cleanup()
+
+
+def test_final_failure_from_worker_is_recorded_once(tmp_path, make_migrator):
+    # 工作进程：重试次数用尽，错误信息注明重试次数
+    worker = make_migrator(max_retries=3)
+    worker._retries = RetryQueue(3)
+    item = WorkItem(0, 'https://x/a.bin', 'a.bin', None, 'default', 'bucket', (), attempts=3)
+    result = worker._new_result(item)
+    worker._mark_failed(item, result, ConnectionResetError(104, 'Connection reset by peer'))
+    worker._record_result(item, result)
+    assert result['error'] == "[Errno 104] Connection reset by peer（已重试3次）"
+    
+    # 父进程：只汇总，不再处理重试
+    output = tmp_path / 'results.csv'
+    parent = make_migrator(max_retries=3, result_output=str(output))
+    parent._on_process_result(item, dict(result))
+    parent.result_writer.flush()
+    
+    assert parent.stats['failed'] == 1
+    assert parent.stats['retried'] == 0
+    errors = pd.read_csv(output)['error_msg'].tolist()
+    assert errors == ["[Errno 104] Connection reset by peer（已重试3次）"]
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+性能分析模块 - 将每个迁移任务的阶段耗时记录为跨度（Chrome trace格式），并可在一段时间窗口内采样所有线程的调用栈
+
+跨度在MigrationMetrics的阶段结束时写出：线程引擎中同一线程内的跨度按时间嵌套，在chrome://tracing或
+Perfetto中即为每个任务的阶段树（任务 > 源端HEAD、目标端stat、下载、上传、清理）；异步引擎中多个任务
+交错运行在同一线程上，改为按任务分组的异步事件。未启用时只有一次属性判断的开销。
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from config import PROFILE_CONFIG
+
+
+# 多进程时工作进程的输出文件后缀（{pid}替换为进程号），迁移结束后由父进程合并
+WORKER_SUFFIX = '.worker-{pid}'
+
+
+def worker_path(path):
+    """工作进程使用的输出路径"""
+    return path + WORKER_SUFFIX if path else path
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class TraceWriter:
+    """
+    Chrome trace写入器
+    
+    事件逐行追加到JSON数组中（Trace Event Format允许省略结尾的]，进程中断时已写出的事件仍可打开），
+    内存占用与事件数无关。时间戳使用单调时钟，同一台主机上多个进程的事件可以合并到一个文件。
+    """
+    
+    def __init__(self, path, batch_size=None):
+        """
+        初始化写入器
+        
+        Args:
+            path: 输出文件路径（其中的{pid}替换为进程号）
+            batch_size: 每批写入的事件数，如果为None则使用配置文件中的设置
+        """
+        self.pid = os.getpid()
+        self.path = path.replace('{pid}', str(self.pid))
+        self.batch_size = batch_size or PROFILE_CONFIG['batch_size']
+        self.events = 0
+        
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._threads = set()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write('[\n')
+    
+    def span(self, name, elapsed, result=None):
+        """
+        记录一个刚结束的阶段
+        
+        Args:
+            name: 阶段名称
+            elapsed: 耗时（秒）
+            result: 迁移结果（用于标注对象名称，并在异步引擎中按任务分组）
+        """
+        end = time.monotonic() * 1e6
+        start = end - elapsed * 1e6
+        tid = threading.get_ident()
+        args = {}
+        if result is not None:
+            args = {'object': result.get('cos_path'), 'bucket': result.get('bucket')}
+            if result.get('size') is not None:
+                args['size'] = result['size']
+        
+        base = {'name': name, 'cat': 'migration', 'pid': self.pid, 'tid': tid}
+        if _in_event_loop():
+            # 异步事件：同一任务的阶段按id嵌套
+            trace_id = f"{args.get('bucket')}/{args.get('object')}" if result is not None else name
+            events = [dict(base, ph='b', ts=round(start, 1), id=trace_id, args=args),
+                      dict(base, ph='e', ts=round(end, 1), id=trace_id)]
+        else:
+            events = [dict(base, ph='X', ts=round(start, 1), dur=round(end - start, 1), args=args)]
+        
+        with self._lock:
+            if tid not in self._threads:
+                self._threads.add(tid)
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid,
+                               'args': {'name': threading.current_thread().name}})
+            self._buffer.extend(events)
+            self.events += len(events)
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+    
+    def _flush_locked(self):
+        if self._buffer:
+            self._file.write(''.join(json.dumps(event, ensure_ascii=False) + ',\n' for event in self._buffer))
+            self._buffer = []
+    
+    def merge(self, path):
+        """
+        合并另一个进程写出的trace文件，合并后删除该文件
+        
+        Args:
+            path: trace文件路径
+        """
+        with open(path, encoding='utf-8') as f:
+            content = f.read().strip()
+        content = content.lstrip('[').rstrip(']').strip().rstrip(',')
+        with self._lock:
+            self._flush_locked()
+            if content:
+                self._file.write(content + ',\n')
+        os.remove(path)
+    
+    def close(self):
+        """写出剩余事件并结束JSON数组"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._flush_locked()
+            process = {'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': 'cos2minio'}}
+            self._file.write(json.dumps(process, ensure_ascii=False) + '\n]\n')
+            self._file.close()
+            self._file = None
+        logging.info(f"性能跟踪已写入: {self.path}（{self.events}个事件，可在chrome://tracing或Perfetto中打开）")
+
+
+class StackSampler:
+    """
+    调用栈采样器
+    
+    在[delay, delay + duration)时间窗口内按固定间隔采样所有线程的调用栈，结果以折叠栈格式写出
+    （每行为"线程;外层函数;...;内层函数 次数"，flamegraph.pl、speedscope可直接读取）。
+    与cProfile不同，采样覆盖所有工作线程，且开销只与采样间隔有关。
+    """
+    
+    def __init__(self, path, duration, delay=0.0, interval=None):
+        """
+        初始化采样器
+        
+        Args:
+            path: 输出文件路径（其中的{pid}替换为进程号）
+            duration: 采样时长（秒）
+            delay: 启动后等待多久开始采样（秒）
+            interval: 采样间隔（秒），如果为None则使用配置文件中的设置
+        """
+        self.path = path.replace('{pid}', str(os.getpid()))
+        self.duration = duration
+        self.delay = delay or 0.0
+        self.interval = interval or PROFILE_CONFIG['sample_interval']
+        self.samples = 0
+        self.counts = Counter()
+        
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """在后台线程中开始采样"""
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        if self._stop.wait(self.delay):
+            return
+        deadline = time.monotonic() + self.duration
+        while time.monotonic() < deadline and not self._stop.wait(self.interval):
+            self._sample()
+    
+    def _sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            # 线程池中的线程名称带有序号，去掉序号后同类线程合并统计
+            thread = re.sub(r'[-_]\d+$', '', names.get(ident, 'thread'))
+            self.counts[';'.join([thread] + stack[::-1])] += 1
+        self.samples += 1
+    
+    def merge(self, path):
+        """
+        合并另一个进程写出的折叠栈文件，合并后删除该文件
+        
+        Args:
+            path: 折叠栈文件路径
+        """
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack:
+                    self.counts[stack] += int(count)
+        os.remove(path)
+    
+    def close(self, top=15):
+        """
+        停止采样并写出结果
+        
+        Args:
+            top: 日志中列出的自身耗时最多的函数数量
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+        
+        leaves = Counter()
+        for stack, count in self.counts.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        lines = [f"  {count / total:6.1%}  {frame}" for frame, count in leaves.most_common(top)]
+        logging.info(f"调用栈采样已写入: {self.path}（{self.samples}次采样），自身耗时最多的函数:\n" + '\n'.join(lines))
+
+
+class Profiler:
+    """
+    --profile模式：阶段跨度和可选的调用栈采样
+    
+    多进程时每个工作进程写出各自的文件，迁移结束后父进程合并到同一个文件中。
+    """
+    
+    def __init__(self, path, sample_duration=None, sample_delay=0.0):
+        """
+        初始化性能分析
+        
+        Args:
+            path: Chrome trace输出路径
+            sample_duration: 调用栈采样时长（秒），为None时不采样
+            sample_delay: 启动后等待多久开始采样（秒）
+        """
+        self.path = path
+        self.tracer = TraceWriter(path)
+        self.sampler = None
+        if sample_duration:
+            self.sampler = StackSampler(self.tracer.path + '.folded', sample_duration, sample_delay)
+            self.sampler.start()
+    
+    def close(self, merge_workers=False):
+        """
+        写出结果
+        
+        Args:
+            merge_workers: 是否合并工作进程写出的文件（多进程模式的父进程）
+        """
+        if merge_workers:
+            pattern = worker_path(self.path).replace('{pid}', '*')
+            for path in sorted(glob.glob(glob.escape(self.path) + pattern[len(self.path):])):
+                if path.endswith('.folded'):
+                    if self.sampler is not None:
+                        self.sampler.merge(path)
+                else:
+                    self.tracer.merge(path)
+        if self.sampler is not None:
+            self.sampler.close()
+        self.tracer.close()
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+多进程执行模块 - 将迁移计划分配到多个工作进程，每个进程使用独立的COS/MinIO客户端和线程池
+
+工作进程以spawn方式启动，不继承父进程的客户端连接和锁。任务通过共享的有界队列分发，
+空闲的进程先取到任务；迁移结果通过队列逐条回传，由父进程统一更新行状态和统计信息。
+"""
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+
+from config import LOG_CONFIG
+
+
+# 工作进程结束标记
+_DONE = None
+
+
+def _failed_result(item, error):
+    """构造失败结果，格式与migrate_item()一致"""
+    return {
+        'index': item.index,
+        'url': item.url,
+        'bucket': item.target_bucket,
+        'status': 'failed',
+        'success': False,
+        'error': error,
+        'cos_path': item.cos_path,
+        'local_path': None,
+        'minio_path': None
+    }
+
+
+def _worker_main(options, task_queue, result_queue):
+    """
+    工作进程入口
+    
+    Args:
+        options: 构造COS2MinIOMigrator的参数
+        task_queue: 共享的任务队列，读到结束标记后停止取任务
+        result_queue: 回传(item, result)的队列
+    """
+    logging.basicConfig(
+        level=getattr(logging, LOG_CONFIG['level']),
+        format='%(asctime)s [%(levelname)s] [%(processName)s] %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    
+    # 延迟导入，避免与主程序模块循环导入
+    from cos2minio import COS2MinIOMigrator
+    
+    def on_done(item, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            result = _failed_result(item, str(e))
+        result_queue.put((item, result))
+    
+    migrator = None
+    try:
+        # 工作进程不读取Excel，行状态只在父进程中更新
+        migrator = COS2MinIOMigrator(**options)
+        # 任务已在父进程中预扫描和过滤，工作进程不再预扫描（否则会先读空共享队列）
+        migrator.execute(iter(task_queue.get, _DONE), on_done, prescan=False)
+    except Exception as e:
+        logging.error(f"工作进程异常退出: {e}")
+    finally:
+        if migrator is not None:
+            migrator.close_profiler()
+            migrator.staging.close()
+        result_queue.put(_DONE)
+
+
+class ProcessRunner:
+    """多进程执行器"""
+    
+    def __init__(self, options, processes, queue_size=None):
+        """
+        初始化多进程执行器
+        
+        Args:
+            options: 工作进程中构造COS2MinIOMigrator的参数（需可pickle）
+            processes: 工作进程数
+            queue_size: 任务队列长度，如果为None则为所有进程总并发数的2倍
+        """
+        self.options = options
+        self.processes = max(processes, 1)
+        self.queue_size = queue_size or self.processes * options.get('max_workers', 5) * 2
+    
+    def run(self, items, on_result):
+        """
+        在工作进程中执行所有任务（阻塞直到全部完成）
+        
+        Args:
+            items: WorkItem的可迭代对象（可以是流式读取清单的迭代器）
+            on_result: 结果回调，参数为(item, result)，在父进程中调用
+        """
+        context = multiprocessing.get_context('spawn')
+        task_queue = context.Queue(maxsize=self.queue_size)
+        result_queue = context.Queue()
+        
+        workers = []
+        for i in range(self.processes):
+            worker = context.Process(
+                target=_worker_main,
+                args=(self.options, task_queue, result_queue),
+                name=f'worker-{i}',
+                daemon=True
+            )
+            worker.start()
+            workers.append(worker)
+        
+        logging.info(f"已启动{len(workers)}个工作进程")
+        
+        # 已分发但尚未回传结果的任务
+        in_flight = {}
+        lock = threading.Lock()
+        
+        def put(message):
+            # 所有工作进程都已退出时不再等待队列空位
+            while True:
+                try:
+                    task_queue.put(message, timeout=1)
+                    return True
+                except queue.Full:
+                    if not any(worker.is_alive() for worker in workers):
+                        return False
+        
+        def produce():
+            try:
+                for item in items:
+                    with lock:
+                        in_flight[item.index] = item
+                    if not put(item):
+                        logging.error("所有工作进程均已退出，停止分发任务")
+                        return
+            except Exception as e:
+                logging.error(f"读取迁移任务失败: {e}")
+            finally:
+                for _ in workers:
+                    put(_DONE)
+        
+        producer = threading.Thread(target=produce, name='producer', daemon=True)
+        producer.start()
+        
+        finished = 0
+        while finished < len(workers):
+            try:
+                message = result_queue.get(timeout=1)
+            except queue.Empty:
+                # 工作进程被强制终止时不会发送结束标记
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                continue
+            
+            if message is _DONE:
+                finished += 1
+                continue
+            
+            item, result = message
+            with lock:
+                in_flight.pop(item.index, None)
+            on_result(item, result)
+        
+        producer.join()
+        for worker in workers:
+            worker.join()
+            if worker.exitcode:
+                logging.error(f"工作进程异常退出: {worker.name}, 退出码: {worker.exitcode}")
+        
+        # 已分发但未回传结果的任务按失败处理，可通过--resume重试
+        for item in in_flight.values():
+            on_result(item, _failed_result(item, "工作进程未返回结果"))